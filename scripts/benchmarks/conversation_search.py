@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Conversation history search benchmark: LIKE scan vs FTS5.
+
+Builds a temporary database with a synthetic history (the FTS index is
+filled by the conversation_history triggers as rows are inserted), then
+times the old `content LIKE '%query%'` search against the ranked FTS5
+query used by get_conversation_history.
+
+Message text follows a Zipf distribution over a pseudo-word vocabulary, so
+queries cover common words (many matches: LIKE stops early, FTS5 ranks
+every match) as well as rare ones (LIKE scans the whole session).
+
+Usage:
+    python scripts/benchmarks/conversation_search.py
+    python scripts/benchmarks/conversation_search.py --messages 500000 --repeat 20
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.database import Database
+
+VOCABULARY_SIZE = 20_000
+
+# Vocabulary ranks used as query terms: common, mid-frequency and rare words
+QUERY_RANKS = [(30,), (800,), (6_000,), (15_000,), (800, 2_000)]
+
+
+def _vocabulary(rng: random.Random) -> list:
+    """Pseudo-words; message text draws from them with Zipf frequencies like real chat."""
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        length = rng.randint(2, 5)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words, key=lambda _: rng.random())
+
+
+LIKE_SQL = """
+    SELECT timestamp, role, content
+    FROM conversation_history
+    WHERE conversation_id = :session_id AND content LIKE :query
+    ORDER BY ts_ms DESC, id DESC
+    LIMIT 10
+"""
+
+FTS_SQL = """
+    SELECT h.timestamp, h.role, snippet(conversation_history_fts, 0, '[', ']', '…', 24)
+    FROM conversation_history_fts
+    JOIN conversation_history h ON h.id = conversation_history_fts.rowid
+    WHERE conversation_history_fts MATCH :match AND h.conversation_id = :session_id
+    ORDER BY bm25(conversation_history_fts)
+    LIMIT 10
+"""
+
+
+def _populate(db: Database, words: list, messages: int, sessions: int, batch: int = 5000):
+    rng = np.random.default_rng(42)
+    vocabulary = np.array(words, dtype=object)
+    cdf = np.cumsum(1 / np.arange(1, len(words) + 1))
+    cdf /= cdf[-1]
+    start_ms = 1_700_000_000_000
+    for offset in range(0, messages, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, messages)):
+            ts_ms = start_ms + i * 30_000
+            tokens = vocabulary[np.searchsorted(cdf, rng.random(int(rng.integers(8, 61))))]
+            rows.append({
+                "conversation_id": f"user-{i % sessions}",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts_ms / 1000)),
+                "ts_ms": ts_ms,
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": " ".join(tokens),
+            })
+        db.insert_many("conversation_history", rows)
+
+
+def _time(db: Database, sql: str, params: dict, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.fetchall(sql, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300_000)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_path=Path(tmp) / "friday.db")
+        words = _vocabulary(random.Random(7))
+
+        start = time.perf_counter()
+        _populate(db, words, args.messages, args.sessions)
+        print(f"Inserted {args.messages:,} messages (with FTS triggers) in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        db.execute("INSERT INTO conversation_history_fts(conversation_history_fts) VALUES ('rebuild')")
+        print(f"Full FTS rebuild (migration backfill) in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query (word ranks)':<32}{'LIKE ms':>10}{'FTS5 ms':>10}{'speedup':>10}")
+        for ranks in QUERY_RANKS:
+            query = " ".join(words[rank] for rank in ranks)
+            label = f"{query} ({', '.join(map(str, ranks))})"
+            like_ms = _time(db, LIKE_SQL, {"session_id": "user-0", "query": f"%{query}%"}, args.repeat)
+            match = " ".join(f'"{word}"*' for word in query.split())
+            fts_ms = _time(db, FTS_SQL, {"session_id": "user-0", "match": match}, args.repeat)
+            print(f"{label:<32}{like_ms:>10.1f}{fts_ms:>10.1f}{like_ms / fts_ms:>9.1f}x")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
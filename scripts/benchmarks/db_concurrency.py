@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+SQLite concurrency benchmark for the central Database.
+
+Simulates the Telegram bot, awareness daemon and CLI hitting friday.db at
+the same time: writer processes insert snapshot rows one commit at a time
+(like InsightsStore.save_snapshot) while reader processes run the
+get_snapshots query. Each engine profile runs against a fresh temporary
+database and reports throughput and "database is locked" errors.
+
+Usage:
+    python scripts/benchmarks/db_concurrency.py
+    python scripts/benchmarks/db_concurrency.py --writers 3 --readers 3 --seconds 10
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy.exc import OperationalError
+
+from src.core.database import Database, ENGINE_PROFILES
+
+PAYLOAD = json.dumps({
+    "local": {"disk_percent": 42.1, "memory_percent": 63.5, "cpu_load": 1.2},
+    "services": [{"name": f"svc-{i}", "status": "up"} for i in range(15)],
+})
+
+
+def _writer(db_path: str, profile: str, deadline: float, results):
+    db = Database(db_path=Path(db_path), profile=profile)
+    ops = errors = 0
+    while time.time() < deadline:
+        try:
+            db.insert("snapshots", {
+                "id": str(uuid.uuid4()),
+                "collector": "get_friday_status",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "ts_ms": int(time.time() * 1000),
+                "data": PAYLOAD,
+            })
+            ops += 1
+        except OperationalError:
+            errors += 1
+    db.close()
+    results.put(("write", ops, errors))
+
+
+def _reader(db_path: str, profile: str, deadline: float, results):
+    db = Database(db_path=Path(db_path), profile=profile)
+    ops = errors = 0
+    while time.time() < deadline:
+        try:
+            db.fetchall(
+                "SELECT * FROM snapshots WHERE collector = :collector "
+                "ORDER BY ts_ms DESC LIMIT 100",
+                {"collector": "get_friday_status"},
+            )
+            ops += 1
+        except OperationalError:
+            errors += 1
+    db.close()
+    results.put(("read", ops, errors))
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    """Run one benchmark round and return aggregated counters."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        Database(db_path=Path(db_path), profile=profile).close()  # create schema
+
+        results = mp.Queue()
+        deadline = time.time() + 1.0 + seconds
+        procs = [mp.Process(target=_writer, args=(db_path, profile, deadline, results)) for _ in range(writers)]
+        procs += [mp.Process(target=_reader, args=(db_path, profile, deadline, results)) for _ in range(readers)]
+        for p in procs:
+            p.start()
+
+        totals = {"write": [0, 0], "read": [0, 0]}
+        for _ in procs:
+            kind, ops, errors = results.get()
+            totals[kind][0] += ops
+            totals[kind][1] += errors
+        for p in procs:
+            p.join()
+
+    return {
+        "profile": profile,
+        "writes_per_s": totals["write"][0] / seconds,
+        "reads_per_s": totals["read"][0] / seconds,
+        "write_errors": totals["write"][1],
+        "read_errors": totals["read"][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", default=list(ENGINE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers / {args.readers} readers, {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10} {'w-locked':>10} {'r-locked':>10}")
+    for profile in args.profiles:
+        r = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(
+            f"{r['profile']:<10} {r['writes_per_s']:>10.0f} {r['reads_per_s']:>10.0f} "
+            f"{r['write_errors']:>10} {r['read_errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Embedding micro-batching benchmark: per-call encode vs MicroBatcher.
+
+Runs N threads that each encode one text at a time (the call pattern of
+tools, analyzers and knowledge saves) and reports throughput and latency
+percentiles with and without cross-thread batching, for several
+concurrency levels. Texts are unique and the embedding cache is off, so
+every call reaches the model.
+
+By default the configured sentence-transformers model is used. With
+--synthetic the model is replaced by a fixed per-call cost plus a per-text
+cost. The synthetic forward pass holds a lock while it sleeps: like a real
+CPU model it releases the GIL but occupies the cores, so concurrent calls
+run one after another. This shows the scheduling behaviour without model
+files.
+
+Usage:
+    python scripts/benchmarks/embedding_batching.py
+    python scripts/benchmarks/embedding_batching.py --concurrency 1 4 16 --calls 200
+    python scripts/benchmarks/embedding_batching.py --synthetic --call-ms 8 --text-ms 0.3
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from settings import settings
+from src.core.embeddings import EmbeddingsModel
+
+
+class SyntheticModel:
+    """Model with a fixed per-call and per-text cost, one call at a time."""
+
+    def __init__(self, call_ms: float, text_ms: float, dimension: int = 384):
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+        self.dimension = dimension
+        self._busy = threading.Lock()
+
+    def encode(self, texts, **kwargs):
+        with self._busy:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return np.ones((len(texts), self.dimension), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+def run(model: EmbeddingsModel, concurrency: int, calls: int):
+    """Encode `calls` single texts from each of `concurrency` threads."""
+    latencies = [[] for _ in range(concurrency)]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(n: int):
+        barrier.wait()
+        for i in range(calls):
+            start = time.perf_counter()
+            model.encode(f"worker {n} message {i} about the homelab disk usage")
+            latencies[n].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(ms for per_thread in latencies for ms in per_thread)
+    return {
+        "throughput": len(samples) / elapsed,
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--calls", type=int, default=100, help="encode calls per thread")
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EMBEDDINGS["batching"]["max_wait_ms"])
+    parser.add_argument("--max-batch-size", type=int, default=settings.EMBEDDINGS["batching"]["max_batch_size"])
+    parser.add_argument("--synthetic", action="store_true", help="use a synthetic model instead of the real one")
+    parser.add_argument("--call-ms", type=float, default=8.0, help="synthetic cost per model call")
+    parser.add_argument("--text-ms", type=float, default=0.3, help="synthetic cost per text")
+    args = parser.parse_args()
+
+    batching = {"max_wait_ms": args.max_wait_ms, "max_batch_size": args.max_batch_size}
+    models = {
+        "per-call": EmbeddingsModel(model_name=settings.EMBEDDINGS["model_name"]),
+        "batched": EmbeddingsModel(model_name=settings.EMBEDDINGS["model_name"], batching=batching),
+    }
+    for model in models.values():
+        if args.synthetic:
+            model._model = SyntheticModel(args.call_ms, args.text_ms)
+        model.encode("warm up")
+
+    print(f"{'threads':>7}  {'mode':<9} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8}  batch")
+    for concurrency in args.concurrency:
+        for name, model in models.items():
+            result = run(model, concurrency, args.calls)
+            batch = ""
+            if model.batcher is not None:
+                batch = f"{model.batcher.stats()['mean_texts_per_batch']:.1f}"
+                model.batcher.batches = model.batcher.requests = model.batcher.texts = 0
+            print(f"{concurrency:>7}  {name:<9} {result['throughput']:>9.0f} "
+                  f"{result['p50']:>8.2f} {result['p95']:>8.2f}  {batch}")
+
+    models["batched"].batcher.close()
+
+
+if __name__ == "__main__":
+    main()
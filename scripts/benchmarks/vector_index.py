@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Vector search benchmark: per-row BLOB loop vs VectorIndex.
+
+Compares the old _vector_search_facts approach (decode every embedding
+BLOB with np.frombuffer and compute cosine similarity in a Python loop)
+with VectorIndex.search (one matrix-vector product + argpartition) on
+random 384-dimensional vectors.
+
+Usage:
+    python scripts/benchmarks/vector_index.py
+    python scripts/benchmarks/vector_index.py --entries 50000 --k 10
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.vector_index import VectorIndex
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.entries, args.dimension)).astype(np.float32)
+    blobs = [vector.tobytes() for vector in vectors]
+    query = rng.normal(size=args.dimension).astype(np.float32)
+
+    def blob_loop():
+        results = []
+        for i, blob in enumerate(blobs):
+            vector = np.frombuffer(blob, dtype=np.float32)
+            results.append((i, float(np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector)))))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:args.k]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex.open(Path(tmp) / "bench", dimension=args.dimension)
+        start = time.perf_counter()
+        index.add([str(i) for i in range(args.entries)], vectors)
+        index.save()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        reopened = VectorIndex.open(Path(tmp) / "bench", dimension=args.dimension)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        loop_ms = _median_ms(blob_loop, max(args.repeat // 10, 1))
+        index_ms = _median_ms(lambda: reopened.search(query, k=args.k), args.repeat)
+
+        assert [int(id_) for id_, _ in reopened.search(query, k=args.k)] == [i for i, _ in blob_loop()]
+
+    print(f"{args.entries:,} vectors x {args.dimension} dims, top {args.k}")
+    print(f"  build + save index:   {build_ms:8.1f} ms")
+    print(f"  open (memory-mapped): {open_ms:8.1f} ms")
+    print(f"  BLOB loop search:     {loop_ms:8.2f} ms")
+    print(f"  VectorIndex search:   {index_ms:8.3f} ms  ({loop_ms / index_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Vector index quantization benchmark: memory, latency and recall@k.
+
+Builds one VectorIndex per storage variant (float32 baseline, float16,
+int8 with per-vector scales, each quantized type with and without float32
+re-ranking) over the same vectors and reports the resident memory of the
+searched arrays, median search latency and recall@k against the exact
+float32 top k.
+
+Random Gaussian vectors are a pessimistic case for recall (neighbours are
+barely closer than everything else); clustered vectors, closer to real
+sentence embeddings, are generated with --clusters.
+
+Usage:
+    python scripts/benchmarks/vector_quantization.py
+    python scripts/benchmarks/vector_quantization.py --entries 100000 --k 10 --clusters 500
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.vector_index import VectorIndex
+
+VARIANTS = [
+    ("float32", False),
+    ("float16", False),
+    ("float16", True),
+    ("int8", False),
+    ("int8", True),
+]
+
+
+def make_vectors(rng: np.random.Generator, count: int, dimension: int, clusters: int) -> np.ndarray:
+    if clusters <= 0:
+        return rng.normal(size=(count, dimension)).astype(np.float32)
+    centers = rng.normal(size=(clusters, dimension))
+    assignment = rng.integers(0, clusters, size=count)
+    return (centers[assignment] + 0.5 * rng.normal(size=(count, dimension))).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=0, help="generate clustered vectors (0 = Gaussian)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(rng, args.entries + args.queries, args.dimension, args.clusters)
+    vectors, queries = vectors[:args.entries], vectors[args.entries:]
+    ids = [str(i) for i in range(args.entries)]
+
+    indexes = {}
+    for dtype, rerank in VARIANTS:
+        index = VectorIndex(dimension=args.dimension, capacity=args.entries, dtype=dtype, rerank=rerank)
+        index.add(ids, vectors)
+        indexes[(dtype, rerank)] = index
+
+    baseline = indexes[("float32", False)]
+    truth = [{id_ for id_, _ in baseline.search(query, k=args.k)} for query in queries]
+    baseline_bytes = baseline.memory_bytes()["vectors"]
+
+    print(f"{args.entries:,} vectors x {args.dimension} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'variant':<16} {'scanned MB':>10} {'vs f32':>7} {'p50 ms':>8} {'recall':>7}")
+    for (dtype, rerank), index in indexes.items():
+        memory = index.memory_bytes()
+        scanned = memory["vectors"] + memory.get("scales", 0)
+
+        timings, found = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = index.search(query, k=args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+            found += len(expected & {id_ for id_, _ in results})
+
+        name = dtype + (" +rerank" if rerank else "")
+        print(f"{name:<16} {scanned / 1e6:>10.1f} {scanned / baseline_bytes:>6.0%} "
+              f"{statistics.median(timings):>8.2f} {found / (args.k * args.queries):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,26 @@ PATHS = {
 }
 
 
+# ==============================================================================
+# Database Configuration
+# ==============================================================================
+
+# SQLite engine profile shared by the Telegram bot, awareness daemon and CLI.
+# "wal" enables WAL journaling + tuned pragmas, "legacy" keeps SQLite defaults.
+DATABASE = {
+    "profile": os.getenv("DATABASE_PROFILE", "wal"),
+    "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+    # Overrides applied on top of the selected profile
+    "pragmas": {
+        "busy_timeout": int(os.getenv("DATABASE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("DATABASE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": int(os.getenv("DATABASE_CACHE_SIZE_KB", "65536")) * -1,
+    },
+}
+
+
 # ==============================================================================
 # User Configuration
 # ==============================================================================
@@ -80,6 +100,78 @@ LLM = {
 }
 
 
+# ==============================================================================
+# Conversation Configuration
+# ==============================================================================
+
+CONVERSATION = {
+    # In-memory LRU of session histories; evicted sessions reload from SQLite
+    "cache": {
+        "max_sessions": int(os.getenv("CONVERSATION_CACHE_MAX_SESSIONS", "64")),
+        "max_bytes": int(os.getenv("CONVERSATION_CACHE_MAX_MB", "32")) * 1024 * 1024,
+    },
+    # Token budget for the history sent to the model; older turns fold into
+    # a rolling summary stored in conversation_summaries
+    "history_window": {
+        "enabled": os.getenv("CONVERSATION_WINDOW_ENABLED", "true").lower() == "true",
+        "max_tokens": int(os.getenv("CONVERSATION_WINDOW_MAX_TOKENS", "6000")),
+        "summary_max_tokens": int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "800")),
+        "summary_line_chars": 240,   # Per-message excerpt length in the summary
+        "chars_per_token": 4,        # Token estimate without loading a tokenizer
+    },
+}
+
+
+# ==============================================================================
+# Embeddings Configuration
+# ==============================================================================
+
+EMBEDDINGS = {
+    "model_name": os.getenv("EMBEDDINGS_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+    "device": os.getenv("EMBEDDINGS_DEVICE", "cpu"),
+    # Inference backend: "torch" (sentence-transformers) or "onnx" (ONNX
+    # Runtime on an exported model directory; no PyTorch import)
+    "backend": os.getenv("EMBEDDINGS_BACKEND", "torch"),
+    "onnx": {
+        "model_dir": os.getenv("EMBEDDINGS_ONNX_DIR", str(BASE_DIR / "data" / "models" / "all-MiniLM-L6-v2")),
+        "file_name": os.getenv("EMBEDDINGS_ONNX_FILE", "model.onnx"),
+        # Dynamically quantize the graph to int8 weights (created once next to it)
+        "quantize": os.getenv("EMBEDDINGS_ONNX_QUANTIZE", "false").lower() == "true",
+    },
+    "threads": int(os.getenv("EMBEDDINGS_THREADS", "0")),      # 0 = library default
+    # Load the model when a daemon starts instead of on the first query
+    "warmup": os.getenv("EMBEDDINGS_WARMUP", "true").lower() == "true",
+    # Shared embedding server (services/friday-embeddings.service): clients
+    # use it while the socket is up and load the model in-process otherwise
+    "server": {
+        "enabled": os.getenv("EMBEDDINGS_SERVER_ENABLED", "true").lower() == "true",
+        "socket": os.getenv("EMBEDDINGS_SOCKET", str(BASE_DIR / "data" / "embeddings.sock")),
+        "timeout": float(os.getenv("EMBEDDINGS_SERVER_TIMEOUT", "30")),
+    },
+    # Content-addressed cache of computed vectors in the central database,
+    # keyed by (model_name, hash of normalized text)
+    "cache": {
+        "enabled": os.getenv("EMBEDDINGS_CACHE_ENABLED", "true").lower() == "true",
+        "max_entries": int(os.getenv("EMBEDDINGS_CACHE_MAX_ENTRIES", "200000")),
+        "evict_batch": 1000,    # Least recently used entries dropped per eviction
+    },
+    # Coalesce concurrent encode() calls from different threads into one
+    # batched forward pass
+    "batching": {
+        "enabled": os.getenv("EMBEDDINGS_BATCHING_ENABLED", "true").lower() == "true",
+        "max_wait_ms": float(os.getenv("EMBEDDINGS_BATCH_WAIT_MS", "2")),
+        "max_batch_size": int(os.getenv("EMBEDDINGS_MAX_BATCH_SIZE", "64")),
+    },
+    # In-memory vector index used by fact search: "float32", "float16" or
+    # "int8" (per-vector scale); rerank re-scores quantized candidates from a
+    # memory-mapped float32 copy
+    "index": {
+        "dtype": os.getenv("EMBEDDINGS_INDEX_DTYPE", "float32"),
+        "rerank": os.getenv("EMBEDDINGS_INDEX_RERANK", "true").lower() == "true",
+    },
+}
+
+
 # ==============================================================================
 # API Configuration
 # ==============================================================================
@@ -479,6 +571,49 @@ AWARENESS = {
 
     # Storage settings
     "snapshot_retention_days": 90,
+    "maintenance": {
+        "enabled": True,
+        "purge_schedule": "15 * * * *",   # Chunked retention purge (hourly)
+        "vacuum_schedule": "30 4 * * *",  # incremental_vacuum in off-hours
+        "insight_retention_days": 90,
+        "delivery_retention_days": 90,
+        "chunk_size": 500,                # Rows deleted per commit
+        "chunk_pause_ms": 50,             # Pause between chunks so other writers get the lock
+        "vacuum_max_pages": 0,            # Pages freed per run (0 = whole freelist)
+    },
+    "snapshot_codec": "auto",  # auto | msgpack_zstd | json_zlib | json (uncompressed TEXT)
+    "snapshot_dedupe": True,   # Store unchanged payloads as "still valid at T" markers
+
+    # Hourly/daily numeric rollups of snapshots for long-range analysis
+    "snapshot_rollup": {
+        "enabled": True,
+        "raw_retention_days": 14,   # Raw snapshots older than this are compacted into rollups
+        "raw_window_hours": 48,     # get_rollups(auto): windows up to this read raw snapshots
+        "hourly_window_days": 31,   # ...up to this read hourly rollups, longer reads daily
+    },
+
+    # Numeric snapshot paths extracted at ingest into the metrics table
+    # ({collector: {metric: [paths]}}). "[*]" iterates a list; each item's
+    # "name" becomes the entity, otherwise the first path segment is used.
+    "metrics": {
+        "homelab": {
+            "disk_percent": ["local.disk_percent", "hardware.servers[*].disk_percent"],
+            "memory_percent": ["local.memory_percent", "hardware.servers[*].memory_percent"],
+            "load_1min": ["local.load_1min"],
+        },
+        "health": {
+            "stress": ["stress.current"],
+            "body_battery": ["body_battery.current"],
+            "sleep_score": ["sleep.sleep_score"],
+        },
+    },
+
+    # Write-behind queue for snapshots auto-saved by data tools
+    "snapshot_writer": {
+        "max_queue": 1000,         # Pending snapshots before new ones are dropped
+        "batch_size": 50,          # Flush as soon as this many are waiting
+        "flush_interval_ms": 500,  # Max time a snapshot waits in the queue
+    },
 }
 
 
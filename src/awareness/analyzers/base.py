@@ -5,12 +5,12 @@ Abstract base class for all analyzers.
 """
 
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 import logging
 import time
 
-from src.awareness.models import Insight, AnalyzerResult
+from src.awareness.models import Insight, AnalyzerResult, SnapshotRollup
 from settings import settings
 from src.awareness.store import InsightsStore
 
@@ -114,6 +114,29 @@ class BaseAnalyzer(ABC):
         snapshots = self.store.get_snapshots(collector, hours=hours)
         return [s.data for s in snapshots]
     
+    def get_rollups(
+        self,
+        collector: str,
+        hours: int,
+        field_pattern: Optional[str] = None,
+        resolution: str = "auto"
+    ) -> List[SnapshotRollup]:
+        """Get a downsampled numeric series for long-range analysis.
+        
+        Args:
+            collector: Collector name
+            hours: How many hours back to look
+            field_pattern: Optional glob on field paths (e.g. "*disk_percent")
+            resolution: "raw", "hourly", "daily" or "auto" (picked from the window)
+            
+        Returns:
+            List of SnapshotRollup objects, oldest first
+        """
+        since = datetime.now(get_brt()) - timedelta(hours=hours)
+        return self.store.get_rollups(
+            collector, since=since, resolution=resolution, field_pattern=field_pattern
+        )
+    
     def was_insight_delivered_recently(
         self, 
         dedupe_key: str, 
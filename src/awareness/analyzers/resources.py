@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from settings import settings
 def get_brt():
     return settings.TIMEZONE
@@ -25,6 +27,20 @@ from src.awareness.store import InsightsStore
 logger = logging.getLogger(__name__)
 
 
+_SERVER_PREFIX = "hardware.servers."
+_DISK_SUFFIX = ".disk_percent"
+
+
+def _disk_field_server(field_name: str) -> Optional[str]:
+    """Get the server of a flattened disk_percent field, or None for other fields."""
+    if field_name.startswith("local.") and field_name.endswith(_DISK_SUFFIX):
+        return "local"
+    if field_name.startswith(_SERVER_PREFIX) and field_name.endswith(_DISK_SUFFIX):
+        name = field_name[len(_SERVER_PREFIX):-len(_DISK_SUFFIX)]
+        return name or None
+    return None
+
+
 class ResourceTrendAnalyzer(PeriodicAnalyzer):
     """
     Analyzes resource usage trends and predicts future issues.
@@ -61,42 +77,25 @@ class ResourceTrendAnalyzer(PeriodicAnalyzer):
         """Analyze disk usage trends across servers."""
         insights = []
 
-        # Get historical homelab snapshots
-        snapshots = self.get_recent_snapshots("homelab", hours=24*7)  # 1 week
+        # Get a week of disk usage, downsampled (hourly rollups)
+        series = self.get_rollups("homelab", hours=24*7, field_pattern="*disk_percent")
 
-        if len(snapshots) < 10:
+        if len(series) < 10:
             return insights
 
         # Track disk usage over time for each server
+        # Fields: "local.disk_percent", "hardware.servers.<name>.disk_percent"
+        # (<name> may itself contain dots, e.g. "nas.local")
         disk_history: Dict[str, List[Tuple[datetime, float]]] = {}
 
-        for snapshot in snapshots:
-            timestamp = snapshot.get("collected_at")
-            if not timestamp:
-                continue
-
-            try:
-                ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-            except (ValueError, TypeError):
-                continue
-
-            # Local disk
-            local = snapshot.get("local", {})
-            local_disk = local.get("disk_percent")
-            if local_disk is not None:
-                if "local" not in disk_history:
-                    disk_history["local"] = []
-                disk_history["local"].append((ts, local_disk))
-
-            # Server disks
-            hardware = snapshot.get("hardware", {})
-            for server in hardware.get("servers", []):
-                name = server.get("name", "unknown")
-                disk_pct = server.get("disk_percent")
-                if disk_pct is not None:
-                    if name not in disk_history:
-                        disk_history[name] = []
-                    disk_history[name].append((ts, disk_pct))
+        for rollup in series:
+            for field_name in rollup.fields:
+                name = _disk_field_server(field_name)
+                if name is None:
+                    continue
+                disk_history.setdefault(name, []).append(
+                    (rollup.bucket, rollup.get(field_name, "last"))
+                )
 
         # Analyze each server's disk trend
         for server_name, history in disk_history.items():
@@ -158,33 +157,15 @@ class ResourceTrendAnalyzer(PeriodicAnalyzer):
         """Analyze memory usage patterns for potential leaks."""
         insights = []
 
-        # Get recent snapshots (last 24 hours for memory analysis)
-        snapshots = self.get_recent_snapshots("homelab", hours=24)
+        # Memory over the last 24 hours, per server (metrics table)
+        series = self.store.get_series(
+            "homelab", "memory_percent", since=datetime.now(get_brt()) - timedelta(hours=24)
+        )
 
-        if len(snapshots) < 20:
+        if len(np.unique(series.ts)) < 20:  # number of samples, not rows
             return insights
 
-        # Track memory over time
-        memory_history: Dict[str, List[float]] = {}
-
-        for snapshot in snapshots:
-            # Local memory
-            local = snapshot.get("local", {})
-            mem = local.get("memory_percent")
-            if mem is not None:
-                if "local" not in memory_history:
-                    memory_history["local"] = []
-                memory_history["local"].append(mem)
-
-            # Server memory
-            hardware = snapshot.get("hardware", {})
-            for server in hardware.get("servers", []):
-                name = server.get("name", "unknown")
-                mem_pct = server.get("memory_percent")
-                if mem_pct is not None:
-                    if name not in memory_history:
-                        memory_history[name] = []
-                    memory_history[name].append(mem_pct)
+        memory_history = {name: values for name, (_, values) in series.by_entity().items()}
 
         # Check for consistently increasing memory (potential leak)
         for server_name, history in memory_history.items():
@@ -192,15 +173,10 @@ class ResourceTrendAnalyzer(PeriodicAnalyzer):
                 continue
 
             # Check if memory is consistently increasing
-            increasing_count = 0
-            for i in range(1, len(history)):
-                if history[i] > history[i-1]:
-                    increasing_count += 1
-
-            increase_ratio = increasing_count / (len(history) - 1)
+            increase_ratio = float(np.mean(np.diff(history) > 0))
 
             # If >80% of samples show increase and current is high
-            current_mem = history[-1]
+            current_mem = float(history[-1])
             if increase_ratio > 0.8 and current_mem > 80:
                 dedupe_key = f"memory_leak_{server_name}"
                 if not self.was_insight_delivered_recently(dedupe_key, hours=24):
@@ -127,23 +127,22 @@ class SleepCorrelationAnalyzer(PeriodicAnalyzer):
         """Analyze sleep correlations with historical data."""
         insights = []
 
-        # Get historical health snapshots
-        health_snapshots = self.get_recent_snapshots("health", hours=24*14)  # 2 weeks
+        # Two weeks of health data, one rollup per day
+        daily = self.get_rollups("health", hours=24*14, resolution="daily")
 
-        if len(health_snapshots) < self.MIN_DAYS_FOR_CORRELATION:
+        if len(daily) < self.MIN_DAYS_FOR_CORRELATION:
             return insights
 
         # Extract sleep scores and previous day metrics
         sleep_data = []
-        for snapshot in health_snapshots:
-            sleep = snapshot.get("sleep", {})
-            score = sleep.get("sleep_score")
+        for rollup in daily:
+            score = rollup.get("sleep.sleep_score", "last")
             if score:
                 sleep_data.append({
                     "score": score,
-                    "duration": sleep.get("duration_hours"),
-                    "stress_prev": snapshot.get("stress", {}).get("average"),
-                    "steps_prev": snapshot.get("activity", {}).get("steps"),
+                    "duration": rollup.get("sleep.duration_hours", "last"),
+                    "stress_prev": rollup.get("stress.average"),
+                    "steps_prev": rollup.get("activity.steps", "max"),
                 })
 
         if len(sleep_data) < self.MIN_DAYS_FOR_CORRELATION:
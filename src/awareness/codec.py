@@ -0,0 +1,137 @@
+"""
+Friday Insights Engine - Snapshot Payload Codec
+
+Versioned binary encoding for snapshot payloads.
+
+Encoded payloads are BLOBs whose first byte identifies the codec:
+- 0x01: JSON, zlib-compressed (stdlib only, always available)
+- 0x02: msgpack, zstd-compressed (requires msgpack + zstandard)
+
+Legacy rows written before the codec existed are plain JSON TEXT and are
+still decoded transparently, so old and new rows can live side by side.
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from typing import Any, Dict, Optional, Union
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+CODEC_JSON_ZLIB = 0x01
+CODEC_MSGPACK_ZSTD = 0x02
+
+CODEC_NAMES = {
+    "json_zlib": CODEC_JSON_ZLIB,
+    "msgpack_zstd": CODEC_MSGPACK_ZSTD,
+}
+
+try:
+    import msgpack
+    import zstandard
+
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    HAS_MSGPACK_ZSTD = True
+except ImportError:
+    HAS_MSGPACK_ZSTD = False
+
+
+def default_codec() -> int:
+    """Get the codec id for new writes.
+
+    Uses settings.AWARENESS["snapshot_codec"] ("auto", "json_zlib",
+    "msgpack_zstd" or "json" for uncompressed legacy TEXT). "auto" picks
+    msgpack_zstd when its dependencies are installed.
+
+    Returns:
+        Codec id, or 0 for legacy JSON TEXT
+    """
+    name = settings.AWARENESS.get("snapshot_codec", "auto")
+    if name == "json":
+        return 0
+    if name == "auto":
+        return CODEC_MSGPACK_ZSTD if HAS_MSGPACK_ZSTD else CODEC_JSON_ZLIB
+    if name not in CODEC_NAMES:
+        raise ValueError(f"Unknown snapshot codec: {name}")
+    if CODEC_NAMES[name] == CODEC_MSGPACK_ZSTD and not HAS_MSGPACK_ZSTD:
+        logger.warning("msgpack/zstandard not installed, falling back to json_zlib")
+        return CODEC_JSON_ZLIB
+    return CODEC_NAMES[name]
+
+
+def encode_payload(data: Dict[str, Any], codec: Optional[int] = None) -> Union[bytes, str]:
+    """Encode a snapshot payload.
+
+    Args:
+        data: Snapshot data dict
+        codec: Codec id. If None, uses default_codec()
+
+    Returns:
+        Codec-prefixed bytes, or a JSON string for codec 0 (legacy)
+    """
+    if codec is None:
+        codec = default_codec()
+
+    if codec == 0:
+        return json.dumps(data)
+    if codec == CODEC_JSON_ZLIB:
+        raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return bytes([CODEC_JSON_ZLIB]) + zlib.compress(raw, 6)
+    if codec == CODEC_MSGPACK_ZSTD:
+        if not HAS_MSGPACK_ZSTD:
+            raise ImportError(
+                "msgpack and zstandard are required for this codec. "
+                "Install with: pip install msgpack zstandard"
+            )
+        return bytes([CODEC_MSGPACK_ZSTD]) + _zstd_compressor.compress(
+            msgpack.packb(data, use_bin_type=True)
+        )
+    raise ValueError(f"Unknown snapshot codec id: {codec}")
+
+
+def decode_payload(value: Union[bytes, str, None]) -> Dict[str, Any]:
+    """Decode a stored snapshot payload of any codec version.
+
+    Args:
+        value: Column value (legacy JSON TEXT or codec-prefixed BLOB)
+
+    Returns:
+        Snapshot data dict
+    """
+    if value is None:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+
+    value = bytes(value)
+    codec, body = value[0], value[1:]
+    if codec == CODEC_JSON_ZLIB:
+        return json.loads(zlib.decompress(body))
+    if codec == CODEC_MSGPACK_ZSTD:
+        if not HAS_MSGPACK_ZSTD:
+            raise ImportError(
+                "msgpack and zstandard are required to read this snapshot. "
+                "Install with: pip install msgpack zstandard"
+            )
+        return msgpack.unpackb(
+            _zstd_decompressor.decompress(body), raw=False, strict_map_key=False
+        )
+    # Pre-codec rows written as BLOB by other tools: treat as UTF-8 JSON
+    return json.loads(value.decode("utf-8"))
+
+
+def payload_codec(value: Union[bytes, str, None]) -> int:
+    """Get the codec id of a stored payload (0 for legacy JSON TEXT)."""
+    if value is None or isinstance(value, str):
+        return 0
+    return bytes(value)[0]
+
+
+def payload_hash(data: Dict[str, Any]) -> str:
+    """Content hash of a payload, independent of codec and key order."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
@@ -27,11 +27,38 @@ class BudgetManager:
     - Max N reach-outs per day (default 5)
     - Quiet hours (default 22:00 - 08:00 BRT)
     - URGENT priority bypasses quiet hours
+    
+    Today's count is kept in memory and written through to the
+    budget_events ledger on every consume, so budget checks don't touch
+    SQLite. Call refresh() once per decision pass to pick up reach-outs
+    recorded by other processes (bot, awareness daemon).
     """
     
     def __init__(self, config: dict, store: InsightsStore):
         self.config = config
         self.store = store
+        self._date: Optional[str] = None  # Day the cached count belongs to
+        self._used = 0
+    
+    @property
+    def max_per_day(self) -> int:
+        return self.config.get("decision", {}).get("max_reach_outs_per_day", 5)
+    
+    def refresh(self) -> int:
+        """Reload today's count from the ledger.
+        
+        Returns:
+            Reach-outs used today
+        """
+        self._date = datetime.now(get_brt()).strftime("%Y-%m-%d")
+        self._used = self.store.get_budget_count(self._date)
+        return self._used
+    
+    def used_today(self) -> int:
+        """Reach-outs used today (cached; reloaded when the day changes)."""
+        if self._date != datetime.now(get_brt()).strftime("%Y-%m-%d"):
+            return self.refresh()
+        return self._used
     
     def can_deliver(self, insight: Insight) -> bool:
         """Check if an insight can be delivered right now.
@@ -97,24 +124,31 @@ class BudgetManager:
     
     def has_budget(self) -> bool:
         """Check if we have remaining reach-out budget for today."""
-        max_per_day = self.config.get("decision", {}).get("max_reach_outs_per_day", 5)
-        budget = self.store.get_today_budget(max_per_day=max_per_day)
-        return budget.can_reach_out()
+        return self.used_today() < self.max_per_day
     
     def consume_budget(self, insight_id: str):
-        """Consume one unit of today's budget."""
-        self.store.increment_budget(insight_id)
-        logger.info(f"Budget consumed for insight {insight_id}")
+        """Consume one unit of today's budget (written through to the ledger).
+        
+        Inside an enclosing db.transaction() the ledger row isn't committed
+        yet and may still be rolled back, so the cached count is dropped
+        instead of bumped; the next check reloads it from the ledger.
+        """
+        self.used_today()  # roll the cached day over if needed
+        used = self.store.increment_budget(insight_id)
+        if self.store.db.in_transaction:
+            self._date = None
+        else:
+            self._used = used
+        logger.info(f"Budget consumed for insight {insight_id} ({used}/{self.max_per_day})")
     
     def get_budget_status(self) -> dict:
         """Get current budget status."""
-        max_per_day = self.config.get("decision", {}).get("max_reach_outs_per_day", 5)
-        budget = self.store.get_today_budget(max_per_day=max_per_day)
+        used = self.refresh()
         return {
-            "date": budget.date,
-            "used": budget.count,
-            "max": budget.max_per_day,
-            "remaining": budget.max_per_day - budget.count,
+            "date": self._date,
+            "used": used,
+            "max": self.max_per_day,
+            "remaining": self.max_per_day - used,
             "is_quiet_hours": self.is_quiet_hours(),
         }
     
@@ -64,6 +64,9 @@ class DecisionEngine:
             DeliveryAction.SKIP: [],
         }
         
+        # One ledger read per pass; budget checks below use the cached count
+        self.budget.refresh()
+        
         for insight in insights:
             action, reason = self._decide(insight)
             results[action].append(insight)
@@ -124,6 +127,7 @@ class DecisionEngine:
         """
         pending = self.store.get_pending_insights()
         ready = []
+        self.budget.refresh()
         
         for insight in pending:
             if insight.is_expired():
@@ -181,11 +185,13 @@ class DecisionEngine:
             insight_id=insight.id,
             channel=channel,
         )
-        self.store.save_delivery(delivery)
-        self.store.mark_delivered(insight.id)
-        
-        # Consume budget for immediate deliveries
-        if channel == DeliveryChannel.TELEGRAM:
-            self.budget.consume_budget(insight.id)
+        # Delivery record, delivered flag and budget share one commit
+        with self.store.db.transaction():
+            self.store.save_delivery(delivery)
+            self.store.mark_delivered(insight.id)
+            
+            # Consume budget for immediate deliveries
+            if channel == DeliveryChannel.TELEGRAM:
+                self.budget.consume_budget(insight.id)
         
         logger.info(f"Recorded delivery: {insight.title} via {channel.value}")
@@ -135,6 +135,24 @@ class AwarenessEngine:
         # Initialize delivery
         self.delivery = DeliveryManager(self.config, self.store)
 
+        # Snapshot rollups run once per hour
+        self._last_rollup_hour: Optional[datetime] = None
+
+        # Database maintenance jobs (cron-based): retention purge and vacuum
+        self._maintenance_iters: Dict[str, croniter] = {}
+        self._maintenance_next_run: Dict[str, datetime] = {}
+
+        maintenance = self.config.get("maintenance", {})
+        if maintenance.get("enabled", True):
+            for job in ("purge", "vacuum"):
+                schedule = maintenance.get(f"{job}_schedule")
+                if not schedule:
+                    continue
+                cron = croniter(schedule, datetime.now(settings.TIMEZONE))
+                self._maintenance_iters[job] = cron
+                self._maintenance_next_run[job] = cron.get_next(datetime)
+                logger.info(f"[AWARENESS] Scheduled maintenance '{job}' with cron: {schedule}")
+
         # Control
         self._running = False
 
@@ -153,9 +171,6 @@ class AwarenessEngine:
         self._running = True
         logger.info("[AWARENESS] Engine started - check interval: %.1fs", check_interval)
 
-        # Initial cleanup
-        self.store.cleanup_old_snapshots(self.config.get("snapshot_retention_days", 90))
-
         while self._running:
             try:
                 cycle_start = time_module.time()
@@ -180,6 +195,12 @@ class AwarenessEngine:
                 # 5. Check scheduled reports
                 await self._check_scheduled_reports(now)
 
+                # 6. Roll up and compact snapshots (hourly)
+                self._run_rollups(now)
+
+                # 7. Database maintenance (retention purge, vacuum)
+                self._run_maintenance(now)
+
                 # Log cycle time if slow
                 cycle_time = time_module.time() - cycle_start
                 if cycle_time > 5.0:
@@ -210,6 +231,7 @@ class AwarenessEngine:
             Combined data from all data sources that ran
         """
         collected_data = {}
+        snapshots: List[Snapshot] = []
 
         for source in self.config.get("data_sources", []):
             if not source.get("enabled", True):
@@ -233,15 +255,14 @@ class AwarenessEngine:
                         if data and not (isinstance(data, dict) and data.get("error")):
                             collected_data[name] = data
                             
-                            # Save snapshot manually (tools called directly don't auto-save)
+                            # Queue snapshot (tools called directly don't auto-save);
+                            # all snapshots of this cycle are written in one transaction
                             tool_name = tool_path.split(".")[-1]  # Extract function name
-                            snapshot = Snapshot(
+                            snapshots.append(Snapshot(
                                 collector=tool_name,
-                                timestamp=datetime.now(),
+                                timestamp=datetime.now(settings.TIMEZONE),
                                 data=data
-                            )
-                            self.store.save_snapshot(snapshot)
-                            logger.debug(f"[AWARENESS] Saved snapshot for {tool_name}")
+                            ))
                             
                             logger.info(f"[AWARENESS] Collected data from: {name}")
                         else:
@@ -258,8 +279,91 @@ class AwarenessEngine:
                 except Exception as e:
                     logger.error(f"[AWARENESS] Data source {name} error: {e}", exc_info=True)
 
+        if snapshots:
+            try:
+                self.store.save_snapshots(snapshots)
+                logger.debug(f"[AWARENESS] Saved {len(snapshots)} snapshots")
+            except Exception as e:
+                logger.error(f"[AWARENESS] Failed to save snapshots: {e}", exc_info=True)
+
         return collected_data
     
+    def _run_rollups(self, now: datetime):
+        """Roll completed hours of snapshots into hourly/daily aggregates.
+
+        Runs at most once per clock hour, then compacts raw snapshots older
+        than snapshot_rollup.raw_retention_days.
+
+        Args:
+            now: Current datetime
+        """
+        rollup_config = self.config.get("snapshot_rollup", {})
+        if not rollup_config.get("enabled", True):
+            return
+
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        if self._last_rollup_hour == hour:
+            return
+        self._last_rollup_hour = hour
+
+        try:
+            start = time_module.time()
+            stats = self.store.rollup_snapshots(now)
+            maintenance = self.config.get("maintenance", {})
+            compacted = self.store.compact_snapshots(
+                rollup_config.get("raw_retention_days", 14),
+                chunk_size=maintenance.get("chunk_size", 500),
+                pause_ms=maintenance.get("chunk_pause_ms", 50),
+            )
+            logger.info(
+                "[AWARENESS] Snapshot rollup: %d hourly / %d daily rows, %d raw compacted (%.1fs)",
+                stats["hourly_rows"], stats["daily_rows"], compacted, time_module.time() - start,
+            )
+        except Exception as e:
+            logger.error(f"[AWARENESS] Snapshot rollup error: {e}", exc_info=True)
+
+    def _run_maintenance(self, now: datetime):
+        """Run database maintenance jobs that are due.
+
+        - purge: deletes expired snapshots, insights and deliveries in
+          bounded chunks (one short transaction each)
+        - vacuum: returns free pages to the filesystem (off-hours)
+
+        Args:
+            now: Current datetime
+        """
+        maintenance = self.config.get("maintenance", {})
+
+        for job, next_run in list(self._maintenance_next_run.items()):
+            if now < next_run:
+                continue
+            self._maintenance_next_run[job] = self._maintenance_iters[job].get_next(datetime)
+
+            try:
+                start = time_module.time()
+                if job == "purge":
+                    stats = self.store.purge_expired(
+                        snapshot_days=self.config.get("snapshot_retention_days", 90),
+                        insight_days=maintenance.get("insight_retention_days", 90),
+                        delivery_days=maintenance.get("delivery_retention_days", 90),
+                        chunk_size=maintenance.get("chunk_size", 500),
+                        pause_ms=maintenance.get("chunk_pause_ms", 50),
+                    )
+                    logger.info(
+                        "[AWARENESS] Retention purge: %d snapshots, %d insights, %d deliveries (%.1fs)",
+                        stats["snapshots"], stats["insights"], stats["deliveries"],
+                        time_module.time() - start,
+                    )
+                else:
+                    stats = self.store.db.incremental_vacuum(maintenance.get("vacuum_max_pages", 0))
+                    logger.info(
+                        "[AWARENESS] Vacuum (%s): %d pages / %.1f MiB reclaimed, %d free pages left (%.0fms)",
+                        stats["mode"], stats["pages_reclaimed"], stats["bytes_reclaimed"] / 1048576,
+                        stats["freelist_remaining"], stats["elapsed_ms"],
+                    )
+            except Exception as e:
+                logger.error(f"[AWARENESS] Maintenance job {job} error: {e}", exc_info=True)
+
     def _import_tool(self, tool_path: str):
         """Import a tool function from a dotted path.
         
@@ -563,6 +667,10 @@ def main():
         logger.error(f"Engine error: {e}", exc_info=True)
         import sys
         sys.exit(1)
+    finally:
+        # Persist any snapshots still waiting in the write-behind queue
+        from src.awareness.snapshot_writer import get_snapshot_writer
+        get_snapshot_writer().close()
 
 
 if __name__ == "__main__":
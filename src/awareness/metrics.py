@@ -0,0 +1,114 @@
+"""
+Friday Insights Engine - Snapshot Metrics
+
+Extraction of declared numeric paths from snapshot payloads into the narrow
+`metrics(collector, metric, entity, ts, value)` table.
+
+Paths are declared per collector in settings.AWARENESS["metrics"]:
+
+    "homelab": {
+        "disk_percent": ["local.disk_percent", "hardware.servers[*].disk_percent"],
+    }
+
+A `[*]` segment iterates a list; the entity of each value is the list
+item's "name" (or its index). Paths without a wildcard use their first
+segment as entity, so the example yields ("disk_percent", "local", 42.0)
+and ("disk_percent", "TrueNAS", 71.5).
+
+Timestamps are stored as integer epoch milliseconds so series load
+straight into NumPy arrays.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from settings import settings
+
+
+@dataclass
+class MetricSeries:
+    """
+    Time series of one metric, possibly across several entities.
+
+    Arrays are aligned and sorted by timestamp:
+    - ts: datetime64[ms] (UTC)
+    - values: float64
+    - entities: object array of entity names
+    """
+    collector: str
+    metric: str
+    ts: np.ndarray
+    values: np.ndarray
+    entities: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def for_entity(self, entity: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (ts, values) for a single entity."""
+        mask = self.entities == entity
+        return self.ts[mask], self.values[mask]
+
+    def by_entity(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Split the series into {entity: (ts, values)}."""
+        return {entity: self.for_entity(entity) for entity in np.unique(self.entities)}
+
+
+@lru_cache(maxsize=256)
+def _compile_path(path: str) -> Tuple[Tuple[str, bool], ...]:
+    """Split "a.b[*].c" into ((a, False), (b, True), (c, False))."""
+    segments = []
+    for part in path.split("."):
+        if part.endswith("[*]"):
+            segments.append((part[:-3], True))
+        else:
+            segments.append((part, False))
+    return tuple(segments)
+
+
+def _walk(value: Any, segments: Tuple[Tuple[str, bool], ...], entity: Optional[str]) -> Iterator[Tuple[str, Any]]:
+    """Yield (entity, leaf value) for a compiled path."""
+    if not segments:
+        yield entity, value
+        return
+
+    (key, wildcard), rest = segments[0], segments[1:]
+    if not isinstance(value, dict) or key not in value:
+        return
+    value = value[key]
+
+    if not wildcard:
+        yield from _walk(value, rest, entity)
+        return
+    if isinstance(value, list):
+        for index, item in enumerate(value):
+            name = item.get("name", index) if isinstance(item, dict) else index
+            yield from _walk(item, rest, str(name))
+
+
+def declared_metrics(collector: str) -> Dict[str, List[str]]:
+    """Get the {metric: [paths]} declared for a collector."""
+    return settings.AWARENESS.get("metrics", {}).get(collector, {})
+
+
+def extract_metrics(collector: str, data: Dict[str, Any]) -> List[Tuple[str, str, float]]:
+    """Extract declared numeric values from a snapshot payload.
+
+    Args:
+        collector: Collector name
+        data: Snapshot payload
+
+    Returns:
+        List of (metric, entity, value); non-numeric and missing values are skipped
+    """
+    values = []
+    for metric, paths in declared_metrics(collector).items():
+        for path in paths:
+            segments = _compile_path(path)
+            for entity, value in _walk(data, segments, segments[0][0]):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values.append((metric, entity, float(value)))
+    return values
@@ -114,6 +114,26 @@ class Snapshot:
         return self.data.get(key, default)
 
 
+@dataclass
+class SnapshotRollup:
+    """
+    Downsampled numeric view of a collector's snapshots for one time bucket.
+    
+    Long-range analyzers read these instead of raw snapshots. Each field
+    (dotted payload path, e.g. "local.disk_percent") maps to its
+    min/max/mean/last/count over the bucket.
+    """
+    collector: str
+    resolution: str  # raw, hourly or daily
+    bucket: datetime  # Bucket start (naive local time)
+    fields: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    
+    def get(self, name: str, stat: str = "mean", default: Any = None) -> Any:
+        """Get one statistic of a field."""
+        values = self.fields.get(name)
+        return values.get(stat, default) if values else default
+
+
 @dataclass
 class Delivery:
     """
@@ -0,0 +1,142 @@
+"""
+Friday Insights Engine - Snapshot Rollups
+
+Helpers for downsampling snapshots into hourly/daily aggregates.
+
+Numeric values are extracted from snapshot payloads as dotted field paths:
+nested dicts join with ".", and list items are keyed by their "name" (or
+index when there is none). For example a homelab snapshot yields
+"local.disk_percent" and "hardware.servers.TrueNAS.disk_percent".
+
+Each (bucket, field) aggregate keeps min, max, mean, last and count, so
+coarser buckets can be built from finer ones without the raw data.
+"""
+
+from datetime import datetime, timedelta
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from settings import settings
+
+RESOLUTIONS = ("raw", "hourly", "daily")
+
+
+def flatten_numeric(data: Any, prefix: str = "") -> Dict[str, float]:
+    """Extract numeric leaves of a payload as {dotted.path: value}.
+
+    Args:
+        data: Snapshot payload (dict/list/scalars)
+        prefix: Path prefix for recursion
+
+    Returns:
+        Dict of field path to float value (bools are skipped)
+    """
+    fields: Dict[str, float] = {}
+
+    if isinstance(data, dict):
+        for key, value in data.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            fields.update(flatten_numeric(value, path))
+    elif isinstance(data, list):
+        for index, item in enumerate(data):
+            key = item.get("name", index) if isinstance(item, dict) else index
+            fields.update(flatten_numeric(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        fields[prefix] = float(data)
+
+    return fields
+
+
+def local_naive(ts: datetime) -> datetime:
+    """Convert a timestamp to naive local time (aware values use settings.TIMEZONE)."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(settings.TIMEZONE).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Truncate a timestamp to the start of its hourly or daily bucket."""
+    ts = local_naive(ts)
+    if resolution == "hourly":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if resolution == "daily":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup resolution: {resolution}")
+
+
+def aggregate(
+    samples: Iterable[Tuple[datetime, Dict[str, float]]],
+    resolution: str,
+) -> Dict[Tuple[datetime, str], Dict[str, float]]:
+    """Aggregate flattened samples into buckets.
+
+    Args:
+        samples: (timestamp, {field: value}) pairs in ascending time order
+        resolution: "hourly" or "daily"
+
+    Returns:
+        {(bucket, field): {"min", "max", "mean", "last", "count"}}
+    """
+    buckets: Dict[Tuple[datetime, str], Dict[str, float]] = {}
+
+    for ts, fields in samples:
+        bucket = bucket_start(ts, resolution)
+        for field, value in fields.items():
+            agg = buckets.get((bucket, field))
+            if agg is None:
+                buckets[(bucket, field)] = {
+                    "min": value, "max": value, "sum": value, "last": value, "count": 1
+                }
+            else:
+                agg["min"] = min(agg["min"], value)
+                agg["max"] = max(agg["max"], value)
+                agg["sum"] += value
+                agg["last"] = value
+                agg["count"] += 1
+
+    for agg in buckets.values():
+        agg["mean"] = agg.pop("sum") / agg["count"]
+    return buckets
+
+
+def merge(rows: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    """Merge finer aggregates (ascending time order) into one coarser aggregate."""
+    merged: Optional[Dict[str, float]] = None
+    for row in rows:
+        if merged is None:
+            merged = {"min": row["min"], "max": row["max"], "sum": row["mean"] * row["count"],
+                      "last": row["last"], "count": row["count"]}
+            continue
+        merged["min"] = min(merged["min"], row["min"])
+        merged["max"] = max(merged["max"], row["max"])
+        merged["sum"] += row["mean"] * row["count"]
+        merged["last"] = row["last"]
+        merged["count"] += row["count"]
+
+    if merged is None:
+        return {}
+    merged["mean"] = merged.pop("sum") / merged["count"]
+    return merged
+
+
+def choose_resolution(since: datetime, until: Optional[datetime] = None) -> str:
+    """Pick the coarsest resolution that still gives a useful series for a window.
+
+    Windows up to AWARENESS["snapshot_rollup"]["raw_window_hours"] read raw
+    snapshots, up to "hourly_window_days" read hourly rollups, anything
+    longer reads daily rollups.
+    """
+    config = settings.AWARENESS.get("snapshot_rollup", {})
+    until = until or datetime.now(settings.TIMEZONE)
+    window = local_naive(until) - local_naive(since)
+
+    if window <= timedelta(hours=config.get("raw_window_hours", 48)):
+        return "raw"
+    if window <= timedelta(days=config.get("hourly_window_days", 31)):
+        return "hourly"
+    return "daily"
+
+
+def field_matches(field: str, pattern: Optional[str]) -> bool:
+    """Check a field path against an optional glob pattern (e.g. "*disk_percent")."""
+    return pattern is None or fnmatchcase(field, pattern)
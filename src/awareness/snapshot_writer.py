@@ -0,0 +1,229 @@
+"""
+Friday Insights Engine - Snapshot Writer
+
+Bounded write-behind queue for snapshots auto-saved by data tools.
+
+Tools enqueue a Snapshot and return immediately; a background thread
+batches queued snapshots into one transaction every `flush_interval_ms`
+or as soon as `batch_size` items are waiting. When the queue is full new
+snapshots are dropped (and counted) instead of blocking the tool call.
+The queue is flushed on shutdown via atexit.
+
+Usage:
+    from src.awareness.snapshot_writer import get_snapshot_writer
+
+    get_snapshot_writer().enqueue(snapshot)
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from settings import settings
+from src.awareness.models import Snapshot
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to wake the flusher thread and make it exit
+_STOP = object()
+
+
+class SnapshotWriter:
+    """
+    Background batching writer for snapshots.
+
+    Counters (see stats()):
+    - enqueued: snapshots accepted into the queue
+    - dropped: snapshots rejected because the queue was full or closed
+    - written: snapshots persisted to the store
+    - failed: snapshots lost to a failed batch insert
+    - flushes: number of batch transactions
+    """
+
+    def __init__(
+        self,
+        store=None,
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        flush_interval_ms: int = 500,
+    ):
+        """Initialize the writer (the flusher thread starts on first enqueue).
+
+        Args:
+            store: InsightsStore to write to. If None, one is created lazily.
+            max_queue: Maximum number of pending snapshots
+            batch_size: Flush as soon as this many snapshots are waiting
+            flush_interval_ms: Maximum time a snapshot waits before being flushed
+        """
+        self._store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue: "queue.Queue[Snapshot]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._counters = {"enqueued": 0, "dropped": 0, "written": 0, "failed": 0, "flushes": 0}
+
+    @property
+    def store(self):
+        """InsightsStore used for writes (created on first use)."""
+        if self._store is None:
+            from src.awareness.store import InsightsStore
+            self._store = InsightsStore()
+        return self._store
+
+    def enqueue(self, snapshot: Snapshot) -> bool:
+        """Queue a snapshot for writing without blocking.
+
+        Returns:
+            True if queued, False if dropped
+        """
+        if self._closed:
+            self._count("dropped")
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"[SNAPSHOT] Queue full, dropped snapshot for {snapshot.collector}")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    def flush(self) -> int:
+        """Write every queued snapshot now, on the calling thread.
+
+        Returns:
+            Number of snapshots written
+        """
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def close(self, timeout: float = 5.0):
+        """Stop the flusher thread and flush what is left in the queue."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("[SNAPSHOT] Queue still full at close, not waiting for the flusher")
+            else:
+                self._thread.join(timeout)
+        self.flush()
+        logger.info(f"[SNAPSHOT] Writer closed: {self.stats()}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get writer counters plus the current queue depth."""
+        with self._lock:
+            counters = dict(self._counters)
+        counters["queue_depth"] = self._queue.qsize()
+        return counters
+
+    # =========================================================================
+    # Internals
+    # =========================================================================
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="snapshot-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        """Flusher loop: block on the queue until a batch is full or its first snapshot is due.
+
+        The thread sleeps in queue.get() while nothing is queued and exits on _STOP.
+        """
+        batch: List[Snapshot] = []
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if batch:
+                    self._write(batch)
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _drain(self, limit: int) -> List[Snapshot]:
+        batch: List[Snapshot] = []
+        while len(batch) < limit:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        return batch
+
+    def _write(self, batch: List[Snapshot]) -> int:
+        with self._flush_lock:
+            try:
+                self.store.save_snapshots(batch)
+            except Exception as e:
+                self._count("failed", len(batch))
+                logger.warning(f"[SNAPSHOT] Failed to write batch of {len(batch)} snapshots: {e}")
+                return 0
+
+        self._count("written", len(batch))
+        self._count("flushes")
+        logger.debug(f"[SNAPSHOT] Flushed {len(batch)} snapshots")
+        return len(batch)
+
+
+# Global instance
+_snapshot_writer: Optional[SnapshotWriter] = None
+_snapshot_writer_lock = threading.Lock()
+
+
+def get_snapshot_writer() -> SnapshotWriter:
+    """Get or create the global snapshot writer (flushed at interpreter exit)."""
+    global _snapshot_writer
+
+    if _snapshot_writer is None:
+        with _snapshot_writer_lock:
+            if _snapshot_writer is None:
+                config = settings.AWARENESS.get("snapshot_writer", {})
+                _snapshot_writer = SnapshotWriter(
+                    max_queue=config.get("max_queue", 1000),
+                    batch_size=config.get("batch_size", 50),
+                    flush_interval_ms=config.get("flush_interval_ms", 500),
+                )
+                atexit.register(_snapshot_writer.close)
+
+    return _snapshot_writer
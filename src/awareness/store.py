@@ -7,14 +7,21 @@ Provides historical data for correlation analysis.
 
 import json
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
+import numpy as np
+
 from src.awareness.models import (
-    Insight, Snapshot, Delivery, ReachOutBudget,
+    Insight, Snapshot, SnapshotRollup, Delivery, ReachOutBudget,
     InsightType, Priority, Category, DeliveryChannel)
+from src.awareness import metrics, rollups
+from src.awareness.codec import (
+    decode_payload, default_codec, encode_payload, payload_codec, payload_hash)
 from src.core.database import get_db, Database
+from src.core.utils import to_epoch_ms
 
 from settings import settings
 def get_brt():
@@ -53,12 +60,101 @@ class InsightsStore:
     
     def save_snapshot(self, snapshot: Snapshot):
         """Save a snapshot to the database."""
-        self.db.insert('snapshots', {
+        self.save_snapshots([snapshot])
+    
+    def save_snapshots(self, snapshots: List[Snapshot]) -> int:
+        """Save several snapshots in a single transaction.
+        
+        With change-only storage enabled (AWARENESS["snapshot_dedupe"]), a
+        snapshot whose content hash equals the collector's latest stored
+        payload is not stored again: a "still valid at T" row is added to
+        snapshot_repeats and the payload row's valid_until is extended.
+        
+        Declared numeric paths (AWARENESS["metrics"]) of every snapshot,
+        repeats included, are extracted into the metrics table.
+        
+        Returns:
+            Number of snapshots recorded
+        """
+        if not snapshots:
+            return 0
+        
+        dedupe = settings.AWARENESS.get("snapshot_dedupe", True)
+        rows: List[Dict[str, Any]] = []
+        repeats: List[Dict[str, Any]] = []
+        valid_until: Dict[str, tuple] = {}  # snapshot_id -> (iso, epoch ms)
+        metric_rows: List[Dict[str, Any]] = []
+        latest: Dict[str, Optional[tuple]] = {}  # collector -> (snapshot_id, content_hash)
+        
+        with self.db.transaction():
+            for snapshot in snapshots:
+                content_hash = payload_hash(snapshot.data)
+                timestamp = snapshot.timestamp.isoformat()
+                ts_ms = to_epoch_ms(snapshot.timestamp)
+                metric_rows.extend(self._metric_rows(snapshot))
+                
+                if dedupe:
+                    if snapshot.collector not in latest:
+                        latest[snapshot.collector] = self._latest_payload(snapshot.collector)
+                    previous = latest[snapshot.collector]
+                    if previous and previous[1] == content_hash:
+                        repeats.append({
+                            'id': snapshot.id,
+                            'snapshot_id': previous[0],
+                            'collector': snapshot.collector,
+                            'timestamp': timestamp,
+                            'ts_ms': ts_ms
+                        })
+                        valid_until[previous[0]] = (timestamp, ts_ms)
+                        continue
+                
+                rows.append(self._snapshot_to_row(snapshot, content_hash))
+                latest[snapshot.collector] = (snapshot.id, content_hash)
+            
+            self.db.insert_many('snapshots', rows)
+            self.db.insert_many('snapshot_repeats', repeats)
+            self.db.execute_many(
+                """UPDATE snapshots SET valid_until = :valid_until, valid_until_ms = :valid_until_ms
+                   WHERE id = :id""",
+                [
+                    {'id': snapshot_id, 'valid_until': iso, 'valid_until_ms': ms}
+                    for snapshot_id, (iso, ms) in valid_until.items()
+                ]
+            )
+            self.db.insert_many('metrics', metric_rows)
+        
+        if repeats:
+            logger.debug(f"[STORE] {len(repeats)}/{len(snapshots)} snapshots unchanged, stored as repeats")
+        return len(snapshots)
+    
+    def _latest_payload(self, collector: str) -> Optional[tuple]:
+        """Get (id, content_hash) of the newest stored payload for a collector."""
+        row = self.db.fetchone(
+            """SELECT id, content_hash FROM snapshots
+               WHERE collector = :collector
+               ORDER BY ts_ms DESC LIMIT 1""",
+            {'collector': collector}
+        )
+        return (row[0], row[1]) if row else None
+    
+    def _metric_rows(self, snapshot: Snapshot) -> List[Dict[str, Any]]:
+        """Extract declared numeric paths of a snapshot as metrics table rows."""
+        ts = to_epoch_ms(snapshot.timestamp)
+        return [
+            {'collector': snapshot.collector, 'metric': metric, 'entity': entity, 'ts': ts, 'value': value}
+            for metric, entity, value in metrics.extract_metrics(snapshot.collector, snapshot.data)
+        ]
+    
+    def _snapshot_to_row(self, snapshot: Snapshot, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Convert a Snapshot to a snapshots table row."""
+        return {
             'id': snapshot.id,
             'collector': snapshot.collector,
             'timestamp': snapshot.timestamp.isoformat(),
-            'data': json.dumps(snapshot.data)
-        })
+            'ts_ms': to_epoch_ms(snapshot.timestamp),
+            'data': encode_payload(snapshot.data),
+            'content_hash': content_hash or payload_hash(snapshot.data)
+        }
     
     def get_snapshots(
         self, 
@@ -70,12 +166,15 @@ class InsightsStore:
     ) -> List[Snapshot]:
         """Get snapshots for a collector within a time range.
         
+        Repeat markers from change-only storage are expanded, so the series
+        has one Snapshot per collection cycle as if every payload was stored.
+        
         Args:
             collector: Collector name to filter by
             since: Start time (inclusive)
             until: End time (inclusive)
             hours: Alternative to 'since' - get snapshots from last N hours
-            limit: Maximum number of snapshots to return
+            limit: Maximum number of snapshots to return (-1 for no limit)
             
         Returns:
             List of Snapshot objects, newest first
@@ -84,48 +183,518 @@ class InsightsStore:
         if hours is not None and since is None:
             since = datetime.now(get_brt()) - timedelta(hours=hours)
         
-        query = "SELECT * FROM snapshots WHERE collector = :collector"
+        conditions = ""
         params: Dict[str, Any] = {'collector': collector}
         
         if since:
-            query += " AND timestamp >= :since"
-            params['since'] = since.isoformat()
+            conditions += " AND {t}.ts_ms >= :since"
+            params['since'] = to_epoch_ms(since)
         if until:
-            query += " AND timestamp <= :until"
-            params['until'] = until.isoformat()
+            conditions += " AND {t}.ts_ms <= :until"
+            params['until'] = to_epoch_ms(until)
         
-        query += " ORDER BY timestamp DESC LIMIT :limit"
+        query = f"""
+            SELECT s.id, s.collector, s.timestamp, s.id AS payload_id, s.data, s.ts_ms AS ts_ms
+            FROM snapshots s
+            WHERE s.collector = :collector{conditions.format(t='s')}
+            UNION ALL
+            SELECT r.id, r.collector, r.timestamp, r.snapshot_id, s.data, r.ts_ms
+            FROM snapshot_repeats r JOIN snapshots s ON s.id = r.snapshot_id
+            WHERE r.collector = :collector{conditions.format(t='r')}
+            ORDER BY ts_ms DESC LIMIT :limit
+        """
         params['limit'] = limit
         
         rows = self.db.fetchall(query, params)
-        return [
-            Snapshot(
-                id=row[0],  # id
-                collector=row[1],  # collector
-                timestamp=datetime.fromisoformat(row[2]),  # timestamp
-                data=json.loads(row[3])  # data
-            )
-            for row in rows
-        ]
+        
+        # Decode each distinct payload once, even if it backs many repeats
+        payloads: Dict[str, Dict[str, Any]] = {}
+        snapshots = []
+        for row in rows:
+            if row[3] not in payloads:
+                payloads[row[3]] = decode_payload(row[4])  # any codec version
+            snapshots.append(Snapshot(
+                id=row[0],
+                collector=row[1],
+                timestamp=datetime.fromisoformat(row[2]),
+                data=payloads[row[3]]
+            ))
+        return snapshots
     
     def get_latest_snapshot(self, collector: str) -> Optional[Snapshot]:
         """Get the most recent snapshot for a collector."""
         snapshots = self.get_snapshots(collector, limit=1)
         return snapshots[0] if snapshots else None
     
-    def cleanup_old_snapshots(self, retention_days: int = 90):
-        """Delete snapshots older than retention period."""
-        cutoff = datetime.now(get_brt()) - timedelta(days=retention_days)
+    # =========================================================================
+    # Metric Operations
+    # =========================================================================
+    
+    def get_series(
+        self,
+        collector: str,
+        metric: str,
+        since: datetime,
+        until: Optional[datetime] = None,
+        entity: Optional[str] = None
+    ) -> metrics.MetricSeries:
+        """Get a numeric metric series as NumPy arrays.
+        
+        Reads only the covering index of the metrics table, so no snapshot
+        payload is decoded.
+        
+        Args:
+            collector: Collector name
+            metric: Metric name declared in AWARENESS["metrics"]
+            since: Start time (inclusive)
+            until: End time (inclusive). Defaults to no upper bound
+            entity: Only return this entity (e.g. a server name)
+            
+        Returns:
+            MetricSeries with ts (datetime64[ms]), values and entities, oldest first
+        """
+        query = """SELECT ts, value, entity FROM metrics
+                   WHERE collector = :collector AND metric = :metric AND ts >= :since"""
+        params: Dict[str, Any] = {
+            'collector': collector,
+            'metric': metric,
+            'since': to_epoch_ms(since)
+        }
+        if until:
+            query += " AND ts <= :until"
+            params['until'] = to_epoch_ms(until)
+        if entity is not None:
+            query += " AND entity = :entity"
+            params['entity'] = entity
+        query += " ORDER BY ts ASC"
+        
+        rows = self.db.fetchall(query, params)
+        return metrics.MetricSeries(
+            collector=collector,
+            metric=metric,
+            ts=np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)).astype("datetime64[ms]"),
+            values=np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows)),
+            entities=np.array([r[2] for r in rows], dtype=object),
+        )
+    
+    def backfill_metrics(self, batch_size: int = 500) -> Dict[str, Any]:
+        """Rebuild the metrics table from stored snapshots and repeat markers.
+        
+        Each collector with declared metrics is walked in ts_ms order, one
+        transaction per batch of raw rows, so the daemons can keep writing.
+        The metrics of each batch's time range are replaced by values
+        re-extracted from the payloads, which makes the backfill safe to
+        re-run and repairs rows stamped with a wrong offset. Metrics older
+        than a collector's oldest raw snapshot (already compacted) are kept.
+        
+        Args:
+            batch_size: Raw rows (payloads plus repeats) per transaction
+            
+        Returns:
+            Stats: {"collectors": N, "rows_scanned": N, "metrics_deleted": N, "metrics_written": N}
+        """
+        stats = {"collectors": 0, "rows_scanned": 0, "metrics_deleted": 0, "metrics_written": 0}
+        until_ms = to_epoch_ms(datetime.now(timezone.utc))
+        raw = """
+            SELECT s.ts_ms AS ts_ms, s.id AS payload_id, s.data AS data FROM snapshots s
+            WHERE s.collector = :collector AND s.ts_ms > :after AND s.ts_ms <= :upto
+            UNION ALL
+            SELECT r.ts_ms, r.snapshot_id, s.data
+            FROM snapshot_repeats r JOIN snapshots s ON s.id = r.snapshot_id
+            WHERE r.collector = :collector AND r.ts_ms > :after AND r.ts_ms <= :upto
+        """
+        
+        collectors = [row[0] for row in self.db.fetchall("SELECT DISTINCT collector FROM snapshots")]
+        for collector in collectors:
+            if not metrics.declared_metrics(collector):
+                continue
+            stats["collectors"] += 1
+            after: Optional[int] = None
+            
+            while True:
+                params = {'collector': collector, 'after': -1 if after is None else after, 'upto': until_ms}
+                # Upper ts of this batch: the batch_size-th raw row, or the end of the run
+                row = self.db.fetchone(
+                    f"SELECT ts_ms FROM ({raw}) ORDER BY ts_ms LIMIT 1 OFFSET :offset",
+                    {**params, 'offset': batch_size - 1}
+                )
+                last = row is None
+                upto = until_ms if last else row[0]
+                
+                with self.db.transaction():
+                    rows = self.db.fetchall(f"{raw} ORDER BY ts_ms", {**params, 'upto': upto})
+                    if not rows:
+                        break
+                    lower = rows[0][0] if after is None else after + 1
+                    stats["metrics_deleted"] += self.db.delete(
+                        'metrics',
+                        'collector = :collector AND ts >= :lower AND ts <= :upto',
+                        {'collector': collector, 'lower': lower, 'upto': upto}
+                    )
+                    
+                    # Decode each distinct payload once, even if it backs many repeats
+                    payloads: Dict[str, List[tuple]] = {}
+                    metric_rows = []
+                    for ts_ms, payload_id, data in rows:
+                        if payload_id not in payloads:
+                            payloads[payload_id] = metrics.extract_metrics(collector, decode_payload(data))
+                        metric_rows.extend(
+                            {'collector': collector, 'metric': metric, 'entity': entity, 'ts': ts_ms, 'value': value}
+                            for metric, entity, value in payloads[payload_id]
+                        )
+                    stats["metrics_written"] += self.db.insert_many('metrics', metric_rows)
+                stats["rows_scanned"] += len(rows)
+                
+                if last:
+                    break
+                after = upto
+        
+        logger.info(f"[STORE] Backfilled metrics: {stats}")
+        return stats
+    
+    # =========================================================================
+    # Rollup Operations
+    # =========================================================================
+    
+    def rollup_snapshots(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Aggregate completed hours of raw snapshots into hourly/daily rollups.
+        
+        Incremental: each collector resumes after its newest hourly bucket.
+        Daily rollups are rebuilt from the hourly rows of every day touched,
+        so they keep working after raw snapshots have been compacted.
+        
+        Args:
+            now: Reference time (defaults to now); only hours before it are rolled up
+            
+        Returns:
+            Stats: {"collectors": N, "hourly_rows": N, "daily_rows": N}
+        """
+        current_hour = rollups.bucket_start(now or datetime.now(get_brt()), "hourly")
+        stats = {"collectors": 0, "hourly_rows": 0, "daily_rows": 0}
+        
+        collectors = [row[0] for row in self.db.fetchall("SELECT DISTINCT collector FROM snapshots")]
+        for collector in collectors:
+            watermark = self._rollup_watermark(collector)
+            since = watermark + timedelta(hours=1) if watermark else None
+            if since and since >= current_hour:
+                continue
+            
+            snapshots = self.get_snapshots(
+                collector,
+                since=since,
+                until=current_hour - timedelta(microseconds=1),
+                limit=-1  # no limit
+            )
+            samples = [
+                (s.timestamp, rollups.flatten_numeric(s.data)) for s in reversed(snapshots)
+            ]
+            hourly = rollups.aggregate(samples, "hourly")
+            if not hourly:
+                continue
+            
+            days = sorted({bucket.replace(hour=0) for bucket, _ in hourly})
+            with self.db.transaction():
+                stats["hourly_rows"] += self._upsert_rollups(collector, "hourly", hourly)
+                stats["daily_rows"] += self._rebuild_daily_rollups(collector, days)
+            stats["collectors"] += 1
+        
+        if stats["collectors"]:
+            logger.info(f"[STORE] Rolled up snapshots: {stats}")
+        return stats
+    
+    def compact_snapshots(self, raw_retention_days: int, chunk_size: int = 500, pause_ms: int = 0) -> int:
+        """Delete raw snapshots older than N days that are covered by rollups.
+        
+        Rows are deleted in bounded chunks (one commit each), so a first run
+        over months of raw history doesn't hold the write lock throughout.
+        
+        Args:
+            raw_retention_days: Days of raw snapshots to keep
+            chunk_size: Maximum rows deleted per commit
+            pause_ms: Sleep between chunks
+            
+        Returns:
+            Number of payload rows deleted
+        """
+        cutoff = rollups.local_naive(datetime.now(get_brt()) - timedelta(days=raw_retention_days))
+        deleted = 0
+        
+        for collector in [row[0] for row in self.db.fetchall("SELECT DISTINCT collector FROM snapshots")]:
+            watermark = self._rollup_watermark(collector)
+            if watermark is None:
+                continue
+            # Never drop raw data that hasn't been rolled up yet
+            limit = to_epoch_ms(min(cutoff, watermark + timedelta(hours=1)))
+            params = {'collector': collector, 'limit': limit}
+            # Repeats go first; payload rows stay while a repeat still points at them (valid_until)
+            self.db.delete_chunked(
+                'snapshot_repeats',
+                'collector = :collector AND ts_ms < :limit',
+                params, chunk_size, pause_ms
+            )
+            deleted += self.db.delete_chunked(
+                'snapshots',
+                'collector = :collector AND COALESCE(valid_until_ms, ts_ms) < :limit',
+                params, chunk_size, pause_ms
+            )
+        
+        if deleted:
+            logger.info(f"[STORE] Compacted {deleted} raw snapshots older than {raw_retention_days} days")
+        return deleted
+    
+    def get_rollups(
+        self,
+        collector: str,
+        since: datetime,
+        until: Optional[datetime] = None,
+        resolution: str = "auto",
+        field_pattern: Optional[str] = None,
+        include_unrolled: bool = True
+    ) -> List[SnapshotRollup]:
+        """Get a downsampled numeric series for a collector.
+        
+        Rollup tables only cover completed hours up to the last
+        rollup_snapshots() run; with include_unrolled the raw snapshots
+        after that watermark are aggregated on the fly and merged in, so the
+        series reaches the newest snapshot (the last bucket may be partial).
+        
+        Args:
+            collector: Collector name
+            since: Start time (inclusive)
+            until: End time (inclusive). Defaults to now
+            resolution: "raw", "hourly", "daily" or "auto" (picked from the window length)
+            field_pattern: Optional glob on field paths (e.g. "*disk_percent")
+            include_unrolled: Merge raw snapshots newer than the rollup watermark
+            
+        Returns:
+            List of SnapshotRollup objects, oldest first
+        """
+        if resolution == "auto":
+            resolution = rollups.choose_resolution(since, until)
+        if resolution not in rollups.RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        
+        if resolution == "raw":
+            series = []
+            for snapshot in reversed(self.get_snapshots(collector, since=since, until=until, limit=-1)):
+                fields = {
+                    name: {"min": v, "max": v, "mean": v, "last": v, "count": 1}
+                    for name, v in rollups.flatten_numeric(snapshot.data).items()
+                    if rollups.field_matches(name, field_pattern)
+                }
+                series.append(SnapshotRollup(collector, "raw", rollups.local_naive(snapshot.timestamp), fields))
+            return series
+        
+        query = f"""SELECT bucket, field, min, max, mean, last, count
+                    FROM snapshot_rollups_{resolution}
+                    WHERE collector = :collector AND bucket >= :since"""
+        params: Dict[str, Any] = {
+            'collector': collector,
+            'since': rollups.bucket_start(since, resolution).isoformat()
+        }
+        if until:
+            query += " AND bucket <= :until"
+            params['until'] = rollups.local_naive(until).isoformat()
+        if field_pattern:
+            query += " AND field GLOB :pattern"
+            params['pattern'] = field_pattern
+        query += " ORDER BY bucket ASC"
         
-        # Use the delete method from database
-        deleted = self.db.delete(
-            'snapshots',
-            'timestamp < :cutoff',
-            {'cutoff': cutoff.isoformat()}
+        series: Dict[str, SnapshotRollup] = {}
+        for bucket, field_name, min_v, max_v, mean_v, last_v, count in self.db.fetchall(query, params):
+            if bucket not in series:
+                series[bucket] = SnapshotRollup(collector, resolution, datetime.fromisoformat(bucket))
+            series[bucket].fields[field_name] = {
+                "min": min_v, "max": max_v, "mean": mean_v, "last": last_v, "count": count
+            }
+        
+        if include_unrolled:
+            watermark = self._rollup_watermark(collector)
+            tail_since = rollups.local_naive(since)
+            if watermark is not None:
+                tail_since = max(tail_since, watermark + timedelta(hours=1))
+            snapshots = self.get_snapshots(collector, since=tail_since, until=until, limit=-1)
+            samples = [
+                (snapshot.timestamp, {
+                    name: value for name, value in rollups.flatten_numeric(snapshot.data).items()
+                    if rollups.field_matches(name, field_pattern)
+                })
+                for snapshot in reversed(snapshots)
+            ]
+            for (bucket, field_name), agg in rollups.aggregate(samples, resolution).items():
+                key = bucket.isoformat()
+                if key not in series:
+                    series[key] = SnapshotRollup(collector, resolution, bucket)
+                rolled = series[key].fields.get(field_name)
+                series[key].fields[field_name] = rollups.merge([rolled, agg]) if rolled else agg
+        
+        return sorted(series.values(), key=lambda rollup: rollup.bucket)
+    
+    def _rollup_watermark(self, collector: str) -> Optional[datetime]:
+        """Get the newest hourly bucket rolled up for a collector."""
+        row = self.db.fetchone(
+            "SELECT MAX(bucket) FROM snapshot_rollups_hourly WHERE collector = :collector",
+            {'collector': collector}
         )
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+    
+    def _upsert_rollups(
+        self,
+        collector: str,
+        resolution: str,
+        buckets: Dict[tuple, Dict[str, float]]
+    ) -> int:
+        """Insert or replace aggregates in a rollup table."""
+        return self.db.execute_many(
+            f"""INSERT OR REPLACE INTO snapshot_rollups_{resolution}
+                (collector, bucket, field, min, max, mean, last, count)
+                VALUES (:collector, :bucket, :field, :min, :max, :mean, :last, :count)""",
+            [
+                {'collector': collector, 'bucket': bucket.isoformat(), 'field': field_name, **agg}
+                for (bucket, field_name), agg in buckets.items()
+            ]
+        )
+    
+    def _rebuild_daily_rollups(self, collector: str, days: List[datetime]) -> int:
+        """Recompute daily rollups for the given days from hourly rows."""
+        written = 0
+        for day in days:
+            rows = self.db.fetchall(
+                """SELECT field, min, max, mean, last, count FROM snapshot_rollups_hourly
+                   WHERE collector = :collector AND bucket >= :start AND bucket < :end
+                   ORDER BY bucket ASC""",
+                {
+                    'collector': collector,
+                    'start': day.isoformat(),
+                    'end': (day + timedelta(days=1)).isoformat()
+                }
+            )
+            by_field: Dict[str, List[Dict[str, float]]] = {}
+            for field_name, min_v, max_v, mean_v, last_v, count in rows:
+                by_field.setdefault(field_name, []).append(
+                    {"min": min_v, "max": max_v, "mean": mean_v, "last": last_v, "count": count}
+                )
+            written += self._upsert_rollups(collector, "daily", {
+                (day, field_name): rollups.merge(aggs) for field_name, aggs in by_field.items()
+            })
+        return written
+    
+    def recompress_snapshots(self, batch_size: int = 500, codec: Optional[int] = None) -> Dict[str, Any]:
+        """Rewrite stored snapshot payloads with the current codec.
+        
+        Walks the table in rowid order, one transaction per batch, so the
+        daemons can keep writing while the migration runs.
+        
+        Args:
+            batch_size: Rows per transaction
+            codec: Target codec id. If None, uses the configured default
+            
+        Returns:
+            Stats: rows scanned/rewritten, bytes and total decode time before and after
+        """
+        codec = default_codec() if codec is None else codec
+        stats = {
+            "codec": codec,
+            "rows_scanned": 0,
+            "rows_rewritten": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "decode_ms_before": 0.0,
+            "decode_ms_after": 0.0,
+        }
+        last_rowid = 0
+        
+        while True:
+            rows = self.db.fetchall(
+                """SELECT rowid, data FROM snapshots
+                   WHERE rowid > :last ORDER BY rowid LIMIT :limit""",
+                {'last': last_rowid, 'limit': batch_size}
+            )
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            
+            updates = []
+            for rowid, value in rows:
+                stats["rows_scanned"] += 1
+                if payload_codec(value) == codec:
+                    continue
+                
+                start = time.perf_counter()
+                data = decode_payload(value)
+                stats["decode_ms_before"] += (time.perf_counter() - start) * 1000
+                
+                encoded = encode_payload(data, codec)
+                start = time.perf_counter()
+                decode_payload(encoded)
+                stats["decode_ms_after"] += (time.perf_counter() - start) * 1000
+                
+                stats["bytes_before"] += len(value.encode("utf-8") if isinstance(value, str) else value)
+                stats["bytes_after"] += len(encoded.encode("utf-8") if isinstance(encoded, str) else encoded)
+                updates.append({'rowid': rowid, 'data': encoded})
+            
+            stats["rows_rewritten"] += self.db.execute_many(
+                "UPDATE snapshots SET data = :data WHERE rowid = :rowid", updates
+            )
+        
+        logger.info(f"[STORE] Recompressed snapshots: {stats}")
+        return stats
+    
+    def cleanup_old_snapshots(
+        self,
+        retention_days: int = 90,
+        chunk_size: int = 500,
+        pause_ms: int = 0
+    ) -> int:
+        """Delete snapshots older than retention period, in bounded chunks.
+        
+        Returns:
+            Number of payload rows deleted
+        """
+        cutoff = {'cutoff': to_epoch_ms(datetime.now(get_brt()) - timedelta(days=retention_days))}
+        
+        # Repeats go first; payload rows stay while a repeat still points at them (valid_until)
+        self.db.delete_chunked('snapshot_repeats', 'ts_ms < :cutoff', cutoff, chunk_size, pause_ms)
+        deleted = self.db.delete_chunked(
+            'snapshots', 'COALESCE(valid_until_ms, ts_ms) < :cutoff', cutoff, chunk_size, pause_ms
+        )
+        self.db.delete_chunked('metrics', 'ts < :cutoff', cutoff, chunk_size, pause_ms)
         
         if deleted > 0:
             logger.info(f"[STORE] Cleaned up {deleted} old snapshots (retention={retention_days} days)")
+        return deleted
+    
+    def purge_expired(
+        self,
+        snapshot_days: int = 90,
+        insight_days: int = 90,
+        delivery_days: int = 90,
+        chunk_size: int = 500,
+        pause_ms: int = 0
+    ) -> Dict[str, int]:
+        """Delete expired snapshots, insights and deliveries in bounded chunks.
+        
+        Each chunk is its own short transaction, so the bot and CLI can
+        write between chunks of a large purge.
+        
+        Returns:
+            Rows deleted per table: {"snapshots", "insights", "deliveries"}
+        """
+        now = datetime.now(get_brt())
+        stats = {'snapshots': self.cleanup_old_snapshots(snapshot_days, chunk_size, pause_ms)}
+        stats['deliveries'] = self.db.delete_chunked(
+            'deliveries', 'delivered_at_ms < :cutoff',
+            {'cutoff': to_epoch_ms(now - timedelta(days=delivery_days))}, chunk_size, pause_ms
+        )
+        self.db.delete_chunked(
+            'budget_events', 'created_at_ms < :cutoff',
+            {'cutoff': to_epoch_ms(now - timedelta(days=delivery_days))}, chunk_size, pause_ms
+        )
+        stats['insights'] = self.db.delete_chunked(
+            'insights', 'created_at_ms < :cutoff',
+            {'cutoff': to_epoch_ms(now - timedelta(days=insight_days))}, chunk_size, pause_ms
+        )
+        return stats
     
     # =========================================================================
     # Insight Operations
@@ -145,6 +714,7 @@ class InsightsStore:
             'source_analyzer': insight.source_analyzer,
             'dedupe_key': insight.dedupe_key,
             'created_at': insight.created_at.isoformat(),
+            'created_at_ms': to_epoch_ms(insight.created_at),
             'expires_at': insight.expires_at.isoformat() if insight.expires_at else None
         })
     
@@ -157,7 +727,7 @@ class InsightsStore:
             query += " AND priority = :priority"
             params['priority'] = priority.value
         
-        query += " ORDER BY created_at DESC"
+        query += " ORDER BY created_at_ms DESC"
         
         rows = self.db.fetchall(query, params)
         return [self._row_to_insight(row) for row in rows]
@@ -169,14 +739,14 @@ class InsightsStore:
     ) -> List[Insight]:
         """Get insights from the last N hours."""
         since = datetime.now(get_brt()) - timedelta(hours=hours)
-        query = "SELECT * FROM insights WHERE created_at >= :since"
-        params: Dict[str, Any] = {'since': since.isoformat()}
+        query = "SELECT * FROM insights WHERE created_at_ms >= :since"
+        params: Dict[str, Any] = {'since': to_epoch_ms(since)}
         
         if category:
             query += " AND category = :category"
             params['category'] = category.value
         
-        query += " ORDER BY created_at DESC"
+        query += " ORDER BY created_at_ms DESC"
         
         rows = self.db.fetchall(query, params)
         return [self._row_to_insight(row) for row in rows]
@@ -186,8 +756,8 @@ class InsightsStore:
         since = datetime.now(get_brt()) - timedelta(hours=hours)
         row = self.db.fetchone(
             """SELECT COUNT(*) as cnt FROM insights 
-               WHERE dedupe_key = :dedupe_key AND created_at >= :since""",
-            {'dedupe_key': dedupe_key, 'since': since.isoformat()}
+               WHERE dedupe_key = :dedupe_key AND created_at_ms >= :since""",
+            {'dedupe_key': dedupe_key, 'since': to_epoch_ms(since)}
         )
         return row[0] > 0 if row else False
     
@@ -232,18 +802,19 @@ class InsightsStore:
             'insight_id': delivery.insight_id,
             'channel': delivery.channel.value,
             'delivered_at': delivery.delivered_at.isoformat(),
+            'delivered_at_ms': to_epoch_ms(delivery.delivered_at),
             'success': int(delivery.success),
             'error': delivery.error
         })
     
     def get_deliveries_today(self) -> List[Delivery]:
         """Get all deliveries from today."""
-        today = datetime.now(get_brt()).strftime("%Y-%m-%d")
+        start = datetime.combine(datetime.now(get_brt()).date(), datetime.min.time())  # local midnight
         rows = self.db.fetchall(
             """SELECT * FROM deliveries 
-               WHERE delivered_at LIKE :today || '%'
-               ORDER BY delivered_at DESC""",
-            {'today': today}
+               WHERE delivered_at_ms >= :start AND delivered_at_ms < :end
+               ORDER BY delivered_at_ms DESC""",
+            {'start': to_epoch_ms(start), 'end': to_epoch_ms(start + timedelta(days=1))}
         )
         return [
             Delivery(
@@ -262,49 +833,46 @@ class InsightsStore:
     # =========================================================================
     
     def get_today_budget(self, max_per_day: int = 5) -> ReachOutBudget:
-        """Get or create today's reach-out budget."""
+        """Get today's reach-out budget from the budget_events ledger."""
         today = datetime.now(get_brt()).strftime("%Y-%m-%d")
-        row = self.db.fetchone(
-            "SELECT * FROM reach_out_budget WHERE date = :date",
+        rows = self.db.fetchall(
+            "SELECT insight_id FROM budget_events WHERE date = :date ORDER BY id",
             {'date': today}
         )
-        
-        if row:
-            return ReachOutBudget(
-                date=row[0],
-                count=int(row[1]),
-                max_per_day=int(row[2]),
-                deliveries=json.loads(row[3])
-            )
-        else:
-            # Create new budget for today
-            budget = ReachOutBudget(date=today, max_per_day=max_per_day)
-            self.db.insert('reach_out_budget', {
-                'date': budget.date,
-                'count': budget.count,
-                'max_per_day': budget.max_per_day,
-                'deliveries': json.dumps(budget.deliveries)
-            })
-            return budget
+        return ReachOutBudget(
+            date=today,
+            count=len(rows),
+            max_per_day=max_per_day,
+            deliveries=[row[0] for row in rows if row[0]]
+        )
     
-    def increment_budget(self, insight_id: str):
-        """Increment today's reach-out count."""
-        today = datetime.now(get_brt()).strftime("%Y-%m-%d")
-        
-        # Get current deliveries
+    def get_budget_count(self, date: Optional[str] = None) -> int:
+        """Get the number of reach-outs recorded for a day (default today)."""
+        date = date or datetime.now(get_brt()).strftime("%Y-%m-%d")
         row = self.db.fetchone(
-            "SELECT deliveries FROM reach_out_budget WHERE date = :date",
-            {'date': today}
+            "SELECT COUNT(*) FROM budget_events WHERE date = :date",
+            {'date': date}
         )
+        return row[0] if row else 0
+    
+    def increment_budget(self, insight_id: str) -> int:
+        """Record one reach-out against today's budget.
         
-        deliveries = json.loads(row[0]) if row else []
-        deliveries.append(insight_id)
+        The increment is a single INSERT, so concurrent processes never
+        lose an update the way a read-modify-write of a counter row would.
         
-        # Use raw SQL for increment since we need SQL expression, not literal value
-        self.db.execute(
-            "UPDATE reach_out_budget SET count = count + 1, deliveries = :deliveries WHERE date = :date",
-            {'deliveries': json.dumps(deliveries), 'date': today}
-        )
+        Returns:
+            Today's count after the increment
+        """
+        now = datetime.now(get_brt())
+        today = now.strftime("%Y-%m-%d")
+        with self.db.transaction():
+            self.db.insert('budget_events', {
+                'date': today,
+                'insight_id': insight_id,
+                'created_at_ms': to_epoch_ms(now)
+            })
+            return self.get_budget_count(today)
     
     # =========================================================================
     # Journal Operations
@@ -160,6 +160,36 @@ _base_agent = create_agent()
 _original_tool_plain = _base_agent.tool_plain
 
 
+def _enqueue_snapshot(tool_name: str, result):
+    """Hand a tool result to the background snapshot writer.
+    
+    The insert happens off the tool's critical path; see
+    src.awareness.snapshot_writer for batching and shutdown flushing.
+    """
+    try:
+        from src.awareness.models import Snapshot
+        from src.awareness.snapshot_writer import get_snapshot_writer
+        
+        # Convert result to dict if it's not already
+        if isinstance(result, dict):
+            data = result
+        else:
+            # Wrap non-dict results in a dict
+            data = {"result": result, "type": type(result).__name__}
+        
+        snapshot = Snapshot(
+            id=str(uuid.uuid4()),
+            collector=tool_name,
+            timestamp=datetime.now(settings.TIMEZONE),
+            data=data
+        )
+        if get_snapshot_writer().enqueue(snapshot):
+            logger.debug(f"[SNAPSHOT] Queued snapshot for {tool_name}")
+    except Exception as e:
+        # Don't break the tool if snapshot save fails
+        logger.warning(f"[SNAPSHOT] Failed to queue snapshot for {tool_name}: {e}")
+
+
 def enhanced_tool_plain(func):
     """Enhanced tool_plain decorator that auto-saves snapshots for data tool executions.
     
@@ -184,6 +214,8 @@ def enhanced_tool_plain(func):
     is_action = func.__name__.startswith(ACTION_PREFIXES)
     is_calculation = func.__name__.startswith('calc_')
     
+    save_snapshots = not is_report and not is_action and not is_calculation
+    
     # Create wrapper FIRST, then register with pydantic-ai
     @functools.wraps(func)
     def sync_wrapper(*args, **kwargs):
@@ -191,30 +223,8 @@ def enhanced_tool_plain(func):
         result = func(*args, **kwargs)
         
         # Auto-save snapshot for data tools ONLY (skip reports, actions, and calculations)
-        if not is_report and not is_action and not is_calculation:
-            try:
-                from src.awareness.store import InsightsStore
-                from src.awareness.models import Snapshot
-                
-                # Convert result to dict if it's not already
-                if isinstance(result, dict):
-                    data = result
-                else:
-                    # Wrap non-dict results in a dict
-                    data = {"result": result, "type": type(result).__name__}
-                
-                store = InsightsStore()
-                snapshot = Snapshot(
-                    id=str(uuid.uuid4()),
-                    collector=func.__name__,
-                    timestamp=datetime.now(settings.TIMEZONE),
-                    data=data
-                )
-                store.save_snapshot(snapshot)
-                logger.debug(f"[SNAPSHOT] Auto-saved snapshot for {func.__name__}")
-            except Exception as e:
-                # Don't break the tool if snapshot save fails
-                logger.warning(f"[SNAPSHOT] Failed to save snapshot for {func.__name__}: {e}")
+        if save_snapshots:
+            _enqueue_snapshot(func.__name__, result)
         
         return result
     
@@ -224,30 +234,8 @@ def enhanced_tool_plain(func):
         result = await func(*args, **kwargs)
         
         # Auto-save snapshot for data tools ONLY (skip reports, actions, and calculations)
-        if not is_report and not is_action and not is_calculation:
-            try:
-                from src.awareness.store import InsightsStore
-                from src.awareness.models import Snapshot
-                
-                # Convert result to dict if it's not already
-                if isinstance(result, dict):
-                    data = result
-                else:
-                    # Wrap non-dict results in a dict
-                    data = {"result": result, "type": type(result).__name__}
-                
-                store = InsightsStore()
-                snapshot = Snapshot(
-                    id=str(uuid.uuid4()),
-                    collector=func.__name__,
-                    timestamp=datetime.now(settings.TIMEZONE),
-                    data=data
-                )
-                store.save_snapshot(snapshot)
-                logger.debug(f"[SNAPSHOT] Auto-saved snapshot for {func.__name__}")
-            except Exception as e:
-                # Don't break the tool if snapshot save fails
-                logger.warning(f"[SNAPSHOT] Failed to save snapshot for {func.__name__}: {e}")
+        if save_snapshots:
+            _enqueue_snapshot(func.__name__, result)
         
         return result
     
@@ -7,15 +7,312 @@ Uses session IDs to track conversations independent of the channel.
 
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from pydantic_ai.messages import ModelMessage
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    UserPromptPart,
+)
 
+from settings import settings
 from src.core.database import Database
+from src.core.utils import to_epoch_ms
 
 logger = logging.getLogger(__name__)
 
+# Rough per-message/per-part cost of the Python objects around the text
+_MESSAGE_OVERHEAD_BYTES = 256
+_PART_OVERHEAD_BYTES = 128
+
+
+# Framing tokens per message (role markers, separators) in the chat template
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "Summary of the earlier conversation (older turns condensed):"
+
+
+def _part_text(part: Any) -> str:
+    """Get the text payload of a message part (tool calls use their args)."""
+    content = getattr(part, "content", None)
+    if content is None:
+        content = getattr(part, "args", None) or ""
+    return content if isinstance(content, str) else str(content)
+
+
+def estimate_message_bytes(msg: Any) -> int:
+    """
+    Estimate the resident size of a message from its text payload.
+    
+    Exact sizing (deep getsizeof) is too slow for every turn; text length
+    plus a fixed overhead is close enough to bound the cache.
+    """
+    if isinstance(msg, dict):
+        return _MESSAGE_OVERHEAD_BYTES + len(str(msg.get("content", "")))
+    
+    size = _MESSAGE_OVERHEAD_BYTES
+    for part in getattr(msg, "parts", ()):
+        size += _PART_OVERHEAD_BYTES + len(_part_text(part))
+    return size
+
+
+def estimate_tokens(msg: Any, chars_per_token: int = 4) -> int:
+    """Estimate the prompt tokens of a message from its text length."""
+    if isinstance(msg, dict):
+        chars = len(str(msg.get("content", "")))
+    else:
+        chars = sum(len(_part_text(part)) for part in getattr(msg, "parts", ()))
+    return _MESSAGE_OVERHEAD_TOKENS + chars // chars_per_token
+
+
+def is_turn_start(msg: Any) -> bool:
+    """Check whether a message opens a user turn (a window may only start there)."""
+    if isinstance(msg, dict):
+        return msg.get("role") == "user"
+    return isinstance(msg, ModelRequest) and any(
+        isinstance(part, UserPromptPart) for part in msg.parts
+    )
+
+
+def summary_lines(messages: List[ModelMessage], line_chars: int = 240) -> List[str]:
+    """
+    Condense messages into one short line per user prompt, reply or tool call.
+    
+    Args:
+        messages: Messages to condense (oldest first)
+        line_chars: Maximum characters kept per line
+        
+    Returns:
+        Lines like "User: ...", "Friday: ...", "Friday used tool: name"
+    """
+    def clip(text: str) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= line_chars else text[:line_chars - 1] + "…"
+    
+    lines = []
+    for msg in messages:
+        if isinstance(msg, dict):
+            role = "User" if msg.get("role") == "user" else "Friday"
+            if msg.get("content"):
+                lines.append(f"{role}: {clip(str(msg['content']))}")
+            continue
+        for part in getattr(msg, "parts", ()):
+            if isinstance(part, UserPromptPart):
+                lines.append(f"User: {clip(_part_text(part))}")
+            elif isinstance(part, TextPart) and part.content.strip():
+                lines.append(f"Friday: {clip(part.content)}")
+            elif isinstance(part, ToolCallPart):
+                lines.append(f"Friday used tool: {part.tool_name}")
+    return lines
+
+
+def extractive_summary(
+    previous: str,
+    messages: List[ModelMessage],
+    max_chars: int,
+    line_chars: int = 240
+) -> str:
+    """
+    Extend a rolling summary with newly folded messages.
+    
+    Only the new messages are condensed; the oldest lines are dropped once
+    the summary exceeds max_chars, so the cost per turn stays constant.
+    """
+    lines = (previous.splitlines() if previous else []) + summary_lines(messages, line_chars)
+    total = sum(len(line) + 1 for line in lines)
+    while len(lines) > 1 and total > max_chars:
+        total -= len(lines.pop(0)) + 1
+    return "\n".join(lines)
+
+
+def to_model_message(msg: Any) -> ModelMessage:
+    """Convert a legacy {"role", "content"} dict to a ModelMessage (others pass through)."""
+    if not isinstance(msg, dict):
+        return msg
+    content = str(msg.get("content", ""))
+    if msg.get("role") == "assistant":
+        return ModelResponse(parts=[TextPart(content=content)])
+    if msg.get("role") == "system":
+        return ModelRequest(parts=[SystemPromptPart(content=content)])
+    return ModelRequest(parts=[UserPromptPart(content=content)])
+
+
+def history_rows(messages: List[ModelMessage]) -> List[Tuple[str, str]]:
+    """
+    Extract the (role, text) rows kept in conversation_history for search.
+    
+    User prompts and assistant text are kept; system prompts, tool calls
+    and tool returns live only in the serialized turn.
+    """
+    rows = []
+    for msg in messages:
+        if isinstance(msg, ModelRequest):
+            role = "user"
+            texts = [_part_text(part) for part in msg.parts if isinstance(part, UserPromptPart)]
+        elif isinstance(msg, ModelResponse):
+            role = "assistant"
+            texts = [part.content for part in msg.parts if isinstance(part, TextPart)]
+        else:
+            continue
+        content = " ".join(texts)
+        if content.strip():
+            rows.append((role, content))
+    return rows
+
+
+def dump_turn(messages: List[ModelMessage]) -> bytes:
+    """Serialize a turn's messages to compact JSON bytes."""
+    return ModelMessagesTypeAdapter.dump_json(messages)
+
+
+def load_turns(payloads: List[bytes]) -> List[ModelMessage]:
+    """
+    Restore messages from serialized turns.
+    
+    Each payload is a JSON array, so the arrays are spliced into one and
+    validated in a single pass instead of once per turn.
+    """
+    bodies = [bytes(payload)[1:-1] for payload in payloads]
+    return ModelMessagesTypeAdapter.validate_json(b"[" + b",".join(body for body in bodies if body) + b"]")
+
+
+@dataclass
+class HistoryWindow:
+    """History sent to the model for one turn, with token accounting."""
+    messages: List[ModelMessage]
+    tokens_full: int
+    tokens_sent: int
+    folded_count: int = 0  # Leading messages represented by the summary
+    
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_full - self.tokens_sent, 0)
+
+
+class SessionCache:
+    """
+    LRU cache of session histories bounded by session count and estimated bytes.
+    
+    History is written through to SQLite on every update, so evicting a
+    session only drops the in-memory copy; the next get_history() reloads it.
+    """
+    
+    def __init__(
+        self,
+        max_sessions: int,
+        max_bytes: int,
+        on_evict: Optional[Callable[[str, List[ModelMessage]], None]] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_sessions: Maximum number of cached sessions
+            max_bytes: Maximum estimated size of all cached messages
+            on_evict: Called with (session_id, messages) when a session is evicted
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[List[ModelMessage], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, session_id: str) -> Optional[List[ModelMessage]]:
+        """Get a session's messages and mark it most recently used (None on miss)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+    
+    def peek_length(self, session_id: str) -> Optional[int]:
+        """Get a session's cached message count without touching LRU order or stats."""
+        entry = self._entries.get(session_id)
+        return len(entry[0]) if entry is not None else None
+    
+    def put(self, session_id: str, messages: List[ModelMessage]):
+        """Cache a session's full message list, evicting older sessions if over budget."""
+        size = sum(estimate_message_bytes(msg) for msg in messages)
+        with self._lock:
+            self._discard(session_id)
+            self._entries[session_id] = (messages, size)
+            self._bytes += size
+            evicted = self._evict()
+        self._notify(evicted)
+    
+    def extend(self, session_id: str, messages: List[ModelMessage]):
+        """Append messages to a cached session (creating it if missing)."""
+        size = sum(estimate_message_bytes(msg) for msg in messages)
+        with self._lock:
+            history, current = self._entries.pop(session_id, ([], 0))
+            history.extend(messages)
+            self._entries[session_id] = (history, current + size)
+            self._bytes += size
+            evicted = self._evict()
+        self._notify(evicted)
+    
+    def pop(self, session_id: str):
+        """Drop a session from the cache (not counted as an eviction)."""
+        with self._lock:
+            self._discard(session_id)
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters and current usage."""
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+    
+    def _discard(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+    
+    def _evict(self) -> List[Tuple[str, List[ModelMessage]]]:
+        """Evict least recently used sessions until within bounds (keeps the newest one)."""
+        evicted = []
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            session_id, (messages, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append((session_id, messages))
+        return evicted
+    
+    def _notify(self, evicted: List[Tuple[str, List[ModelMessage]]]):
+        for session_id, messages in evicted:
+            logger.debug(f"Evicted session {session_id} from history cache ({len(messages)} messages)")
+            if self.on_evict:
+                self.on_evict(session_id, messages)
+
 
 class ConversationManager:
     """
@@ -25,174 +322,513 @@ class ConversationManager:
     across different channels (Telegram, Web, Email, etc.) using the same session ID.
     """
     
-    def __init__(self, db: Optional[Database] = None):
+    def __init__(
+        self,
+        db: Optional[Database] = None,
+        summarizer: Optional[Callable[[str, List[ModelMessage]], str]] = None
+    ):
         """
         Initialize conversation manager.
         
         Args:
             db: Database instance. Creates new one if not provided.
+            summarizer: Called with (previous_summary, newly_folded_messages) to
+                extend a session's rolling summary. Defaults to extractive_summary.
         """
         self.db = db or Database()
-        self._memory_cache: Dict[str, List[ModelMessage]] = {}
+        self.summarizer = summarizer or self._default_summarizer
+        
+        # Rolling summaries of cached sessions: {session_id: (summary, folded_count)}
+        self._summaries: Dict[str, Tuple[str, int]] = {}
+        self._window_stats = {"turns": 0, "tokens_full": 0, "tokens_sent": 0, "tokens_saved": 0}
+        
+        config = settings.CONVERSATION["cache"]
+        self._memory_cache = SessionCache(
+            max_sessions=config["max_sessions"],
+            max_bytes=config["max_bytes"],
+            on_evict=self._on_evict
+        )
+        # Message counts of evicted sessions, so update_history() only persists
+        # the delta after a session fell out of the cache mid-turn
+        self._evicted_counts: "OrderedDict[str, int]" = OrderedDict()
         logger.info("ConversationManager initialized")
     
-    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[ModelMessage]:
+    def _on_evict(self, session_id: str, messages: List[ModelMessage]):
+        """Remember how many messages an evicted session had already persisted."""
+        self._evicted_counts[session_id] = len(messages)
+        self._evicted_counts.move_to_end(session_id)
+        self._summaries.pop(session_id, None)
+        while len(self._evicted_counts) > self._memory_cache.max_sessions * 16:
+            self._evicted_counts.popitem(last=False)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Get session cache counters (hits, misses, evictions, sessions, bytes)."""
+        return self._memory_cache.stats()
+    
+    def window_stats(self) -> Dict[str, int]:
+        """Get cumulative history window counters (turns, tokens full/sent/saved)."""
+        return dict(self._window_stats)
+    
+    # =========================================================================
+    # History Window
+    # =========================================================================
+    
+    def apply_window(self, session_id: str, history: List[ModelMessage]) -> HistoryWindow:
+        """
+        Fit a session's history into the configured token budget.
+        
+        The newest turns are kept verbatim. Older messages are folded into the
+        session's rolling summary, which is updated only with the messages that
+        left the window since the last turn and is stored in
+        conversation_summaries. The summary is sent as a system prompt part
+        alongside the original system prompt.
+        
+        Windows always start at a user prompt, so a tool call is never sent
+        without its return.
+        
+        Args:
+            session_id: Unique session identifier
+            history: Full session history (from get_history)
+            
+        Returns:
+            HistoryWindow with the messages to pass to agent.run()
+        """
+        config = settings.CONVERSATION["history_window"]
+        chars_per_token = config["chars_per_token"]
+        tokens = [estimate_tokens(msg, chars_per_token) for msg in history]
+        tokens_full = sum(tokens)
+        
+        split = 0
+        if config["enabled"] and tokens_full > config["max_tokens"]:
+            split = self._window_split(history, tokens, config["max_tokens"] - config["summary_max_tokens"])
+        
+        summary, folded = self._load_summary(session_id)
+        if folded > len(history):
+            # History was rebuilt with fewer messages; the old summary no longer lines up
+            summary, folded = "", 0
+        split = max(split, folded) if split else 0
+        
+        if split == 0:
+            window = HistoryWindow(history, tokens_full, tokens_full)
+        else:
+            if split > folded:
+                summary = self.summarizer(summary, history[folded:split])
+                self._save_summary(session_id, summary, split, chars_per_token)
+            summary_message = self._summary_message(history, summary)
+            window = HistoryWindow(
+                messages=[summary_message] + history[split:],
+                tokens_full=tokens_full,
+                tokens_sent=estimate_tokens(summary_message, chars_per_token) + sum(tokens[split:]),
+                folded_count=split
+            )
+        
+        self._window_stats["turns"] += 1
+        self._window_stats["tokens_full"] += window.tokens_full
+        self._window_stats["tokens_sent"] += window.tokens_sent
+        self._window_stats["tokens_saved"] += window.tokens_saved
+        
+        if window.folded_count:
+            logger.info(
+                f"History window for session {session_id}: {window.tokens_sent}/{window.tokens_full} tokens "
+                f"({window.tokens_saved} saved, {window.folded_count} messages summarized)"
+            )
+        return window
+    
+    @staticmethod
+    def _window_split(history: List[ModelMessage], tokens: List[int], budget: int) -> int:
+        """Index of the first verbatim message: the oldest turn start that fits the budget."""
+        split, used = len(history), 0
+        for index in range(len(history) - 1, -1, -1):
+            if used + tokens[index] > budget:
+                break
+            used += tokens[index]
+            split = index
+        
+        turn_starts = [i for i, msg in enumerate(history) if is_turn_start(msg)]
+        later = [i for i in turn_starts if i >= split]
+        if later:
+            return later[0]
+        # Even the latest turn is over budget: keep it whole anyway
+        return turn_starts[-1] if turn_starts else 0
+    
+    def _default_summarizer(self, previous: str, messages: List[ModelMessage]) -> str:
+        config = settings.CONVERSATION["history_window"]
+        return extractive_summary(
+            previous,
+            messages,
+            max_chars=config["summary_max_tokens"] * config["chars_per_token"],
+            line_chars=config["summary_line_chars"]
+        )
+    
+    @staticmethod
+    def _summary_message(history: List[ModelMessage], summary: str) -> ModelMessage:
+        """Build the message standing in for folded turns (keeps the system prompt)."""
+        content = f"{SUMMARY_HEADER}\n{summary}"
+        
+        # The agent only adds its system prompt to an empty history, so carry it over
+        system_parts = []
+        if history and isinstance(history[0], ModelRequest):
+            system_parts = [part for part in history[0].parts if isinstance(part, SystemPromptPart)]
+        return ModelRequest(parts=system_parts + [SystemPromptPart(content=content)])
+    
+    def _load_summary(self, session_id: str) -> Tuple[str, int]:
+        """Get (summary, folded_count) for a session, ("", 0) if none."""
+        if session_id in self._summaries:
+            return self._summaries[session_id]
+        
+        row = self.db.fetchone(
+            "SELECT summary, folded_count FROM conversation_summaries WHERE conversation_id = :session_id",
+            {"session_id": session_id}
+        )
+        summary = (row[0], row[1]) if row else ("", 0)
+        if session_id in self._memory_cache:
+            self._summaries[session_id] = summary
+        return summary
+    
+    def _save_summary(self, session_id: str, summary: str, folded_count: int, chars_per_token: int):
+        self.db.execute(
+            """
+            INSERT INTO conversation_summaries
+                (conversation_id, summary, folded_count, tokens, updated_at_ms)
+            VALUES (:session_id, :summary, :folded_count, :tokens, :updated_at_ms)
+            ON CONFLICT(conversation_id) DO UPDATE SET
+                summary = excluded.summary,
+                folded_count = excluded.folded_count,
+                tokens = excluded.tokens,
+                updated_at_ms = excluded.updated_at_ms
+            """,
+            {
+                "session_id": session_id,
+                "summary": summary,
+                "folded_count": folded_count,
+                "tokens": len(summary) // chars_per_token,
+                "updated_at_ms": to_epoch_ms(datetime.now(timezone.utc)),
+            }
+        )
+        if session_id in self._memory_cache:
+            self._summaries[session_id] = (summary, folded_count)
+    
+    def get_history(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before_index: Optional[int] = None
+    ) -> List[ModelMessage]:
         """
         Get conversation history for a session.
         
+        On a cache miss the full ModelMessage list is restored from
+        conversation_turns with one indexed read and a single validation pass.
+        Sessions recorded before turns existed are rebuilt from their text rows
+        once and saved as a turn.
+        
+        A page (limit and/or before_index) of an uncached session is read with
+        a keyset seek on (conversation_id, start_index), touching only the
+        turns it returns, and is not cached.
+        
         Args:
             session_id: Unique session identifier (e.g., telegram_user_id, email, etc.)
-            limit: Maximum number of messages to return (most recent first)
+            limit: Maximum number of messages to return (most recent)
+            before_index: Only return messages before this position in the history
             
         Returns:
             List of ModelMessage objects representing the conversation history
         """
         # Check memory cache first
-        if session_id in self._memory_cache:
-            history = self._memory_cache[session_id]
-            if limit:
-                return history[-limit:]
-            return history
+        history = self._memory_cache.get(session_id)
+        if history is None and (limit or before_index is not None):
+            page = self._load_page(session_id, limit, before_index)
+            if page is not None:
+                return page
+        
+        if history is None:
+            history = self._load_history(session_id)
+            
+            # Cache in memory
+            self._memory_cache.put(session_id, history)
+            self._evicted_counts.pop(session_id, None)
+            logger.info(f"Loaded {len(history)} messages for session {session_id}")
         
-        # Load from database
+        if before_index is not None:
+            history = history[:before_index]
+        if limit:
+            return history[-limit:]
+        return history
+    
+    def _load_page(
+        self,
+        session_id: str,
+        limit: Optional[int],
+        before_index: Optional[int]
+    ) -> Optional[List[ModelMessage]]:
+        """Read the newest turns before a position (None if the session has no turns)."""
         rows = self.db.fetchall(
             """
-            SELECT role, content, timestamp 
-            FROM conversation_history 
-            WHERE conversation_id = :session_id 
-            ORDER BY timestamp ASC
-            """ + (f" LIMIT {limit}" if limit else ""),
-            {"session_id": session_id}
+            SELECT start_index, payload
+            FROM conversation_turns
+            WHERE conversation_id = :session_id AND start_index < :before
+            ORDER BY start_index DESC
+            LIMIT :turns
+            """,
+            {
+                "session_id": session_id,
+                "before": before_index if before_index is not None else 2 ** 62,
+                "turns": limit or -1,  # every turn holds at least one message
+            }
         )
+        if not rows:
+            if before_index is not None and self.db.fetchone(
+                "SELECT 1 FROM conversation_turns WHERE conversation_id = :session_id LIMIT 1",
+                {"session_id": session_id}
+            ):
+                return []
+            return None
         
-        # Convert to ModelMessage objects
-        # Note: This is a simplified conversion - you may need to adjust based on actual ModelMessage structure
-        history = []
-        for row in rows:
-            # Store as dict that pydantic-ai can use
-            history.append({
-                "role": row[0],
-                "content": row[1]
-            })
+        rows.reverse()
+        messages = load_turns([row[1] for row in rows])
+        if before_index is not None:
+            messages = messages[:before_index - rows[0][0]]
+        return messages[-limit:] if limit else messages
+    
+    def get_messages(
+        self,
+        session_id: str,
+        limit: int = 50,
+        before_seq: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Get a page of a session's text messages, oldest first.
         
-        # Cache in memory
-        self._memory_cache[session_id] = history
+        Pages seek on (conversation_id, seq), so reading the last N messages
+        costs O(N) however long the session is. Pass the first row's seq as
+        before_seq to get the previous page.
         
-        logger.info(f"Loaded {len(history)} messages for session {session_id}")
+        Args:
+            session_id: Unique session identifier
+            limit: Maximum number of messages
+            before_seq: Only return messages with a lower seq
+            
+        Returns:
+            List of dicts with seq, timestamp, role and content
+        """
+        rows = self.db.fetchall(
+            """
+            SELECT seq, timestamp, role, content
+            FROM conversation_history
+            WHERE conversation_id = :session_id AND seq < :before_seq
+            ORDER BY seq DESC
+            LIMIT :limit
+            """,
+            {
+                "session_id": session_id,
+                "before_seq": before_seq if before_seq is not None else 2 ** 62,
+                "limit": limit,
+            }
+        )
+        return [
+            {"seq": row[0], "timestamp": row[1], "role": row[2], "content": row[3]}
+            for row in reversed(rows)
+        ]
+    
+    def _load_history(self, session_id: str) -> List[ModelMessage]:
+        """Restore a session's messages from the database."""
+        rows = self.db.fetchall(
+            """
+            SELECT payload
+            FROM conversation_turns
+            WHERE conversation_id = :session_id
+            ORDER BY start_index ASC
+            """,
+            {"session_id": session_id}
+        )
+        if rows:
+            return load_turns([row[0] for row in rows])
+        
+        # Legacy session: only text rows exist
+        rows = self.db.fetchall(
+            """
+            SELECT role, content, timestamp, ts_ms
+            FROM conversation_history
+            WHERE conversation_id = :session_id
+            ORDER BY seq ASC
+            """,
+            {"session_id": session_id}
+        )
+        history = [to_model_message({"role": row[0], "content": row[1]}) for row in rows]
+        if history:
+            self._rebuild_legacy_turn(session_id, history, rows)
         return history
     
-    def add_messages(self, session_id: str, messages: List[ModelMessage]):
+    def _rebuild_legacy_turn(self, session_id: str, history: List[ModelMessage], rows: List):
         """
-        Add messages to conversation history.
+        Store a legacy session's text rows as its single turn.
+        
+        The sessions row is rewritten in the same transaction, so its turn
+        and message totals describe the rebuilt turn.
         
         Args:
             session_id: Unique session identifier
-            messages: List of ModelMessage objects to add
+            history: Messages rebuilt from the text rows
+            rows: The (role, content, timestamp, ts_ms) text rows, oldest first
         """
-        timestamp = datetime.utcnow().isoformat()
-        
-        # Add to database
-        for msg in messages:
-            # Extract role and content from ModelMessage
-            # The structure depends on pydantic-ai's ModelMessage format
-            if isinstance(msg, dict):
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-            else:
-                # If it's a pydantic-ai ModelMessage object
-                role = getattr(msg, "role", "user")
-                content = str(getattr(msg, "content", ""))
-            
-            self.db.insert("conversation_history", {
+        tokens = sum(
+            estimate_tokens(msg, settings.CONVERSATION["history_window"]["chars_per_token"])
+            for msg in history
+        )
+        with self.db.transaction():
+            self._insert_turn(session_id, history, 0, to_epoch_ms(datetime.now(timezone.utc)))
+            self.db.execute(
+                """
+                INSERT INTO sessions (
+                    conversation_id, message_count, turn_count, token_count,
+                    first_timestamp, first_ts_ms, last_timestamp, last_ts_ms
+                )
+                VALUES (:session_id, :messages, 1, :tokens,
+                        :first_timestamp, :first_ts_ms, :last_timestamp, :last_ts_ms)
+                ON CONFLICT(conversation_id) DO UPDATE SET
+                    message_count = excluded.message_count,
+                    turn_count = 1,
+                    token_count = excluded.token_count,
+                    first_timestamp = excluded.first_timestamp,
+                    first_ts_ms = excluded.first_ts_ms,
+                    last_timestamp = excluded.last_timestamp,
+                    last_ts_ms = excluded.last_ts_ms
+                """,
+                {
+                    "session_id": session_id,
+                    "messages": len(rows),
+                    "tokens": tokens,
+                    "first_timestamp": rows[0][2],
+                    "first_ts_ms": rows[0][3],
+                    "last_timestamp": rows[-1][2],
+                    "last_ts_ms": rows[-1][3],
+                }
+            )
+    
+    def _persisted_length(self, session_id: str) -> int:
+        """Number of messages already stored as turns for a session."""
+        row = self.db.fetchone(
+            """
+            SELECT MAX(start_index + message_count)
+            FROM conversation_turns
+            WHERE conversation_id = :session_id
+            """,
+            {"session_id": session_id}
+        )
+        return row[0] if row and row[0] is not None else 0
+    
+    def _insert_turn(self, session_id: str, messages: List[ModelMessage], start_index: int, ts_ms: int):
+        self.db.insert("conversation_turns", {
+            "conversation_id": session_id,
+            "ts_ms": ts_ms,
+            "start_index": start_index,
+            "message_count": len(messages),
+            "payload": dump_turn(messages),
+        })
+    
+    def _persist(self, session_id: str, messages: List[ModelMessage], start_index: int):
+        """
+        Write one turn: the serialized messages plus their searchable text rows.
+        
+        Args:
+            session_id: Unique session identifier
+            messages: New messages of this turn
+            start_index: Position of the first message in the session history
+        """
+        now = datetime.now(timezone.utc)
+        timestamp = now.replace(tzinfo=None).isoformat()  # naive UTC, as stored historically
+        ts_ms = to_epoch_ms(now)
+        
+        rows = [
+            {
                 "conversation_id": session_id,
                 "role": role,
                 "content": content,
-                "timestamp": timestamp
-            })
+                "timestamp": timestamp,
+                "ts_ms": ts_ms
+            }
+            for role, content in history_rows(messages)
+        ]
+        
+        tokens = sum(
+            estimate_tokens(msg, settings.CONVERSATION["history_window"]["chars_per_token"])
+            for msg in messages
+        )
+        
+        with self.db.transaction():
+            self._insert_turn(session_id, messages, start_index, ts_ms)
+            self.db.insert_many("conversation_history", rows)
+            self.db.execute(
+                """
+                INSERT INTO sessions (
+                    conversation_id, message_count, turn_count, token_count,
+                    first_timestamp, first_ts_ms, last_timestamp, last_ts_ms
+                )
+                VALUES (:session_id, :messages, 1, :tokens, :timestamp, :ts_ms, :timestamp, :ts_ms)
+                ON CONFLICT(conversation_id) DO UPDATE SET
+                    message_count = message_count + excluded.message_count,
+                    turn_count = turn_count + 1,
+                    token_count = token_count + excluded.token_count,
+                    first_timestamp = COALESCE(first_timestamp, excluded.first_timestamp),
+                    first_ts_ms = COALESCE(first_ts_ms, excluded.first_ts_ms),
+                    last_timestamp = excluded.last_timestamp,
+                    last_ts_ms = excluded.last_ts_ms
+                """,
+                {
+                    "session_id": session_id,
+                    "messages": len(rows),
+                    "tokens": tokens,
+                    "timestamp": timestamp,
+                    "ts_ms": ts_ms,
+                }
+            )
+        logger.debug(f"Persisted turn of {len(messages)} messages ({len(rows)} text rows) for session {session_id}")
+    
+    def add_messages(self, session_id: str, messages: List[ModelMessage]):
+        """
+        Add messages to conversation history.
+        
+        Args:
+            session_id: Unique session identifier
+            messages: List of ModelMessage objects (or {"role", "content"} dicts) to add
+        """
+        messages = [to_model_message(msg) for msg in messages]
+        start_index = len(self.get_history(session_id))
+        
+        self._persist(session_id, messages, start_index)
         
         # Update memory cache
-        if session_id not in self._memory_cache:
-            self._memory_cache[session_id] = []
-        self._memory_cache[session_id].extend(messages)
+        self._memory_cache.extend(session_id, messages)
         
         logger.info(f"Added {len(messages)} messages to session {session_id}")
     
     def update_history(self, session_id: str, all_messages: List[ModelMessage]):
         """
-        Update the conversation history with the complete message list from agent.run().
+        Update the conversation history with the complete message list of a turn.
         
-        This is called after agent.run() with result.all_messages() to keep the 
-        history in sync with what the agent sees.
+        This is called after agent.run() with the session history plus
+        result.new_messages(); only the delta is persisted, as one turn row.
         
         Args:
             session_id: Unique session identifier
-            all_messages: Complete message history from result.all_messages()
+            all_messages: Complete message history of the session
         """
-        # Get previous message count
-        prev_count = len(self._memory_cache.get(session_id, []))
+        all_messages = [to_model_message(msg) for msg in all_messages]
+        
+        # Get previous message count (evicted sessions keep theirs in _evicted_counts)
+        prev_count = self._memory_cache.peek_length(session_id)
+        if prev_count is None:
+            prev_count = self._evicted_counts.pop(session_id, None)
+        if prev_count is None:
+            prev_count = self._persisted_length(session_id)
         
         # Update memory cache
-        self._memory_cache[session_id] = all_messages
+        self._memory_cache.put(session_id, all_messages)
         
         # Persist new messages to database (only the delta)
         if len(all_messages) > prev_count:
-            new_messages = all_messages[prev_count:]
-            timestamp = datetime.utcnow().isoformat()
-            
-            for msg in new_messages:
-                # Extract role and content from ModelMessage
-                if isinstance(msg, dict):
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                else:
-                    # If it's a pydantic-ai ModelMessage object (ModelRequest/ModelResponse)
-                    msg_type = type(msg).__name__
-                    
-                    # Skip system prompts and tool-related messages
-                    if "System" in msg_type or "Tool" in msg_type:
-                        continue
-                    
-                    # Determine role based on message type
-                    if "Request" in msg_type or "UserPrompt" in msg_type:
-                        role = "user"
-                    elif "Response" in msg_type:
-                        role = "assistant"
-                    else:
-                        role = getattr(msg, "role", "user")
-                    
-                    # Extract text content from parts
-                    content = ""
-                    if hasattr(msg, "parts"):
-                        parts = msg.parts
-                        text_parts = []
-                        for part in parts:
-                            part_type = type(part).__name__
-                            # Only save text parts (skip SystemPrompt, ToolCall, ToolReturn, etc.)
-                            if "Text" in part_type or "UserPrompt" in part_type:
-                                if hasattr(part, "content"):
-                                    text_parts.append(str(part.content))
-                                elif hasattr(part, "text"):
-                                    text_parts.append(str(part.text))
-                        content = " ".join(text_parts)
-                    elif hasattr(msg, "content"):
-                        content = str(msg.content)
-                    else:
-                        content = str(msg)
-                    
-                    # Skip if no actual text content
-                    if not content or content.strip() == "":
-                        continue
-                    
-                    logger.debug(f"Saving {msg_type} - Role: {role}, Content length: {len(content)}")
-                
-                self.db.insert("conversation_history", {
-                    "conversation_id": session_id,
-                    "role": role,
-                    "content": content,
-                    "timestamp": timestamp
-                })
-            
-            logger.info(f"Persisted {len(new_messages)} new messages for session {session_id}")
+            self._persist(session_id, all_messages[prev_count:], prev_count)
+            logger.info(f"Persisted {len(all_messages) - prev_count} new messages for session {session_id}")
         
         logger.debug(f"Updated history cache for session {session_id} ({len(all_messages)} messages)")
     
@@ -203,15 +839,18 @@ class ConversationManager:
         Args:
             session_id: Unique session identifier
         """
-        # Clear from database
-        self.db.execute(
-            "DELETE FROM conversation_history WHERE conversation_id = :session_id",
-            {"session_id": session_id}
-        )
+        # Clear from database in one transaction, so no table is left half-cleared
+        params = {"session_id": session_id}
+        with self.db.transaction():
+            self.db.execute("DELETE FROM conversation_history WHERE conversation_id = :session_id", params)
+            self.db.execute("DELETE FROM conversation_turns WHERE conversation_id = :session_id", params)
+            self.db.execute("DELETE FROM sessions WHERE conversation_id = :session_id", params)
+            self.db.execute("DELETE FROM conversation_summaries WHERE conversation_id = :session_id", params)
         
         # Clear from memory cache
-        if session_id in self._memory_cache:
-            del self._memory_cache[session_id]
+        self._memory_cache.pop(session_id)
+        self._evicted_counts.pop(session_id, None)
+        self._summaries.pop(session_id, None)
         
         logger.info(f"Cleared history for session {session_id}")
     
@@ -223,23 +862,50 @@ class ConversationManager:
             since_hours: Only return sessions active in the last N hours
             
         Returns:
-            List of session IDs
+            List of session IDs, most recently active first
         """
-        from datetime import timedelta
-        cutoff = (datetime.utcnow() - timedelta(hours=since_hours)).isoformat()
+        cutoff = to_epoch_ms(datetime.now(timezone.utc) - timedelta(hours=since_hours))
         
         rows = self.db.fetchall(
             """
-            SELECT DISTINCT conversation_id 
-            FROM conversation_history 
-            WHERE timestamp > :cutoff
-            ORDER BY timestamp DESC
+            SELECT conversation_id
+            FROM sessions
+            WHERE last_ts_ms > :cutoff
+            ORDER BY last_ts_ms DESC
             """,
             {"cutoff": cutoff}
         )
         
         return [row[0] for row in rows]
     
+    def list_sessions(self, since_hours: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        """
+        Get session summaries, most recently active first.
+        
+        Args:
+            since_hours: Only return sessions active in the last N hours
+            limit: Maximum number of sessions
+            
+        Returns:
+            List of session info dicts (see get_session_info)
+        """
+        cutoff = 0
+        if since_hours is not None:
+            cutoff = to_epoch_ms(datetime.now(timezone.utc) - timedelta(hours=since_hours))
+        
+        rows = self.db.fetchall(
+            """
+            SELECT conversation_id, message_count, turn_count, token_count,
+                   first_timestamp, last_timestamp
+            FROM sessions
+            WHERE last_ts_ms > :cutoff
+            ORDER BY last_ts_ms DESC
+            LIMIT :limit
+            """,
+            {"cutoff": cutoff, "limit": limit}
+        )
+        return [self._session_info(row[0], row) for row in rows]
+    
     def get_session_info(self, session_id: str) -> Dict:
         """
         Get information about a session.
@@ -248,28 +914,37 @@ class ConversationManager:
             session_id: Unique session identifier
             
         Returns:
-            Dictionary with session info (message_count, first_message, last_message)
+            Dictionary with session info (message_count, turn_count, token_count,
+            first_message, last_message)
         """
-        rows = self.db.fetchall(
+        row = self.db.fetchone(
             """
-            SELECT COUNT(*), MIN(timestamp), MAX(timestamp)
-            FROM conversation_history
+            SELECT conversation_id, message_count, turn_count, token_count,
+                   first_timestamp, last_timestamp
+            FROM sessions
             WHERE conversation_id = :session_id
             """,
             {"session_id": session_id}
         )
-        
-        if rows and rows[0][0] > 0:
+        return self._session_info(session_id, row)
+    
+    @staticmethod
+    def _session_info(session_id: str, row: Optional[tuple]) -> Dict:
+        if row:
             return {
                 "session_id": session_id,
-                "message_count": rows[0][0],
-                "first_message": rows[0][1],
-                "last_message": rows[0][2]
+                "message_count": row[1],
+                "turn_count": row[2],
+                "token_count": row[3],
+                "first_message": row[4],
+                "last_message": row[5]
             }
         
         return {
             "session_id": session_id,
             "message_count": 0,
+            "turn_count": 0,
+            "token_count": 0,
             "first_message": None,
             "last_message": None
         }
@@ -6,29 +6,81 @@ Handles schema creation, migrations, and provides connection utilities.
 """
 
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, text, Engine
+from sqlalchemy import create_engine, event, text, Engine
 from sqlalchemy.pool import StaticPool
 
 from settings import settings
+from src.core import migrations
 
 logger = logging.getLogger(__name__)
 
 
+# Engine profiles: PRAGMAs applied to every pooled connection.
+# "legacy" keeps SQLite defaults (rollback journal, synchronous=FULL).
+# "wal" lets the Telegram bot, awareness daemon and CLI read while one of
+# them writes, and only fsyncs the WAL on checkpoints.
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "legacy": {},
+    "wal": {
+        "auto_vacuum": "INCREMENTAL",  # must precede journal_mode to apply to new files
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,          # ms to wait on a locked database
+        "mmap_size": 268435456,        # 256 MiB memory-mapped I/O
+        "cache_size": -65536,          # negative = KiB, i.e. 64 MiB page cache
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def resolve_pragmas(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the PRAGMA set for an engine profile.
+    
+    Args:
+        profile: Profile name from ENGINE_PROFILES. If None, uses settings.DATABASE["profile"]
+        
+    Returns:
+        Dictionary of pragma name: value, with settings.DATABASE["pragmas"] overrides applied
+    """
+    config = getattr(settings, "DATABASE", {})
+    profile = profile or config.get("profile", "wal")
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile} (choose from {', '.join(ENGINE_PROFILES)})")
+    
+    pragmas = dict(ENGINE_PROFILES[profile])
+    if profile != "legacy":
+        pragmas.update(config.get("pragmas", {}))
+    return pragmas
+
+
 class Database:
     """Centralized database manager for Friday."""
     
-    def __init__(self, db_path: Optional[Path] = None, in_memory: bool = False):
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        in_memory: bool = False,
+        profile: Optional[str] = None
+    ):
         """
         Initialize database connection.
         
         Args:
             db_path: Path to SQLite database file. If None, uses settings.PATHS["data"] / "friday.db"
             in_memory: If True, creates an in-memory database (useful for testing)
+            profile: Engine profile name (see ENGINE_PROFILES). If None, uses settings.DATABASE["profile"]
         """
+        config = getattr(settings, "DATABASE", {})
+        # Per-thread connection of the currently open transaction() block
+        self._local = threading.local()
+        
         if in_memory:
             self.db_path = ":memory:"
             # Use StaticPool for in-memory databases to persist across connections
@@ -39,183 +91,140 @@ class Database:
             )
         else:
             self.db_path = db_path or settings.PATHS["data"] / "friday.db"
-            self.engine = create_engine(f"sqlite:///{str(self.db_path)}")
+            self.engine = create_engine(
+                f"sqlite:///{str(self.db_path)}",
+                pool_size=config.get("pool_size", 5),
+                max_overflow=config.get("max_overflow", 10),
+                pool_timeout=config.get("pool_timeout", 30),
+            )
+        
+        # WAL and mmap are meaningless for :memory:, so only file databases get a profile
+        self.pragmas = {} if in_memory else resolve_pragmas(profile)
+        if self.pragmas:
+            event.listen(self.engine, "connect", self._apply_pragmas)
+        
+        # Read-only engine for ad-hoc reads (created on first use)
+        self._readonly_engine: Optional[Engine] = None
         
         # Initialize schema if needed
         self._initialize_schema()
     
+    def _apply_pragmas(self, dbapi_connection, connection_record):
+        """Apply the engine profile PRAGMAs to a freshly opened DBAPI connection."""
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    
+    def pragma(self, name: str) -> Any:
+        """
+        Read the current value of a PRAGMA on a pooled connection.
+        
+        Args:
+            name: PRAGMA name (e.g. "journal_mode")
+            
+        Returns:
+            First column of the PRAGMA result, or None
+        """
+        row = self.fetchone(f"PRAGMA {name}")
+        return row[0] if row else None
+    
     def _initialize_schema(self):
-        """Create database tables if they don't exist."""
+        """Bring the schema up to date by applying pending migrations.
+        
+        Skipped entirely when PRAGMA user_version is already current.
+        """
         try:
             with self.engine.connect() as conn:
-                # Conversation history table
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS conversation_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        conversation_id TEXT NOT NULL,
-                        timestamp TEXT NOT NULL,
-                        role TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        metadata TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                
-                # Index for faster queries
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_conversation_history_lookup 
-                    ON conversation_history(conversation_id, timestamp DESC)
-                """))
-                
-                # Facts/knowledge table
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS facts (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        category TEXT NOT NULL,
-                        subject TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        confidence REAL DEFAULT 1.0,
-                        source TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        tags TEXT,
-                        metadata TEXT
-                    )
-                """))
-                
-                # Index for facts
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_facts_category 
-                    ON facts(category, subject)
-                """))
-                
-                # Insights/awareness tables
-                # Snapshots: Point-in-time data captures
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS snapshots (
-                        id TEXT PRIMARY KEY,
-                        collector TEXT NOT NULL,
-                        timestamp TEXT NOT NULL,
-                        data TEXT NOT NULL,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_snapshots_collector ON snapshots(collector)
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots(timestamp)
-                """))
-                
-                # Insights: Generated observations/alerts
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS insights (
-                        id TEXT PRIMARY KEY,
-                        type TEXT NOT NULL,
-                        category TEXT NOT NULL,
-                        priority TEXT NOT NULL,
-                        title TEXT NOT NULL,
-                        message TEXT NOT NULL,
-                        confidence REAL DEFAULT 1.0,
-                        data TEXT,
-                        source_analyzer TEXT,
-                        dedupe_key TEXT,
-                        created_at TEXT NOT NULL,
-                        expires_at TEXT,
-                        delivered INTEGER DEFAULT 0
-                    )
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_insights_created ON insights(created_at)
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_insights_dedupe ON insights(dedupe_key)
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_insights_delivered ON insights(delivered)
-                """))
-                
-                # Deliveries: Record of sent notifications
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS deliveries (
-                        id TEXT PRIMARY KEY,
-                        insight_id TEXT NOT NULL,
-                        channel TEXT NOT NULL,
-                        delivered_at TEXT NOT NULL,
-                        success INTEGER DEFAULT 1,
-                        error TEXT
-                    )
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_deliveries_insight ON deliveries(insight_id)
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_deliveries_date ON deliveries(delivered_at)
-                """))
+                version = migrations.get_version(conn)
+                if version >= migrations.latest_version():
+                    logger.debug(f"Database schema up to date: {self.db_path} (version {version})")
+                    return
                 
-                # Budget: Daily reach-out tracking
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS reach_out_budget (
-                        date TEXT PRIMARY KEY,
-                        count INTEGER DEFAULT 0,
-                        max_per_day INTEGER DEFAULT 5,
-                        deliveries TEXT DEFAULT '[]'
-                    )
-                """))
-                
-                # Journal threads: Daily journal thread messages
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS journal_threads (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT UNIQUE NOT NULL,
-                        message_id INTEGER NOT NULL,
-                        created_at TEXT NOT NULL
-                    )
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_journal_threads_date ON journal_threads(date)
-                """))
-                
-                # Journal entries: User journal entries from Telegram
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS journal_entries (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT NOT NULL,
-                        timestamp TEXT NOT NULL,
-                        entry_type TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        thread_message_id INTEGER
-                    )
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_journal_entries_date ON journal_entries(date)
-                """))
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_journal_entries_timestamp ON journal_entries(timestamp)
-                """))
-                
-                conn.commit()
-                logger.info(f"Database schema initialized: {self.db_path}")
+                applied = migrations.migrate(conn)
+                logger.info(
+                    f"Database schema migrated: {self.db_path} "
+                    f"(version {version} -> {migrations.get_version(conn)}, applied {applied}, "
+                    f"journal_mode={self.pragmas.get('journal_mode', 'default')})"
+                )
                 
         except Exception as e:
             logger.error(f"Error initializing database schema: {e}")
             raise
     
+    @property
+    def schema_version(self) -> int:
+        """Current schema version (PRAGMA user_version)."""
+        with self.get_connection() as conn:
+            return migrations.get_version(conn)
+    
     @contextmanager
     def get_connection(self):
         """
         Get a database connection context manager.
         
+        Inside a transaction() block this yields the transaction's connection,
+        so helper methods join the open transaction instead of committing.
+        
         Usage:
             with db.get_connection() as conn:
                 result = conn.execute(text("SELECT * FROM table"))
         """
+        active = getattr(self._local, "connection", None)
+        if active is not None:
+            yield active
+            return
+        
         conn = self.engine.connect()
         try:
             yield conn
         finally:
             conn.close()
     
+    @property
+    def in_transaction(self) -> bool:
+        """True if the calling thread is inside a transaction() block."""
+        return getattr(self._local, "connection", None) is not None
+    
+    def _commit(self, conn):
+        """Commit unless the connection belongs to an open transaction() block."""
+        if not self.in_transaction:
+            conn.commit()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into a single commit.
+        
+        insert(), insert_many(), update(), delete() and execute() called on
+        this thread inside the block share one connection and are committed
+        together on exit (or rolled back if the block raises). Nested blocks
+        join the outermost transaction.
+        
+        Usage:
+            with db.transaction():
+                db.insert("deliveries", {...})
+                db.update("insights", {"delivered": 1}, "id = :id", {"id": insight_id})
+        """
+        active = getattr(self._local, "connection", None)
+        if active is not None:
+            yield active
+            return
+        
+        conn = self.engine.connect()
+        self._local.connection = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.connection = None
+            conn.close()
+    
     def execute(self, sql: str, params: Optional[Dict[str, Any]] = None) -> Any:
         """
         Execute a SQL statement and return results.
@@ -231,9 +240,28 @@ class Database:
             result = conn.execute(text(sql), params or {})
             # Commit for INSERT/UPDATE/DELETE statements
             if sql.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'REPLACE')):
-                conn.commit()
+                self._commit(conn)
             return result
     
+    def execute_many(self, sql: str, params: List[Dict[str, Any]]) -> int:
+        """
+        Execute a write statement once per parameter set (executemany) with one commit.
+        
+        Args:
+            sql: INSERT/UPDATE/DELETE statement with named parameters
+            params: List of parameter dictionaries
+            
+        Returns:
+            Number of parameter sets executed
+        """
+        if not params:
+            return 0
+        
+        with self.get_connection() as conn:
+            conn.execute(text(sql), params)
+            self._commit(conn)
+            return len(params)
+    
     def fetchall(self, sql: str, params: Optional[Dict[str, Any]] = None) -> List[tuple]:
         """
         Execute a query and fetch all results.
@@ -249,6 +277,80 @@ class Database:
             result = conn.execute(text(sql), params or {})
             return result.fetchall()
     
+    @contextmanager
+    def readonly_connection(self):
+        """
+        Get a connection opened with SQLite's mode=ro.
+        
+        Writes through it fail with "attempt to write a readonly database",
+        and in WAL mode its reads never block the writer processes. In-memory
+        databases have no file to reopen and use the regular engine.
+        
+        Usage:
+            with db.readonly_connection() as conn:
+                result = conn.execute(text("SELECT * FROM snapshots"))
+        """
+        if self.db_path == ":memory:":
+            with self.get_connection() as conn:
+                yield conn
+            return
+        
+        if self._readonly_engine is None:
+            self._readonly_engine = create_engine(
+                f"sqlite:///file:{Path(self.db_path).resolve()}?mode=ro&uri=true",
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+            )
+            event.listen(self._readonly_engine, "connect", self._apply_readonly_pragmas)
+        
+        with self._readonly_engine.connect() as conn:
+            yield conn
+    
+    def _apply_readonly_pragmas(self, dbapi_connection, connection_record):
+        """Apply the read-side profile PRAGMAs (journal/vacuum settings need write access)."""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA query_only=ON")
+            for name in ("busy_timeout", "mmap_size", "cache_size", "temp_store"):
+                if name in self.pragmas:
+                    cursor.execute(f"PRAGMA {name}={self.pragmas[name]}")
+        finally:
+            cursor.close()
+    
+    def iter_rows(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 500,
+        readonly: bool = True
+    ) -> Iterator[Any]:
+        """
+        Stream query results in fetchmany() batches.
+        
+        Only one batch is held in memory at a time, so large tables can be
+        exported or scanned with constant memory.
+        
+        Args:
+            sql: SQL query to execute
+            params: Optional parameters for the query
+            batch_size: Rows fetched per round trip
+            readonly: Use the read-only connection (see readonly_connection)
+            
+        Yields:
+            Result rows (tuples with ._fields and ._mapping)
+        """
+        connection = self.readonly_connection() if readonly else self.get_connection()
+        with connection as conn:
+            result = conn.execute(text(sql), params or {})
+            try:
+                while True:
+                    batch = result.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    yield from batch
+            finally:
+                result.close()
+    
     def fetchone(self, sql: str, params: Optional[Dict[str, Any]] = None) -> Optional[tuple]:
         """
         Execute a query and fetch one result.
@@ -281,9 +383,32 @@ class Database:
         
         with self.get_connection() as conn:
             result = conn.execute(text(sql), data)
-            conn.commit()
+            self._commit(conn)
             return result.lastrowid
     
+    def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many rows into a table with a single executemany and commit.
+        
+        Args:
+            table: Table name
+            rows: List of column: value dictionaries (all with the same keys)
+            
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        columns = ", ".join(rows[0].keys())
+        placeholders = ", ".join(f":{key}" for key in rows[0].keys())
+        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        
+        with self.get_connection() as conn:
+            conn.execute(text(sql), rows)
+            self._commit(conn)
+            return len(rows)
+    
     def update(self, table: str, data: Dict[str, Any], where: str, where_params: Dict[str, Any]) -> int:
         """
         Update rows in a table.
@@ -304,7 +429,7 @@ class Database:
         
         with self.get_connection() as conn:
             result = conn.execute(text(sql), params)
-            conn.commit()
+            self._commit(conn)
             return result.rowcount
     
     def delete(self, table: str, where: str, where_params: Dict[str, Any]) -> int:
@@ -323,9 +448,91 @@ class Database:
         
         with self.get_connection() as conn:
             result = conn.execute(text(sql), where_params)
-            conn.commit()
+            self._commit(conn)
             return result.rowcount
     
+    def delete_chunked(
+        self,
+        table: str,
+        where: str,
+        where_params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 500,
+        pause_ms: int = 0
+    ) -> int:
+        """
+        Delete rows in bounded chunks, committing after each one.
+        
+        Keeps the write lock short so other processes can write between
+        chunks of a large purge. Don't call inside a transaction() block:
+        the chunks would all be committed together.
+        
+        Args:
+            table: Table name (must have a rowid)
+            where: WHERE clause (without the WHERE keyword)
+            where_params: Parameters for the WHERE clause
+            chunk_size: Maximum rows deleted per commit
+            pause_ms: Sleep between chunks
+            
+        Returns:
+            Number of rows deleted
+        """
+        sql = (
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} WHERE {where} LIMIT :_chunk_size)"
+        )
+        params = {**(where_params or {}), '_chunk_size': chunk_size}
+        deleted = 0
+        
+        while True:
+            with self.get_connection() as conn:
+                count = conn.execute(text(sql), params).rowcount
+                self._commit(conn)
+            deleted += count
+            if count < chunk_size:
+                return deleted
+            if pause_ms:
+                time.sleep(pause_ms / 1000)
+    
+    def incremental_vacuum(self, max_pages: int = 0) -> Dict[str, Any]:
+        """
+        Return free pages to the filesystem.
+        
+        With auto_vacuum=INCREMENTAL this runs PRAGMA incremental_vacuum.
+        Databases created before auto_vacuum was enabled are converted
+        once with a full VACUUM (slow, rewrites the file).
+        
+        Args:
+            max_pages: Maximum pages to free (0 = the whole freelist)
+            
+        Returns:
+            Stats: {"mode", "pages_reclaimed", "bytes_reclaimed", "freelist_remaining", "elapsed_ms"}
+        """
+        start = time.perf_counter()
+        page_size = self.pragma("page_size") or 4096
+        pages_before = self.pragma("page_count") or 0
+        
+        if self.pragma("auto_vacuum") != 2:  # 2 = INCREMENTAL
+            mode = "full"
+            self.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.execute("VACUUM")  # required for the new mode to take effect
+        else:
+            mode = "incremental"
+            with self.engine.connect() as conn:
+                # Each freed page is one VM step and cursor.execute() only steps
+                # a column-less statement once; executescript() runs it to completion
+                conn.connection.dbapi_connection.executescript(
+                    f"PRAGMA incremental_vacuum({int(max_pages)});"
+                )
+        
+        reclaimed = max(pages_before - (self.pragma("page_count") or 0), 0)
+        return {
+            "mode": mode,
+            "pages_reclaimed": reclaimed,
+            "bytes_reclaimed": reclaimed * page_size,
+            "freelist_remaining": self.pragma("freelist_count") or 0,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+        }
+    
     def exists(self) -> bool:
         """Check if the database file exists."""
         if self.db_path == ":memory:":
@@ -335,6 +542,8 @@ class Database:
     def close(self):
         """Close the database connection."""
         self.engine.dispose()
+        if self._readonly_engine is not None:
+            self._readonly_engine.dispose()
 
 
 # Global database instance (lazily initialized)
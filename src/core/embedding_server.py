@@ -0,0 +1,411 @@
+"""
+Friday 3.0 Embedding Server
+
+Serves one embeddings model per host over a Unix domain socket, so the
+Telegram bot, the awareness daemon and CLI invocations don't each load
+their own copy.
+
+Run as a service (services/friday-embeddings.service):
+    python -m src.core.embedding_server
+
+EmbeddingsModel uses EmbeddingClient transparently when the socket is
+up (settings.EMBEDDINGS["server"]) and loads the model in-process
+otherwise. The server applies its own embedding cache and micro-batching,
+so concurrent requests from all processes share forward passes.
+
+Protocol (all integers big-endian), one frame per message:
+
+    frame    = length:u32 body
+    request  = op:u8 count:u32 (text_length:u32 utf8_bytes){count}
+    response = status:u8 rows:u32 dimension:u32 payload
+
+OP_ENCODE answers with rows x dimension little-endian float32 vectors
+(un-normalized; the client normalizes), OP_INFO with rows = 0 and the
+model dimension. On STATUS_ERROR the payload is a UTF-8 message.
+"""
+
+import logging
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+OP_ENCODE = 1
+OP_INFO = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+_LENGTH = struct.Struct("!I")
+_REQUEST = struct.Struct("!BI")
+_RESPONSE = struct.Struct("!BII")
+
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+class ProtocolError(Exception):
+    """Malformed or oversized frame."""
+
+
+# =============================================================================
+# Protocol
+# =============================================================================
+
+
+def encode_request(op: int, texts: List[str] = ()) -> bytes:
+    """Build a request frame."""
+    parts = [_REQUEST.pack(op, len(texts))]
+    for text in texts:
+        data = text.encode("utf-8")
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    body = b"".join(parts)
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_request(body: bytes) -> Tuple[int, List[str]]:
+    """Parse a request body into (op, texts)."""
+    if len(body) < _REQUEST.size:
+        raise ProtocolError("Request too short")
+    op, count = _REQUEST.unpack_from(body)
+    offset = _REQUEST.size
+    texts = []
+    for _ in range(count):
+        if offset + _LENGTH.size > len(body):
+            raise ProtocolError("Truncated request")
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        if offset + length > len(body):
+            raise ProtocolError("Truncated request")
+        texts.append(body[offset:offset + length].decode("utf-8"))
+        offset += length
+    return op, texts
+
+
+def encode_response(vectors: Optional[np.ndarray] = None, dimension: int = 0, error: Optional[str] = None) -> bytes:
+    """Build a response frame with vectors, a dimension (OP_INFO) or an error."""
+    if error is not None:
+        body = _RESPONSE.pack(STATUS_ERROR, 0, 0) + error.encode("utf-8")
+    elif vectors is not None:
+        vectors = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE)
+        body = _RESPONSE.pack(STATUS_OK, vectors.shape[0], vectors.shape[1]) + vectors.tobytes()
+    else:
+        body = _RESPONSE.pack(STATUS_OK, 0, dimension)
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_response(body: bytes) -> Tuple[int, int, int, bytes]:
+    """Parse a response body into (status, rows, dimension, payload)."""
+    if len(body) < _RESPONSE.size:
+        raise ProtocolError("Response too short")
+    status, rows, dimension = _RESPONSE.unpack_from(body)
+    return status, rows, dimension, body[_RESPONSE.size:]
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Connection closed")
+        received += n
+    return bytes(buffer)
+
+
+def read_frame(sock: socket.socket) -> bytes:
+    """Read one length-prefixed frame body."""
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return _recv_exact(sock, length)
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class EmbeddingClient:
+    """Client of the embedding server with per-thread persistent connections.
+
+    Every method returns None instead of raising when the server can't be
+    used (socket missing, connection refused or dropped, server-side error),
+    so the caller can fall back to in-process encoding. A request that fails
+    on a cached connection is retried once on a new one; only then is the
+    server considered down and not tried again for RETRY_SECONDS.
+    """
+
+    RETRY_SECONDS = 30.0
+    POLL_SECONDS = 0.5
+
+    def __init__(self, socket_path: Path, timeout: float = 30.0):
+        """Initialize the client (no connection is made until first use).
+
+        Args:
+            socket_path: Path of the server's Unix socket
+            timeout: Socket timeout per request in seconds
+        """
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._down_until = 0.0
+        self._down = False
+        self._dimension: Optional[int] = None
+
+    def _connection(self) -> Optional[socket.socket]:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            return sock
+        if time.monotonic() < self._down_until or not os.path.exists(self.socket_path):
+            return None
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            self._mark_down(e)
+            return None
+        self._local.sock = sock
+        return sock
+
+    def _mark_down(self, reason: Exception):
+        if not self._down:
+            logger.info(f"Embedding server unavailable ({reason}), encoding in-process")
+        self._down = True
+        self._down_until = time.monotonic() + self.RETRY_SECONDS
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, op: int, texts: List[str] = ()) -> Optional[Tuple[int, int, bytes]]:
+        frame = encode_request(op, texts)
+        for attempt in range(2):
+            reused = getattr(self._local, "sock", None) is not None
+            sock = self._connection()
+            if sock is None:
+                return None
+            try:
+                sock.sendall(frame)
+                status, rows, dimension, payload = decode_response(read_frame(sock))
+                break
+            except (OSError, ProtocolError) as e:
+                self._close()
+                if reused and attempt == 0:
+                    # The cached connection may predate a server restart (EPIPE,
+                    # reset): retry once on a fresh one before giving up
+                    logger.debug(f"Embedding server connection failed ({e}), reconnecting")
+                    continue
+                self._mark_down(e)
+                return None
+
+        self._down = False
+        if status != STATUS_OK:
+            logger.warning(f"Embedding server error: {payload.decode('utf-8', 'replace')}")
+            return None
+        return rows, dimension, payload
+
+    def available(self) -> bool:
+        """Check whether the server can be reached."""
+        return self.dimension() is not None
+
+    def wait_available(self, timeout: float) -> bool:
+        """Poll the server until it answers or timeout seconds have passed.
+
+        Ignores the RETRY_SECONDS back-off, so a server that is still
+        starting up is picked up as soon as its socket accepts requests.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            self._down_until = 0.0
+            if self.available():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL_SECONDS)
+
+    def dimension(self) -> Optional[int]:
+        """Get the server model's dimension (cached after the first answer)."""
+        if self._dimension is None:
+            response = self._request(OP_INFO)
+            if response is not None:
+                self._dimension = response[1]
+        return self._dimension
+
+    def encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Encode texts on the server.
+
+        Returns:
+            Un-normalized float32 array of shape (len(texts), dimension), or None
+        """
+        response = self._request(OP_ENCODE, texts)
+        if response is None:
+            return None
+        rows, dimension, payload = response
+        return np.frombuffer(payload, dtype=_VECTOR_DTYPE).reshape(rows, dimension).astype(np.float32)
+
+    def close(self):
+        """Close this thread's connection."""
+        self._close()
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes."""
+
+    def handle(self):
+        model = self.server.model
+        while True:
+            try:
+                body = read_frame(self.request)
+            except (ConnectionError, ProtocolError, OSError):
+                return
+
+            try:
+                op, texts = decode_request(body)
+                if op == OP_ENCODE:
+                    response = encode_response(model.encode(texts, normalize=False) if texts
+                                               else np.empty((0, model.dimension), dtype=np.float32))
+                elif op == OP_INFO:
+                    response = encode_response(dimension=model.dimension)
+                else:
+                    response = encode_response(error=f"Unknown op {op}")
+            except Exception as e:
+                logger.error(f"Embedding request failed: {e}", exc_info=True)
+                response = encode_response(error=str(e))
+
+            try:
+                self.request.sendall(response)
+            except OSError:
+                return
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server around an EmbeddingsModel."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, model):
+        """Bind the socket (replacing a stale one) with owner-only permissions.
+
+        Args:
+            socket_path: Path of the Unix socket
+            model: EmbeddingsModel used to answer requests (must not itself be a client)
+
+        Raises:
+            RuntimeError: If another server is already listening on socket_path
+        """
+        path = Path(socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(path))
+                raise RuntimeError(f"An embedding server is already listening on {path}")
+            except OSError:
+                path.unlink()  # Stale socket of a server that didn't shut down cleanly
+            finally:
+                probe.close()
+
+        self.model = model
+        self.socket_path = path
+        super().__init__(str(path), _Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def sd_notify(state: str) -> bool:
+    """Send a state update (e.g. "READY=1") to systemd if it is supervising us.
+
+    Returns:
+        True if the message was sent (NOTIFY_SOCKET is set), False otherwise
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # Abstract namespace
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sock.connect(address)
+        sock.sendall(state.encode("utf-8"))
+    except OSError as e:
+        logger.warning(f"sd_notify failed: {e}")
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def main():
+    """Entry point for the embedding server daemon.
+
+    The socket is bound before the model loads; requests that arrive during
+    warm-up wait for the model instead of being refused. systemd is told the
+    service is ready (Type=notify) once warm-up is done, so units ordered
+    After= it start with the model already loaded.
+    """
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+
+    from src.core.embeddings import create_embeddings
+
+    socket_path = Path(settings.EMBEDDINGS["server"]["socket"])
+    model = create_embeddings(use_server=False)
+    server = EmbeddingServer(socket_path, model)
+
+    def warm_up():
+        model.warm_up()
+        sd_notify("READY=1")
+        logger.info(f"Embedding server ready: {model.stats()}")
+
+    threading.Thread(target=warm_up, name="embeddings-warmup", daemon=True).start()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down...")
+        # shutdown() waits for serve_forever(), which runs in this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"Embedding server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if model.batcher is not None:
+            model.batcher.close()
+        logger.info(f"Embedding server stopped: {model.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,519 @@ Friday 3.0 Embeddings
 Sentence transformer embeddings for semantic search and RAG.
 
 Usage:
-    from src.core.embeddings import get_embeddings, EmbeddingsModel
+    from src.core.embeddings import get_embeddings, EmbeddingsModel, iter_chunks
 
     embeddings = get_embeddings()
     vectors = embeddings.encode(["Hello world", "How are you?"])
+
+    with open(note_path, "rb") as f:
+        for chunk in iter_chunks(f, max_tokens=200):
+            ...  # chunk.text, chunk.start/end (byte offsets), chunk.heading_path
+
+Computed vectors are cached in the central database (embedding_cache) by
+model name, backend and quantization (EmbeddingsModel.cache_key) and
+normalized text hash, so re-encoding known texts skips the model entirely.
+
+The global instance coalesces concurrent encode() calls from different
+threads into one batched forward pass (see MicroBatcher).
+
+When the embedding server (src/core/embedding_server.py) is running, the
+global instance sends texts to it instead of loading its own copy of the
+model, and falls back to in-process loading when it isn't.
+
+Two inference backends are available (settings.EMBEDDINGS["backend"]):
+"torch" loads a sentence-transformers model, "onnx" runs an exported model
+from a local directory with ONNX Runtime (optionally dynamically quantized
+to int8), which avoids importing PyTorch at all.
 """
 
+import hashlib
+import io
 import logging
+import os
+import queue
+import re
 import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 import numpy as np
 
 from settings import settings
+from src.core.database import Database, get_db
+from src.core.embedding_server import EmbeddingClient
 
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# Embedding Cache
+# =============================================================================
+
+
+class EmbeddingCache:
+    """Content-addressed cache of embedding vectors.
+
+    Vectors are stored un-normalized as float32 BLOBs keyed by
+    (model, text_hash), where text_hash covers the NFC-normalized text with
+    whitespace collapsed. Entries carry a last-used timestamp; once the table
+    grows past max_entries the least recently used ones are evicted.
+    """
+
+    # SQLite bound-parameter budget per IN (...) lookup
+    LOOKUP_CHUNK = 500
+
+    # A hit only rewrites last_used_ms when it is older than this, so most
+    # lookups stay read-only instead of taking the database write lock
+    TOUCH_INTERVAL_MS = 3_600_000
+
+    def __init__(
+        self,
+        db: Optional[Database] = None,
+        max_entries: int = 200_000,
+        evict_batch: int = 1000,
+    ):
+        """Initialize the cache.
+
+        Args:
+            db: Database instance. Uses the global database if not provided.
+            max_entries: Maximum number of cached vectors (all models)
+            evict_batch: Extra entries dropped per eviction so it doesn't run on every write
+        """
+        self.db = db or get_db()
+        self.max_entries = max_entries
+        self.evict_batch = evict_batch
+        self._entries: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        """Hash of the normalized text (NFC, whitespace collapsed)."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, model: str, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached vectors and mark them as used.
+
+        last_used_ms is only refreshed for hits last touched more than
+        TOUCH_INTERVAL_MS ago (LRU eviction doesn't need finer resolution).
+
+        Args:
+            model: Model name
+            keys: Text keys (see text_key); duplicates are allowed
+
+        Returns:
+            {key: float32 vector} for the keys found
+        """
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        now_ms = int(time.time() * 1000)
+
+        for start in range(0, len(unique), self.LOOKUP_CHUNK):
+            chunk = unique[start:start + self.LOOKUP_CHUNK]
+            params = {f"k{i}": key for i, key in enumerate(chunk)}
+            placeholders = ", ".join(f":{name}" for name in params)
+            rows = self.db.fetchall(
+                f"""
+                SELECT text_hash, vector, last_used_ms FROM embedding_cache
+                WHERE model = :model AND text_hash IN ({placeholders})
+                """,
+                {"model": model, **params},
+            )
+            stale = []
+            for key, blob, last_used_ms in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+                if last_used_ms < now_ms - self.TOUCH_INTERVAL_MS:
+                    stale.append(key)
+
+            if stale:
+                touch_params = {f"k{i}": key for i, key in enumerate(stale)}
+                self.db.execute(
+                    f"""
+                    UPDATE embedding_cache SET last_used_ms = :now_ms
+                    WHERE model = :model AND text_hash IN ({", ".join(f":{name}" for name in touch_params)})
+                    """,
+                    {"model": model, "now_ms": now_ms, **touch_params},
+                )
+
+        with self._lock:
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        """Store vectors (one executemany) and evict if over the size bound."""
+        if not vectors:
+            return
+
+        now_ms = int(time.time() * 1000)
+        self.db.execute_many(
+            """
+            INSERT OR REPLACE INTO embedding_cache (model, text_hash, dim, vector, last_used_ms)
+            VALUES (:model, :text_hash, :dim, :vector, :last_used_ms)
+            """,
+            [
+                {
+                    "model": model,
+                    "text_hash": key,
+                    "dim": int(vector.shape[-1]),
+                    "vector": np.asarray(vector, dtype=np.float32).tobytes(),
+                    "last_used_ms": now_ms,
+                }
+                for key, vector in vectors.items()
+            ],
+        )
+
+        with self._lock:
+            self.writes += len(vectors)
+            if self._entries is None:
+                self._entries = self._count()
+            else:
+                self._entries += len(vectors)
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _count(self) -> int:
+        return self.db.fetchone("SELECT COUNT(*) FROM embedding_cache")[0]
+
+    def _evict(self):
+        """Drop least recently used entries down to max_entries - evict_batch."""
+        count = self._count()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                """
+                DELETE FROM embedding_cache
+                WHERE (model, text_hash) IN (
+                    SELECT model, text_hash FROM embedding_cache
+                    ORDER BY last_used_ms ASC
+                    LIMIT :n
+                )
+                """,
+                {"n": excess + self.evict_batch},
+            )
+            removed = min(count, excess + self.evict_batch)
+            self.evictions += removed
+            count -= removed
+            logger.info(f"Evicted {removed} embeddings from cache ({count} remaining)")
+        self._entries = count
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache counters (hits, misses, hit_rate, writes, evictions, entries)."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": self._count(),
+            "max_entries": self.max_entries,
+        }
+
+    def clear(self, model: Optional[str] = None):
+        """Remove cached vectors (of one model, or all)."""
+        if model:
+            self.db.execute("DELETE FROM embedding_cache WHERE model = :model", {"model": model})
+        else:
+            self.db.execute("DELETE FROM embedding_cache")
+        self._entries = None
+
+
+# =============================================================================
+# Micro-Batching
+# =============================================================================
+
+
+class MicroBatcher:
+    """Coalesces concurrent encode requests into batched model calls.
+
+    Callers submit a list of texts and get a Future. A single worker thread
+    takes the first pending request, keeps collecting requests for up to
+    max_wait_ms (or until max_batch_size texts are gathered), runs
+    encode_fn once on the concatenated texts and resolves each caller's
+    future with its slice of the result. If the batched call fails, each
+    request is retried on its own so only the failing caller sees the error.
+    Requests already queued while the model is busy are picked up without
+    waiting.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_wait_ms: float = 2.0,
+        max_batch_size: int = 64,
+    ):
+        """Initialize the batcher.
+
+        Args:
+            encode_fn: Function mapping a list of texts to an array of shape (n, dimension)
+            max_wait_ms: How long to wait for more requests after the first one
+            max_batch_size: Texts per batch at which collection stops early
+        """
+        self.encode_fn = encode_fn
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding.
+
+        Returns:
+            Future resolving to an array of shape (len(texts), dimension)
+        """
+        future: Future = Future()
+        if self._worker is not None and threading.current_thread() is self._worker:
+            # Re-entrant call from encode_fn: encode directly instead of deadlocking
+            future.set_result(self.encode_fn(texts))
+            return future
+
+        self._ensure_worker()
+        self._queue.put((texts, future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Submit texts and wait for their vectors."""
+        return self.submit(texts).result()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embeddings-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        """Gather requests following the first one until the wait or size limit."""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None)  # Re-queue shutdown after this batch
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [(texts, future) for texts, future in self._collect(first)
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = self.encode_fn(texts)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    self._run_separately(batch)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(texts)
+
+    def _run_separately(self, batch: List[Tuple[List[str], Future]]):
+        """Encode each request of a failed batch on its own, so one bad input only fails its caller."""
+        for request_texts, future in batch:
+            try:
+                future.set_result(self.encode_fn(request_texts))
+            except Exception as e:
+                future.set_exception(e)
+            self.batches += 1
+            self.requests += 1
+            self.texts += len(request_texts)
+
+    def stats(self) -> Dict[str, float]:
+        """Get batching counters (batches, requests, texts, mean sizes)."""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "mean_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "mean_texts_per_batch": self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop the worker after pending requests are served."""
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join(timeout)
+        self._worker = None
+
+
+# =============================================================================
+# ONNX Runtime Backend
+# =============================================================================
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over the attention mask (sentence-transformers pooling)."""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class OnnxEncoder:
+    """Sentence embeddings with ONNX Runtime and a HuggingFace tokenizer.
+
+    Loads an exported model directory (e.g. the `onnx/` files of
+    sentence-transformers/all-MiniLM-L6-v2, or `optimum-cli export onnx`):
+    tokenizer.json plus the graph, looked up in the directory and its onnx/
+    subdirectory. Token embeddings are mean-pooled over the attention mask.
+
+    With quantize=True the graph is dynamically quantized to int8 weights
+    once (saved next to it as <name>_quantized.onnx) and that file is used.
+
+    Implements the subset of the SentenceTransformer interface that
+    EmbeddingsModel uses.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        file_name: str = "model.onnx",
+        quantize: bool = False,
+        threads: int = 0,
+        max_length: int = 256,
+        batch_size: int = 32,
+    ):
+        """Load the tokenizer and create the inference session.
+
+        Args:
+            model_dir: Local directory of the exported model
+            file_name: ONNX graph file name
+            quantize: Use (and create if missing) a dynamically quantized graph
+            threads: Intra-op threads (0 = ONNX Runtime default)
+            max_length: Token limit per text (longer texts are truncated)
+            batch_size: Texts per session run
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        graph = self._find(model_dir, file_name)
+        if quantize:
+            graph = self._quantized(graph)
+
+        self.tokenizer = Tokenizer.from_file(str(self._find(model_dir, "tokenizer.json")))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(graph), options, providers=["CPUExecutionProvider"])
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        self.graph = graph
+
+    @staticmethod
+    def _find(model_dir: Path, file_name: str) -> Path:
+        for candidate in (model_dir / file_name, model_dir / "onnx" / file_name):
+            if candidate.exists():
+                return candidate
+        raise FileNotFoundError(f"{file_name} not found in {model_dir} or {model_dir / 'onnx'}")
+
+    @staticmethod
+    def _quantized(graph: Path) -> Path:
+        if graph.stem.endswith("_quantized"):
+            return graph
+        target = graph.with_name(f"{graph.stem}_quantized.onnx")
+        if not target.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {graph.name} to int8 weights: {target}")
+            quantize_dynamic(str(graph), str(target), weight_type=QuantType.QInt8)
+        return target
+
+    def encode(
+        self,
+        texts: List[str],
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        """Encode texts, batching by length to keep padding short."""
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            output = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+            if output.ndim == 3:
+                output = mean_pool(output, inputs["attention_mask"])
+            for i, vector in zip(batch, output.astype(np.float32)):
+                vectors[i] = vector
+
+        embeddings = np.stack(vectors)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        dimension = self.session.get_outputs()[0].shape[-1]
+        if isinstance(dimension, int):
+            return dimension
+        return int(self.encode(["dimension probe"]).shape[1])
+
+
+# =============================================================================
+# Embeddings Model
+# =============================================================================
+
+
 class EmbeddingsModel:
     """Sentence transformer embeddings model wrapper."""
 
@@ -30,6 +525,12 @@ class EmbeddingsModel:
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         device: str = "cpu",
         cache_dir: Optional[Path] = None,
+        cache: Optional[EmbeddingCache] = None,
+        batching: Optional[Dict] = None,
+        backend: str = "torch",
+        onnx: Optional[Dict] = None,
+        threads: int = 0,
+        server: Optional[EmbeddingClient] = None,
     ):
         """Initialize the embeddings model.
 
@@ -37,46 +538,161 @@ class EmbeddingsModel:
             model_name: HuggingFace model name or path
             device: Device to run on ('cpu', 'cuda', 'mps')
             cache_dir: Optional cache directory for model files
+            cache: Optional embedding cache consulted before running the model
+            batching: Optional MicroBatcher options (max_wait_ms, max_batch_size);
+                concurrent encode() calls are coalesced when given
+            backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime)
+            onnx: OnnxEncoder options for the onnx backend (model_dir, file_name, quantize)
+            threads: CPU threads for inference (0 = library default)
+            server: Optional embedding server client tried before the local model
         """
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown embeddings backend: {backend}")
         self.model_name = model_name
         self.device = device
         self.cache_dir = cache_dir
+        self.cache = cache
+        self.backend = backend
+        self.onnx = onnx or {}
+        self.threads = threads
+        self.server = server
         self._model = None
         self._dimension: Optional[int] = None
+        self._load_lock = threading.Lock()
+        self.batcher = MicroBatcher(self._encode_raw, **batching) if batching is not None else None
+
+        # Metrics
+        self.load_seconds: Optional[float] = None
+        self.encode_calls = 0
+        self.encode_texts = 0
+        self.encode_seconds = 0.0
+        self.server_texts = 0
 
     def _load_model(self):
-        """Lazy load the model on first use."""
-        if self._model is not None:
-            return
+        """Lazy load the model on first use.
 
-        try:
-            from sentence_transformers import SentenceTransformer
+        Returns:
+            The loaded model (hold on to it rather than re-reading self._model,
+            which _release_model may clear concurrently)
+        """
+        model = self._model
+        if model is not None:
+            return model
+
+        with self._load_lock:
+            if self._model is not None:
+                return self._model
+
+            started = time.perf_counter()
+            try:
+                if self.backend == "onnx":
+                    model = self._load_onnx()
+                else:
+                    model = self._load_torch()
+                self._dimension = model.get_sentence_embedding_dimension()
+            except ImportError:
+                packages = "onnxruntime tokenizers" if self.backend == "onnx" else "sentence-transformers"
+                raise ImportError(
+                    f"The {self.backend} embeddings backend requires {packages}. "
+                    f"Install with: pip install {packages}"
+                )
+            except Exception as e:
+                logger.error(f"Failed to load embeddings model: {e}")
+                raise
+
+            self.load_seconds = time.perf_counter() - started
+            self._model = model
+            logger.info(
+                f"Embeddings model loaded ({self.backend}) in {self.load_seconds:.2f}s. "
+                f"Dimension: {self._dimension}"
+            )
+            return model
 
-            logger.info(f"Loading embeddings model: {self.model_name}")
+    def _release_model(self):
+        """Drop the in-process model (loaded as a fallback) once the server is back."""
+        with self._load_lock:
+            if self._model is None:
+                return
+            self._model = None
+        logger.info("Embedding server is back, released the in-process embeddings model")
 
-            self._model = SentenceTransformer(
-                self.model_name,
-                device=self.device,
-                cache_folder=str(self.cache_dir) if self.cache_dir else None,
-            )
+    def _load_torch(self):
+        from sentence_transformers import SentenceTransformer
 
-            # Get embedding dimension
-            self._dimension = self._model.get_sentence_embedding_dimension()
+        logger.info(f"Loading embeddings model: {self.model_name}")
+        if self.threads:
+            import torch
 
-            logger.info(f"Embeddings model loaded. Dimension: {self._dimension}")
+            torch.set_num_threads(self.threads)
 
-        except ImportError:
-            raise ImportError(
-                "sentence-transformers is required. "
-                "Install with: pip install sentence-transformers"
-            )
+        return SentenceTransformer(
+            self.model_name,
+            device=self.device,
+            cache_folder=str(self.cache_dir) if self.cache_dir else None,
+        )
+
+    def _load_onnx(self) -> OnnxEncoder:
+        model_dir = self.onnx.get("model_dir") or self.model_name
+        logger.info(f"Loading ONNX embeddings model from {model_dir}")
+        return OnnxEncoder(
+            Path(model_dir),
+            file_name=self.onnx.get("file_name", "model.onnx"),
+            quantize=self.onnx.get("quantize", False),
+            threads=self.threads,
+        )
+
+    def warm_up(self):
+        """Load the model and run one forward pass, so the first real query is fast.
+
+        With a server client nothing is loaded locally: this waits up to the
+        client timeout for the server to come up (it may still be starting)
+        and otherwise leaves loading to the first encode() that needs it.
+
+        Failures are logged, not raised (meant for a background thread at startup).
+        """
+        try:
+            if self.server is not None:
+                if self.server.wait_available(self.server.timeout):
+                    logger.info(f"Using embedding server at {self.server.socket_path}, skipping local warm-up")
+                else:
+                    logger.warning(
+                        f"Embedding server at {self.server.socket_path} not available, "
+                        f"skipping warm-up (the model loads on first use if still needed)"
+                    )
+                return
+            started = time.perf_counter()
+            self._load_model()
+            self._forward(["warm up"])
+            logger.info(f"Embeddings model warmed up in {time.perf_counter() - started:.2f}s")
         except Exception as e:
-            logger.error(f"Failed to load embeddings model: {e}")
-            raise
+            logger.warning(f"Embeddings warm-up failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Get load and encode metrics of this process (server_texts were encoded remotely)."""
+        return {
+            "backend": self.backend,
+            "loaded": self._model is not None,
+            "load_seconds": self.load_seconds,
+            "encode_calls": self.encode_calls,
+            "encode_texts": self.encode_texts,
+            "encode_seconds": self.encode_seconds,
+            "ms_per_text": 1000 * self.encode_seconds / self.encode_texts if self.encode_texts else 0.0,
+            "server_texts": self.server_texts,
+        }
+
+    @property
+    def cache_key(self) -> str:
+        """Model key of cached vectors: backends and quantization produce different vectors."""
+        quantize = self.backend == "onnx" and self.onnx.get("quantize", False)
+        return f"{self.model_name}|{self.backend}|q{int(quantize)}"
 
     @property
     def dimension(self) -> int:
         """Get the embedding dimension."""
+        if self._model is None and self.server is not None:
+            dimension = self.server.dimension()
+            if dimension:
+                return dimension
         self._load_model()
         return self._dimension or 384  # Default for MiniLM
 
@@ -88,6 +704,13 @@ class EmbeddingsModel:
     ) -> np.ndarray:
         """Encode texts to embeddings.
 
+        With a cache, only texts not seen before (by normalized content) are
+        run through the model; if every text is cached the model isn't loaded.
+        With batching, the texts are encoded by the batcher's worker together
+        with concurrent calls from other threads. With a server client the
+        texts are sent to the embedding server first (the local model is only
+        loaded if the server is unavailable, and released once it answers again).
+
         Args:
             texts: Single text or list of texts to encode
             normalize: Whether to L2-normalize embeddings
@@ -96,20 +719,60 @@ class EmbeddingsModel:
         Returns:
             numpy array of shape (n_texts, dimension)
         """
-        self._load_model()
-
         # Ensure texts is a list
         if isinstance(texts, str):
             texts = [texts]
 
-        embeddings = self._model.encode(
+        embeddings = self.server.encode(texts) if self.server is not None and texts else None
+        if embeddings is not None:
+            self.server_texts += len(texts)
+            if self._model is not None:
+                self._release_model()
+        elif self.batcher is not None and texts and not show_progress:
+            embeddings = self.batcher.encode(texts)
+        else:
+            embeddings = self._encode_raw(texts, show_progress=show_progress)
+
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings
+
+    def _encode_raw(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
+        """Encode texts to un-normalized float32 vectors, via the cache if any."""
+        if self.cache is None or not texts:
+            return self._forward(texts, show_progress=show_progress)
+
+        keys = [EmbeddingCache.text_key(text) for text in texts]
+        vectors = self.cache.get_many(self.cache_key, keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            computed = self._forward(list(missing.values()), show_progress=show_progress)
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(self.cache_key, new_vectors)
+            vectors.update(new_vectors)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def _forward(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
+        """Run the model on texts (un-normalized float32) and record encode metrics."""
+        model = self._load_model()
+        started = time.perf_counter()
+        vectors = model.encode(
             texts,
-            normalize_embeddings=normalize,
+            normalize_embeddings=False,
             show_progress_bar=show_progress,
             convert_to_numpy=True,
-        )
-
-        return embeddings
+        ).astype(np.float32, copy=False)
+        self.encode_seconds += time.perf_counter() - started
+        self.encode_calls += 1
+        self.encode_texts += len(texts)
+        return vectors
 
     def encode_query(self, query: str, normalize: bool = True) -> np.ndarray:
         """Encode a query for similarity search.
@@ -179,127 +842,219 @@ class EmbeddingsModel:
 # Text Chunking Utilities
 # =============================================================================
 
+# Lines are read in pieces of at most this many bytes, so a document without
+# newlines (e.g. a minified web page) is still streamed with bounded memory
+_MAX_LINE_BYTES = 64 * 1024
 
-def chunk_text(
-    text: str, chunk_size: int = 1000, chunk_overlap: int = 200, separator: str = "\n\n"
-) -> List[str]:
-    """Split text into overlapping chunks.
-
-    Args:
-        text: Text to split
-        chunk_size: Target chunk size in characters
-        chunk_overlap: Overlap between chunks
-        separator: Preferred split point
-
-    Returns:
-        List of text chunks
-    """
-    if len(text) <= chunk_size:
-        return [text]
+_HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+_FENCE_RE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
 
-    chunks = []
 
-    # Try to split on separator first
-    segments = text.split(separator)
+def count_tokens(text: str) -> int:
+    """Estimate tokens as words plus punctuation marks (wordpiece models use somewhat more)."""
+    return len(_TOKEN_RE.findall(text))
 
-    current_chunk = ""
 
-    for segment in segments:
-        # If adding this segment exceeds chunk size
-        if len(current_chunk) + len(segment) + len(separator) > chunk_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                # Keep overlap from end of current chunk
-                if chunk_overlap > 0:
-                    overlap_start = max(0, len(current_chunk) - chunk_overlap)
-                    current_chunk = current_chunk[overlap_start:]
-                else:
-                    current_chunk = ""
-
-        current_chunk += segment + separator
-
-    # Add final chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-
-    # If chunks are still too large, split by sentences
-    final_chunks = []
-    for chunk in chunks:
-        if len(chunk) > chunk_size * 1.5:
-            # Split on sentence boundaries
-            sentences = chunk.replace(". ", ".\n").split("\n")
-            sub_chunk = ""
-            for sentence in sentences:
-                if len(sub_chunk) + len(sentence) > chunk_size:
-                    if sub_chunk:
-                        final_chunks.append(sub_chunk.strip())
-                    sub_chunk = sentence
-                else:
-                    sub_chunk += " " + sentence
-            if sub_chunk:
-                final_chunks.append(sub_chunk.strip())
-        else:
-            final_chunks.append(chunk)
+@dataclass
+class Chunk:
+    """A span of a source document.
 
-    return final_chunks
+    `start`/`end` are UTF-8 byte offsets into the source and `text` is
+    exactly the decoded bytes of that span; `headings` is the markdown
+    heading path ((level, title), ...) the span is under.
+    """
+    text: str
+    start: int
+    end: int
+    headings: Tuple[Tuple[int, str], ...]
+    tokens: int
 
+    @property
+    def heading_path(self) -> str:
+        """Headings joined as "Title > Section > Subsection"."""
+        return " > ".join(title for _, title in self.headings)
 
-def chunk_markdown(
-    text: str, chunk_size: int = 1000, chunk_overlap: int = 200
-) -> List[dict]:
-    """Chunk markdown text preserving headers as metadata.
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Headings as {"h1": ..., "h2": ...} plus the byte span."""
+        metadata: Dict[str, Any] = {f"h{level}": title for level, title in self.headings}
+        metadata.update(start=self.start, end=self.end)
+        return metadata
+
+
+def _missing_utf8_bytes(raw: bytes) -> int:
+    """Bytes still needed to complete a multi-byte character cut at the end of raw."""
+    for back in range(1, min(4, len(raw)) + 1):
+        byte = raw[-back]
+        if byte & 0xC0 != 0x80:  # not a continuation byte
+            needed = 4 if byte >= 0xF0 else 3 if byte >= 0xE0 else 2 if byte >= 0xC0 else 1
+            return max(needed - back, 0)
+    return 0
+
+
+def _read_lines(stream: Union[BinaryIO, TextIO]) -> Iterator[Tuple[str, int]]:
+    """Yield (text, byte length) per line, or per _MAX_LINE_BYTES piece of a long line."""
+    if isinstance(stream, io.TextIOBase):
+        while True:
+            line = stream.readline(_MAX_LINE_BYTES)
+            if not line:
+                return
+            yield line, len(line.encode("utf-8"))
+
+    while True:
+        raw = stream.readline(_MAX_LINE_BYTES)
+        if not raw:
+            return
+        if not raw.endswith(b"\n"):
+            missing = _missing_utf8_bytes(raw)
+            if missing:
+                raw += stream.read(missing)
+        yield raw.decode("utf-8", errors="replace"), len(raw)
+
+
+def _split_long(text: str, start: int, max_tokens: int, count: Callable[[str], int]) -> Iterator[Tuple[str, int, int, int]]:
+    """Split an over-long line into contiguous pieces: sentences first, then token windows."""
+    pieces, position = [], 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        pieces.append(text[position:match.end()])
+        position = match.end()
+    pieces.append(text[position:])
+
+    for piece in pieces:
+        if not piece:
+            continue
+        tokens = count(piece)
+        if tokens > max_tokens:
+            boundaries = [match.start() for match in _TOKEN_RE.finditer(piece)][max_tokens::max_tokens]
+            cuts = [0, *boundaries, len(piece)]
+            for left, right in zip(cuts, cuts[1:]):
+                part = piece[left:right]
+                size = len(part.encode("utf-8"))
+                yield part, start, start + size, count(part)
+                start += size
+        else:
+            size = len(piece.encode("utf-8"))
+            yield piece, start, start + size, tokens
+            start += size
+
+
+def iter_chunks(
+    source: Union[str, bytes, Path, BinaryIO, TextIO],
+    max_tokens: int = 200,
+    overlap_tokens: int = 40,
+    markdown: bool = True,
+    token_counter: Callable[[str], int] = count_tokens,
+) -> Iterator[Chunk]:
+    """Stream a document into chunks of at most max_tokens tokens.
+
+    The source is read line by line, so memory stays bounded by the chunk
+    size. Chunks are packed from whole lines; a line longer than
+    max_tokens is split at sentence ends, then into token windows.
+    Consecutive chunks of a section share up to overlap_tokens tokens of
+    trailing lines. With markdown, heading lines (outside code fences) end
+    the current chunk, are not part of any chunk, and set the heading path
+    of the chunks that follow.
 
     Args:
-        text: Markdown text
-        chunk_size: Target chunk size
-        chunk_overlap: Overlap between chunks
+        source: Text, UTF-8 bytes, a file Path, or an open binary/text stream
+            (byte offsets of text streams assume UTF-8 and untranslated newlines)
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens of trailing lines repeated at the start of the next chunk
+        markdown: Track headings and code fences
+        token_counter: Function estimating the tokens of a string
+
+    Yields:
+        Chunk with exact text, byte offsets, heading path and token count
+    """
+    if isinstance(source, str):
+        source = io.BytesIO(source.encode("utf-8"))
+    elif isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif isinstance(source, os.PathLike):
+        with open(source, "rb") as stream:
+            yield from iter_chunks(stream, max_tokens, overlap_tokens, markdown, token_counter)
+        return
+
+    headings: List[Tuple[int, str]] = []
+    units: List[Tuple[str, int, int, int]] = []  # (text, start, end, tokens), contiguous
+    tokens = 0
+    in_fence = False
+    offset = 0
+
+    def emit() -> Iterator[Chunk]:
+        # Drop blank units at both ends; the rest is one contiguous span
+        first, last = 0, len(units)
+        while first < last and not units[first][0].strip():
+            first += 1
+        while last > first and not units[last - 1][0].strip():
+            last -= 1
+        if first == last:
+            return
+        text = "".join(unit[0] for unit in units[first:last])
+        stripped = text.rstrip()
+        yield Chunk(
+            text=stripped,
+            start=units[first][1],
+            end=units[last - 1][2] - len(text[len(stripped):].encode("utf-8")),
+            headings=tuple(headings),
+            tokens=sum(unit[3] for unit in units[first:last]),
+        )
+
+    for line, size in _read_lines(source):
+        start, offset = offset, offset + size
+
+        if markdown:
+            if _FENCE_RE.match(line):
+                in_fence = not in_fence
+            elif not in_fence:
+                heading = _HEADING_RE.match(line.rstrip("\r\n"))
+                if heading:
+                    yield from emit()
+                    units, tokens = [], 0
+                    level = len(heading.group(1))
+                    headings = [(lvl, title) for lvl, title in headings if lvl < level]
+                    headings.append((level, heading.group(2)))
+                    continue
+
+        line_tokens = token_counter(line)
+        pieces = ([(line, start, offset, line_tokens)] if line_tokens <= max_tokens
+                  else _split_long(line, start, max_tokens, token_counter))
+
+        for unit in pieces:
+            if units and tokens + unit[3] > max_tokens:
+                yield from emit()
+                # Keep whole trailing units within the overlap budget
+                kept, kept_tokens = [], 0
+                for previous in reversed(units):
+                    if kept_tokens + previous[3] > overlap_tokens or kept_tokens + previous[3] + unit[3] > max_tokens:
+                        break
+                    kept.insert(0, previous)
+                    kept_tokens += previous[3]
+                units, tokens = kept, kept_tokens
+            units.append(unit)
+            tokens += unit[3]
+
+    yield from emit()
+
+
+def chunk_text(text: str, max_tokens: int = 200, overlap_tokens: int = 40) -> List[str]:
+    """Split plain text into overlapping chunks (see iter_chunks).
 
     Returns:
-        List of dicts with 'text' and 'metadata' keys
+        List of chunk texts
     """
-    import re
-
-    # Split on headers
-    header_pattern = r"^(#{1,6})\s+(.+)$"
-
-    chunks = []
-    current_headers = {}
-    current_content = []
-
-    for line in text.split("\n"):
-        header_match = re.match(header_pattern, line)
-
-        if header_match:
-            # Save current content if any
-            if current_content:
-                content_text = "\n".join(current_content).strip()
-                if content_text:
-                    for chunk in chunk_text(content_text, chunk_size, chunk_overlap):
-                        chunks.append(
-                            {"text": chunk, "metadata": current_headers.copy()}
-                        )
-                current_content = []
-
-            # Update headers
-            level = len(header_match.group(1))
-            header_text = header_match.group(2)
-
-            # Clear lower-level headers
-            current_headers = {
-                k: v for k, v in current_headers.items() if int(k[1:]) < level
-            }
-            current_headers[f"h{level}"] = header_text
-        else:
-            current_content.append(line)
+    return [chunk.text for chunk in iter_chunks(text, max_tokens, overlap_tokens, markdown=False)]
+
 
-    # Don't forget final content
-    if current_content:
-        content_text = "\n".join(current_content).strip()
-        if content_text:
-            for chunk in chunk_text(content_text, chunk_size, chunk_overlap):
-                chunks.append({"text": chunk, "metadata": current_headers.copy()})
+def chunk_markdown(text: str, max_tokens: int = 200, overlap_tokens: int = 40) -> List[dict]:
+    """Chunk markdown text keeping the heading path and byte span as metadata.
 
-    return chunks
+    Returns:
+        List of dicts with 'text' and 'metadata' ({"h1": ..., "start": ..., "end": ...}) keys
+    """
+    return [{"text": chunk.text, "metadata": chunk.metadata} for chunk in iter_chunks(text, max_tokens, overlap_tokens)]
 
 
 # =============================================================================
@@ -310,6 +1065,54 @@ _embeddings: Optional[EmbeddingsModel] = None
 _embeddings_lock = threading.Lock()
 
 
+def create_embeddings(use_server: bool = True) -> EmbeddingsModel:
+    """Build an EmbeddingsModel from settings.EMBEDDINGS.
+
+    Args:
+        use_server: Attach an embedding server client if the server is enabled
+            (False for the server itself)
+
+    Returns:
+        EmbeddingsModel instance
+    """
+    config = settings.EMBEDDINGS
+    model_name = config["model_name"]
+    device = config["device"]
+
+    cache = None
+    if config["cache"]["enabled"]:
+        cache = EmbeddingCache(
+            max_entries=config["cache"]["max_entries"],
+            evict_batch=config["cache"]["evict_batch"],
+        )
+
+    batching = None
+    if config["batching"]["enabled"]:
+        batching = {
+            "max_wait_ms": config["batching"]["max_wait_ms"],
+            "max_batch_size": config["batching"]["max_batch_size"],
+        }
+
+    server = None
+    if use_server and config["server"]["enabled"]:
+        server = EmbeddingClient(config["server"]["socket"], timeout=config["server"]["timeout"])
+
+    model = EmbeddingsModel(
+        model_name=model_name,
+        device=device,
+        cache=cache,
+        batching=batching,
+        backend=config["backend"],
+        onnx=config["onnx"],
+        threads=config["threads"],
+        server=server,
+    )
+    logger.info(
+        f"EmbeddingsModel initialized: {model_name} ({config['backend']}) on {device}"
+    )
+    return model
+
+
 def get_embeddings() -> EmbeddingsModel:
     """Get the global embeddings model instance (thread-safe).
 
@@ -322,16 +1125,6 @@ def get_embeddings() -> EmbeddingsModel:
         with _embeddings_lock:
             # Double-check pattern for thread safety
             if _embeddings is None:
-                # Use default embeddings settings
-                model_name = "sentence-transformers/all-MiniLM-L6-v2"
-                device = "cpu"
-                
-                _embeddings = EmbeddingsModel(
-                    model_name=model_name,
-                    device=device,
-                )
-                logger.info(
-                    f"EmbeddingsModel initialized: {model_name} on {device}"
-                )
+                _embeddings = create_embeddings()
 
     return _embeddings
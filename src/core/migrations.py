@@ -0,0 +1,653 @@
+"""
+Schema Migrations
+
+Versioned schema changes for the central database, tracked with
+`PRAGMA user_version`.
+
+Each migration runs in its own `BEGIN IMMEDIATE` transaction together with
+the version bump, so a failed migration leaves the previous version in
+place and concurrent processes (bot, awareness daemon, CLI) never apply
+the same step twice. Databases created before versioning report version 0;
+the baseline migration only uses `IF NOT EXISTS` DDL so it adopts them
+as-is.
+
+Adding a migration:
+
+    @migration(3, "Add foo index")
+    def _003_foo_index(conn):
+        conn.execute(text("CREATE INDEX ..."))
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.core.utils import to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Migration:
+    """One schema step: apply(conn) brings the database to `version`."""
+    version: int
+    description: str
+    apply: Callable
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration function for a schema version."""
+    def decorator(func: Callable) -> Callable:
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+def get_version(conn) -> int:
+    """Read the schema version (PRAGMA user_version) of a connection."""
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def latest_version() -> int:
+    """Schema version the code expects."""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def migrate(conn) -> List[int]:
+    """Apply every pending migration in order.
+    
+    Args:
+        conn: SQLAlchemy connection (not inside a transaction)
+        
+    Returns:
+        Versions applied by this call
+    """
+    applied = []
+    for step in MIGRATIONS:
+        if step.version <= get_version(conn):
+            continue
+        
+        start = time.perf_counter()
+        conn.execute(text("BEGIN IMMEDIATE"))
+        try:
+            # Another process may have migrated while we waited for the lock
+            if step.version <= get_version(conn):
+                conn.rollback()
+                continue
+            step.apply(conn)
+            conn.execute(text(f"PRAGMA user_version = {step.version}"))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {step.version} ({step.description}) failed")
+            raise
+        
+        applied.append(step.version)
+        logger.info(
+            f"Applied migration {step.version}: {step.description} "
+            f"({(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
+    return applied
+
+
+def ensure_columns(conn, table: str, columns: Dict[str, str]):
+    """Add columns missing from a table created by an older schema."""
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    for name, column_type in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+            logger.info(f"Added column {table}.{name}")
+
+
+def backfill_epoch_ms(
+    conn,
+    table: str,
+    columns: Dict[str, str],
+    naive_tz=None,
+    batch_size: int = 5000
+) -> int:
+    """Fill integer epoch-ms columns from ISO-8601 text columns.
+    
+    Args:
+        conn: Connection inside the migration transaction
+        table: Table name
+        columns: {source text column: target *_ms column}
+        naive_tz: Timezone assumed for values without an offset (default settings.TIMEZONE)
+        batch_size: Rows per UPDATE batch
+        
+    Returns:
+        Number of rows updated
+    """
+    sources = ", ".join(columns)
+    assignments = ", ".join(f"{target} = :{target}" for target in columns.values())
+    last_rowid, updated = 0, 0
+    
+    while True:
+        rows = conn.execute(
+            text(f"SELECT rowid, {sources} FROM {table} WHERE rowid > :last ORDER BY rowid LIMIT :n"),
+            {'last': last_rowid, 'n': batch_size}
+        ).fetchall()
+        if not rows:
+            return updated
+        
+        params = []
+        for row in rows:
+            values = {'rowid': row[0]}
+            for value, target in zip(row[1:], columns.values()):
+                values[target] = _parse_ms(value, naive_tz)
+            params.append(values)
+        conn.execute(text(f"UPDATE {table} SET {assignments} WHERE rowid = :rowid"), params)
+        
+        last_rowid = rows[-1][0]
+        updated += len(rows)
+
+
+def _parse_ms(value: Optional[str], naive_tz) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return to_epoch_ms(value, naive_tz)
+    except ValueError:
+        logger.warning(f"Unparseable timestamp left empty during backfill: {value!r}")
+        return None
+
+
+# =============================================================================
+# Migrations
+# =============================================================================
+
+@migration(1, "Baseline schema")
+def _001_baseline_schema(conn):
+    # Conversation history table
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    
+    # Index for faster queries
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_conversation_history_lookup 
+        ON conversation_history(conversation_id, timestamp DESC)
+    """))
+    
+    # Facts/knowledge table
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS facts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            content TEXT NOT NULL,
+            confidence REAL DEFAULT 1.0,
+            source TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tags TEXT,
+            metadata TEXT
+        )
+    """))
+    
+    # Index for facts
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_facts_category 
+        ON facts(category, subject)
+    """))
+    
+    # Insights/awareness tables
+    # Snapshots: Point-in-time data captures
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id TEXT PRIMARY KEY,
+            collector TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            data TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            content_hash TEXT,
+            valid_until TEXT
+        )
+    """))
+    ensure_columns(conn, 'snapshots', {
+        'content_hash': 'TEXT',
+        'valid_until': 'TEXT',
+    })
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_snapshots_collector ON snapshots(collector)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots(timestamp)
+    """))
+    
+    # Snapshot repeats: "payload still valid at T" markers for
+    # snapshots identical to the collector's previous one
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS snapshot_repeats (
+            id TEXT PRIMARY KEY,
+            snapshot_id TEXT NOT NULL,
+            collector TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_snapshot_repeats_collector
+        ON snapshot_repeats(collector, timestamp)
+    """))
+    
+    # Snapshot rollups: hourly/daily numeric aggregates of snapshots
+    for resolution in ('hourly', 'daily'):
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS snapshot_rollups_{resolution} (
+                collector TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                field TEXT NOT NULL,
+                min REAL,
+                max REAL,
+                mean REAL,
+                last REAL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (collector, bucket, field)
+            ) WITHOUT ROWID
+        """))
+    
+    # Metrics: declared numeric snapshot fields, extracted at ingest
+    # (ts is epoch milliseconds)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            collector TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            entity TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL NOT NULL
+        )
+    """))
+    # Covering index: series reads never touch the table
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_metrics_series
+        ON metrics(collector, metric, ts, entity, value)
+    """))
+    
+    # Insights: Generated observations/alerts
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS insights (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            confidence REAL DEFAULT 1.0,
+            data TEXT,
+            source_analyzer TEXT,
+            dedupe_key TEXT,
+            created_at TEXT NOT NULL,
+            expires_at TEXT,
+            delivered INTEGER DEFAULT 0
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_insights_created ON insights(created_at)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_insights_dedupe ON insights(dedupe_key)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_insights_delivered ON insights(delivered)
+    """))
+    
+    # Deliveries: Record of sent notifications
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS deliveries (
+            id TEXT PRIMARY KEY,
+            insight_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            delivered_at TEXT NOT NULL,
+            success INTEGER DEFAULT 1,
+            error TEXT
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_deliveries_insight ON deliveries(insight_id)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_deliveries_date ON deliveries(delivered_at)
+    """))
+    
+    # Budget: Daily reach-out tracking
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS reach_out_budget (
+            date TEXT PRIMARY KEY,
+            count INTEGER DEFAULT 0,
+            max_per_day INTEGER DEFAULT 5,
+            deliveries TEXT DEFAULT '[]'
+        )
+    """))
+    
+    # Journal threads: Daily journal thread messages
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS journal_threads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT UNIQUE NOT NULL,
+            message_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_journal_threads_date ON journal_threads(date)
+    """))
+    
+    # Journal entries: User journal entries from Telegram
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            entry_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            thread_message_id INTEGER
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_date ON journal_entries(date)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_timestamp ON journal_entries(timestamp)
+    """))
+
+
+@migration(2, "Composite covering indexes for hot queries")
+def _002_covering_indexes(conn):
+    # get_snapshots / latest payload lookup: filter on collector, order by timestamp
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_snapshots_collector_timestamp
+        ON snapshots(collector, timestamp, id, content_hash)
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS idx_snapshots_collector"))
+    
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_snapshot_repeats_lookup
+        ON snapshot_repeats(collector, timestamp, snapshot_id)
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS idx_snapshot_repeats_collector"))
+    
+    # check_duplicate: COUNT(*) WHERE dedupe_key = ? AND created_at >= ?
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_insights_dedupe_created
+        ON insights(dedupe_key, created_at)
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS idx_insights_dedupe"))
+    
+    # get_pending_insights: WHERE delivered = 0 ORDER BY created_at DESC
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_insights_pending
+        ON insights(delivered, created_at)
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS idx_insights_delivered"))
+    
+    # get_active_sessions: WHERE timestamp > ? (DISTINCT conversation_id)
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_conversation_history_recent
+        ON conversation_history(timestamp, conversation_id)
+    """))
+    
+    # Refresh planner statistics so the new indexes are picked up
+    conn.execute(text("ANALYZE"))
+
+
+@migration(3, "Integer epoch-ms timestamp columns")
+def _003_epoch_ms_columns(conn):
+    # Awareness tables mix naive local and BRT-aware ISO strings, conversation
+    # history is naive UTC; *_ms columns give one monotonic, indexable value.
+    ensure_columns(conn, 'snapshots', {'ts_ms': 'INTEGER', 'valid_until_ms': 'INTEGER'})
+    ensure_columns(conn, 'snapshot_repeats', {'ts_ms': 'INTEGER'})
+    ensure_columns(conn, 'insights', {'created_at_ms': 'INTEGER'})
+    ensure_columns(conn, 'deliveries', {'delivered_at_ms': 'INTEGER'})
+    ensure_columns(conn, 'conversation_history', {'ts_ms': 'INTEGER'})
+    
+    backfill_epoch_ms(conn, 'snapshots', {'timestamp': 'ts_ms', 'valid_until': 'valid_until_ms'})
+    backfill_epoch_ms(conn, 'snapshot_repeats', {'timestamp': 'ts_ms'})
+    backfill_epoch_ms(conn, 'insights', {'created_at': 'created_at_ms'})
+    backfill_epoch_ms(conn, 'deliveries', {'delivered_at': 'delivered_at_ms'})
+    backfill_epoch_ms(conn, 'conversation_history', {'timestamp': 'ts_ms'}, naive_tz=timezone.utc)
+    
+    # Replace the text-timestamp indexes with epoch-ms equivalents
+    for old_index in (
+        'idx_snapshots_collector_timestamp', 'idx_snapshots_timestamp',
+        'idx_snapshot_repeats_lookup', 'idx_insights_created',
+        'idx_insights_dedupe_created', 'idx_insights_pending',
+        'idx_deliveries_date', 'idx_conversation_history_lookup',
+        'idx_conversation_history_recent',
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {old_index}"))
+    
+    for name, definition in (
+        ('idx_snapshots_collector_ts', 'snapshots(collector, ts_ms, id, content_hash)'),
+        ('idx_snapshots_ts', 'snapshots(ts_ms)'),
+        ('idx_snapshot_repeats_lookup_ts', 'snapshot_repeats(collector, ts_ms, snapshot_id)'),
+        ('idx_insights_created_ts', 'insights(created_at_ms)'),
+        ('idx_insights_dedupe_ts', 'insights(dedupe_key, created_at_ms)'),
+        ('idx_insights_pending_ts', 'insights(delivered, created_at_ms)'),
+        ('idx_deliveries_ts', 'deliveries(delivered_at_ms)'),
+        ('idx_conversation_history_session_ts', 'conversation_history(conversation_id, ts_ms)'),
+        ('idx_conversation_history_recent_ts', 'conversation_history(ts_ms, conversation_id)'),
+    ):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+    
+    conn.execute(text("ANALYZE"))
+
+
+@migration(4, "Normalized reach-out budget ledger")
+def _004_budget_events(conn):
+    # One row per reach-out; the daily count is COUNT(*) over (date)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS budget_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            insight_id TEXT,
+            created_at_ms INTEGER NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_budget_events_date ON budget_events(date)
+    """))
+    
+    # Carry over reach_out_budget rows (count + JSON list of insight ids)
+    events = []
+    for date, count, deliveries in conn.execute(
+        text("SELECT date, count, deliveries FROM reach_out_budget")
+    ).fetchall():
+        insight_ids = json.loads(deliveries) if deliveries else []
+        insight_ids += [None] * max(int(count or 0) - len(insight_ids), 0)
+        created_at_ms = to_epoch_ms(f"{date}T00:00:00")
+        events += [
+            {'date': date, 'insight_id': insight_id, 'created_at_ms': created_at_ms}
+            for insight_id in insight_ids
+        ]
+    if events:
+        conn.execute(text("""
+            INSERT INTO budget_events (date, insight_id, created_at_ms)
+            VALUES (:date, :insight_id, :created_at_ms)
+        """), events)
+
+
+@migration(5, "Rolling conversation summaries")
+def _005_conversation_summaries(conn):
+    # One row per session: summary of its first folded_count messages
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            conversation_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            folded_count INTEGER NOT NULL,
+            tokens INTEGER NOT NULL,
+            updated_at_ms INTEGER NOT NULL
+        )
+    """))
+
+
+@migration(6, "Serialized conversation turns")
+def _006_conversation_turns(conn):
+    # One row per turn with the full pydantic-ai messages as JSON bytes;
+    # conversation_history keeps the text rows for search
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS conversation_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL,
+            ts_ms INTEGER NOT NULL,
+            start_index INTEGER NOT NULL,
+            message_count INTEGER NOT NULL,
+            payload BLOB NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_conversation_turns_session
+        ON conversation_turns(conversation_id, id)
+    """))
+
+
+@migration(7, "Full-text index over conversation history")
+def _007_conversation_history_fts(conn):
+    # External-content FTS5 table: stores only the index, rows stay in
+    # conversation_history and the triggers keep both in sync
+    conn.execute(text("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversation_history_fts USING fts5(
+            content,
+            content='conversation_history',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS conversation_history_fts_insert
+        AFTER INSERT ON conversation_history BEGIN
+            INSERT INTO conversation_history_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS conversation_history_fts_delete
+        AFTER DELETE ON conversation_history BEGIN
+            INSERT INTO conversation_history_fts(conversation_history_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS conversation_history_fts_update
+        AFTER UPDATE OF content ON conversation_history BEGIN
+            INSERT INTO conversation_history_fts(conversation_history_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO conversation_history_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """))
+    
+    # Backfill existing messages
+    conn.execute(text("INSERT INTO conversation_history_fts(conversation_history_fts) VALUES ('rebuild')"))
+
+
+@migration(8, "Per-session message sequence numbers")
+def _008_conversation_seq(conn):
+    # Messages of one turn share a timestamp; seq gives them a strict order
+    # and lets history pages seek on (conversation_id, seq)
+    ensure_columns(conn, "conversation_history", {"seq": "INTEGER"})
+    conn.execute(text("""
+        UPDATE conversation_history SET seq = numbered.seq
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY conversation_id ORDER BY ts_ms, id
+            ) AS seq
+            FROM conversation_history
+        ) AS numbered
+        WHERE conversation_history.id = numbered.id
+    """))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_conversation_history_session_seq
+        ON conversation_history(conversation_id, seq)
+    """))
+    
+    # Writers don't pass seq: number each new row after the session's last one
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS conversation_history_seq
+        AFTER INSERT ON conversation_history
+        WHEN new.seq IS NULL BEGIN
+            UPDATE conversation_history
+            SET seq = (
+                SELECT COALESCE(MAX(seq), 0) + 1 FROM conversation_history
+                WHERE conversation_id = new.conversation_id
+            )
+            WHERE id = new.id;
+        END
+    """))
+    
+    # Turns are paged by their first message index (the seq of ModelMessages)
+    conn.execute(text("DROP INDEX IF EXISTS idx_conversation_turns_session"))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_conversation_turns_session_start
+        ON conversation_turns(conversation_id, start_index)
+    """))
+
+
+@migration(9, "Per-session summary table")
+def _009_sessions(conn):
+    # Maintained by ConversationManager on every write so session listings
+    # never aggregate conversation_history
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            conversation_id TEXT PRIMARY KEY,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            turn_count INTEGER NOT NULL DEFAULT 0,
+            token_count INTEGER NOT NULL DEFAULT 0,
+            first_timestamp TEXT,
+            first_ts_ms INTEGER,
+            last_timestamp TEXT,
+            last_ts_ms INTEGER
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_last_ts ON sessions(last_ts_ms)
+    """))
+    
+    # Backfill from existing messages (tokens estimated at 4 characters each,
+    # plus 4 framing tokens per message, as ConversationManager does)
+    conn.execute(text("""
+        INSERT OR IGNORE INTO sessions (
+            conversation_id, message_count, turn_count, token_count,
+            first_timestamp, first_ts_ms, last_timestamp, last_ts_ms
+        )
+        SELECT h.conversation_id, COUNT(*),
+               COALESCE((SELECT COUNT(*) FROM conversation_turns t
+                         WHERE t.conversation_id = h.conversation_id), 0),
+               SUM(LENGTH(h.content)) / 4 + 4 * COUNT(*),
+               MIN(h.timestamp), MIN(h.ts_ms), MAX(h.timestamp), MAX(h.ts_ms)
+        FROM conversation_history h
+        GROUP BY h.conversation_id
+    """))
+
+
+@migration(10, "Embedding cache")
+def _010_embedding_cache(conn):
+    # Content-addressed: one float32 vector per (model, normalized text hash)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            last_used_ms INTEGER NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        ) WITHOUT ROWID
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used
+        ON embedding_cache(last_used_ms)
+    """))
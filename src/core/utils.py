@@ -2,6 +2,11 @@
 Core utility functions for Friday.
 """
 
+from datetime import datetime, tzinfo
+from typing import Optional, Union
+
+from settings import settings
+
 
 def format_duration(seconds: int) -> str:
     """Format seconds into human-readable duration.
@@ -44,3 +49,31 @@ def format_pace(seconds_per_km: float) -> str:
     seconds = int(seconds_per_km % 60)
     
     return f"{minutes}:{seconds:02d} min/km"
+
+
+def to_epoch_ms(value: Union[datetime, str], naive_tz: Optional[tzinfo] = None) -> int:
+    """Convert a datetime or ISO-8601 string to integer epoch milliseconds.
+    
+    Used for the *_ms timestamp columns, which sort and range-scan
+    correctly regardless of the offset the original value was written with.
+    
+    Args:
+        value: Datetime or ISO-8601 string
+        naive_tz: Timezone assumed for values without an offset
+            (default: settings.TIMEZONE)
+        
+    Returns:
+        Milliseconds since the Unix epoch
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        tz = naive_tz or settings.TIMEZONE
+        # pytz zones must localize(); replace() would pick the zone's LMT offset
+        value = tz.localize(value) if hasattr(tz, "localize") else value.replace(tzinfo=tz)
+    return int(value.timestamp() * 1000)
+
+
+def from_epoch_ms(ms: int, tz: Optional[tzinfo] = None) -> datetime:
+    """Convert epoch milliseconds to an aware datetime (default: settings.TIMEZONE)."""
+    return datetime.fromtimestamp(ms / 1000, tz or settings.TIMEZONE)
@@ -0,0 +1,504 @@
+"""
+Friday 3.0 Vector Index
+
+Brute-force cosine similarity index over one contiguous float32 matrix.
+
+Vectors are L2-normalized on insert and kept in rows [0, len) of a single
+matrix, so a search is one matrix-vector product plus `argpartition` for
+the top k. Deleting moves the last row into the freed slot to keep the
+rows contiguous.
+
+Vectors can be stored as float32, float16 (half the memory) or int8 with
+one float32 scale per vector (a quarter of the memory). Quantized rows are
+widened to float32 in small cache-resident blocks during search, so the
+scan reads the smaller matrix; int8 scans faster than float32, float16
+only saves memory (NumPy converts half floats slowly). With rerank=True a float32 copy is kept alongside and the
+top k * RERANK_FACTOR quantized candidates are re-scored exactly; with a
+path that copy is a memory-mapped file of which only candidate rows are
+paged in.
+
+With a path each array is a `.npy` file and ids plus metadata live in a
+`.json` sidecar. Several processes (bot, awareness daemon, CLI) may share
+one index, so files are never written in place: they are mapped
+copy-on-write, changes stay private to the process until save(), and
+save() writes a new generation of array files (tmp file + os.replace)
+before the sidecar that names it, all under an fcntl lock on a `.lock`
+file. The sidecar is the commit point, rows past its count are ignored.
+refresh() reloads the index when another process saved a newer
+generation; callers that read-modify-save hold locked() around it. The
+index is derived data: callers rebuild it from their source of truth if
+it is missing or stale (an index stored with another dimension or dtype
+is discarded).
+
+Usage:
+    from src.core.vector_index import VectorIndex
+
+    index = VectorIndex.open(Path("data/vectors/facts"), dimension=384, dtype="int8", rerank=True)
+    with index.locked():
+        index.refresh()
+        index.add(["favorite_color"], vectors)
+        index.save()
+    index.search(query_vector, k=5)   # [(id, score), ...]
+"""
+
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows widened to float32 at a time when scanning a quantized matrix (the
+# float32 block stays cache-resident)
+_SEARCH_BLOCK = 256
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize vectors row-wise as float32 (zero vectors stay zero)."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scalar-quantize rows to int8 with one scale per row.
+
+    Returns:
+        (codes, scales) with vectors ~= codes * scales[:, None]
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class VectorIndex:
+    """Normalized vectors with string ids, searchable by cosine similarity."""
+
+    # Quantized candidates re-scored in float32 per requested result
+    RERANK_FACTOR = 4
+
+    def __init__(
+        self,
+        dimension: int,
+        path: Optional[Path] = None,
+        capacity: int = _INITIAL_CAPACITY,
+        dtype: str = "float32",
+        rerank: bool = False,
+    ):
+        """Create an empty index.
+
+        Args:
+            dimension: Vector dimension
+            path: Optional base path for persistence (".g<generation>.npy",
+                ".json" and ".lock" are appended)
+            capacity: Initial number of rows to allocate
+            dtype: Storage type of the searched matrix ("float32", "float16" or "int8")
+            rerank: Keep float32 vectors to re-score quantized candidates
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown vector index dtype: {dtype} (expected one of {DTYPES})")
+        self.dimension = dimension
+        self.path = Path(path) if path else None
+        self.dtype = dtype
+        self.rerank = rerank and dtype != "float32"
+        self.metadata: Dict[str, Any] = {}
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._generation = 0
+        self._meta_stat: Optional[Tuple[int, int, int]] = None
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._allocate(max(capacity, 1))
+
+    # =========================================================================
+    # Persistence
+    # =========================================================================
+
+    @classmethod
+    def open(cls, path: Path, dimension: int, dtype: str = "float32", rerank: bool = False) -> "VectorIndex":
+        """Load a persisted index, or create an empty one at path.
+
+        Args:
+            path: Base path of the index files
+            dimension: Expected dimension
+            dtype: Expected storage type
+            rerank: Whether float32 vectors are kept for re-ranking
+
+        A stored index with another dimension, dtype or rerank setting is discarded.
+
+        Returns:
+            VectorIndex backed by path
+        """
+        index = cls(dimension, capacity=1, dtype=dtype, rerank=rerank)
+        index.path = Path(path)
+        with index.locked():
+            if not index._load():
+                index._reset()
+        return index
+
+    def _load(self) -> bool:
+        """Replace the in-memory state with the committed generation on disk.
+
+        Returns:
+            False if there is no usable index at path
+        """
+        meta_path = self._file("meta")
+        if not meta_path.exists():
+            return False
+        try:
+            stat = self._stat_meta()
+            meta = json.loads(meta_path.read_text())
+            stored = (meta["dimension"], meta.get("dtype", "float32"), meta.get("rerank", False))
+            if stored != (self.dimension, self.dtype, self.rerank):
+                logger.warning(
+                    f"Vector index {self.path} has dimension/dtype/rerank {stored}, "
+                    f"expected {(self.dimension, self.dtype, self.rerank)}"
+                )
+                return False
+
+            generation = meta["generation"]
+            specs = self._specs()
+            arrays = {name: np.load(self._file(name, generation), mmap_mode="c") for name in specs}
+            ids = list(meta["ids"])
+            if not all(array.shape[1:] == specs[name][0] and len(array) >= max(len(ids), 1)
+                       for name, array in arrays.items()):
+                raise ValueError("array shapes don't match the sidecar")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable vector index {self.path}: {e}")
+            return False
+
+        self.metadata = meta.get("metadata", {})
+        self._ids = ids
+        self._rows = {id_: row for row, id_ in enumerate(ids)}
+        self._arrays = arrays
+        self._generation = generation
+        self._meta_stat = stat
+        logger.info(f"Loaded vector index {self.path} ({len(self)} {self.dtype} vectors, generation {generation})")
+        return True
+
+    def _reset(self):
+        """Start over with an empty in-memory index."""
+        self.metadata = {}
+        self._ids = []
+        self._rows = {}
+        self._arrays = {}
+        self._allocate(_INITIAL_CAPACITY)
+
+    def _committed_generation(self) -> Optional[int]:
+        """Generation named by the sidecar on disk (None if missing or unreadable)."""
+        try:
+            return json.loads(self._file("meta").read_text()).get("generation")
+        except (OSError, ValueError):
+            return None
+
+    def _stat_meta(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._file("meta"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @contextmanager
+    def locked(self):
+        """Hold this index's thread lock and (with a path) the cross-process file lock.
+
+        Reentrant within a thread. Wrap refresh() + updates + save() in one
+        locked() block so no other process commits in between.
+        """
+        with self._lock:
+            if self.path is None:
+                yield self
+                return
+            if self._lock_depth == 0:
+                lock_path = self._file("lock")
+                lock_path.parent.mkdir(parents=True, exist_ok=True)
+                self._lock_file = open(lock_path, "a+b")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield self
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def refresh(self) -> bool:
+        """Reload the index if another process saved since this one loaded or saved.
+
+        Unsaved changes of this process are discarded when it reloads.
+
+        Returns:
+            True if the index was reloaded
+        """
+        if self.path is None:
+            return False
+        with self.locked():
+            stat = self._stat_meta()
+            if stat == self._meta_stat:
+                return False
+            if stat is not None and self._committed_generation() == self._generation:
+                self._meta_stat = stat
+                return False
+            if not self._load():
+                self._reset()
+                self._generation = 0
+                self._meta_stat = stat
+            return True
+
+    def _specs(self) -> Dict[str, Tuple[Tuple[int, ...], Any]]:
+        """Row shape and dtype of each stored array (all committed together by save())."""
+        specs = {"vectors": ((self.dimension,), np.dtype(self.dtype))}
+        if self.dtype == "int8":
+            specs["scales"] = ((), np.dtype(np.float32))
+        if self.rerank:
+            specs["full"] = ((self.dimension,), np.dtype(np.float32))
+        return specs
+
+    def _file(self, name: str, generation: Optional[int] = None) -> Path:
+        if name in ("meta", "lock"):
+            suffix = "json" if name == "meta" else "lock"
+            return self.path.with_name(f"{self.path.name}.{suffix}")
+        if name == "vectors":
+            return self.path.with_name(f"{self.path.name}.g{generation}.npy")
+        return self.path.with_name(f"{self.path.name}.g{generation}.{name}.npy")
+
+    def _remove_old_generations(self):
+        """Delete array files of generations other than the committed one (and unversioned ones)."""
+        pattern = re.compile(rf"{re.escape(self.path.name)}(?:\.g(\d+))?(?:\.\w+)?\.npy(?:\.tmp)?")
+        for file in self.path.parent.glob(f"{self.path.name}.*"):
+            match = pattern.fullmatch(file.name)
+            if match and (match.group(1) is None or int(match.group(1)) != self._generation):
+                file.unlink(missing_ok=True)
+
+    def _allocate(self, capacity: int):
+        """(Re)allocate all arrays in memory, keeping the stored rows."""
+        count = len(self._ids)
+        for name, (row_shape, dtype) in self._specs().items():
+            array = np.zeros((capacity, *row_shape), dtype=dtype)
+            old = self._arrays.get(name)
+            if old is not None:
+                array[:count] = old[:count]
+            self._arrays[name] = array
+
+    @property
+    def _matrix(self) -> np.ndarray:
+        return self._arrays["vectors"]
+
+    def save(self):
+        """Commit the index as a new generation of files.
+
+        Each array is written to a fresh file, then the sidecar naming that
+        generation replaces the old one; files of older generations are
+        removed (processes that still map them keep reading their copy).
+        """
+        if self.path is None:
+            return
+        with self.locked():
+            generation = max(self._committed_generation() or 0, self._generation) + 1
+
+            for name, array in self._arrays.items():
+                file = self._file(name, generation)
+                file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = file.with_name(file.name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, np.asarray(array))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, file)
+
+            meta_path = self._file("meta")
+            tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "dimension": self.dimension,
+                    "dtype": self.dtype,
+                    "rerank": self.rerank,
+                    "generation": generation,
+                    "ids": self._ids,
+                    "metadata": self.metadata,
+                }, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, meta_path)
+
+            self._generation = generation
+            self._meta_stat = self._stat_meta()
+            # Map the committed files so the private copies can be dropped
+            self._arrays = {name: np.load(self._file(name, generation), mmap_mode="c") for name in self._arrays}
+            self._remove_old_generations()
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Bytes per array used by the stored vectors (excluding spare capacity)."""
+        count = len(self._ids)
+        return {name: array[:count].nbytes for name, array in self._arrays.items()}
+
+    # =========================================================================
+    # Updates
+    # =========================================================================
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        """Ids in row order."""
+        return list(self._ids)
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        """Insert or replace vectors.
+
+        Args:
+            ids: One id per vector; existing ids are overwritten in place
+            vectors: Array of shape (len(ids), dimension), normalized on insert
+        """
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(f"Expected vectors of shape ({len(ids)}, {self.dimension}), got {vectors.shape}")
+
+        # Later duplicates of an id win
+        latest = {id_: position for position, id_ in enumerate(ids)}
+        vectors = vectors[list(latest.values())]
+
+        with self._lock:
+            new = sum(1 for id_ in latest if id_ not in self._rows)
+            needed = len(self._ids) + new
+            capacity = len(self._matrix)
+            if needed > capacity:
+                while capacity < needed:
+                    capacity *= 2
+                self._allocate(capacity)
+
+            rows = []
+            for id_ in latest:
+                row = self._rows.get(id_)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(id_)
+                    self._rows[id_] = row
+                rows.append(row)
+            self._write(np.asarray(rows), vectors)
+
+    def _write(self, rows: np.ndarray, vectors: np.ndarray):
+        """Store normalized float32 vectors at rows in the storage format."""
+        if self.dtype == "int8":
+            codes, scales = quantize_int8(vectors)
+            self._arrays["vectors"][rows] = codes
+            self._arrays["scales"][rows] = scales
+        else:
+            self._arrays["vectors"][rows] = vectors.astype(self.dtype)
+        if self.rerank:
+            self._arrays["full"][rows] = vectors
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Delete vectors by id (unknown ids are ignored).
+
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        with self._lock:
+            for id_ in ids:
+                row = self._rows.pop(id_, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved = self._ids[last]
+                    for array in self._arrays.values():
+                        array[row] = array[last]
+                    self._ids[row] = moved
+                    self._rows[moved] = row
+                self._ids.pop()
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Remove all vectors."""
+        with self._lock:
+            self._ids = []
+            self._rows = {}
+
+    # =========================================================================
+    # Search
+    # =========================================================================
+
+    def _scores(self, query: np.ndarray, count: int) -> np.ndarray:
+        """Similarity of the query to rows [0, count) from the stored matrix."""
+        matrix = self._matrix
+        if self.dtype == "float32":
+            return matrix[:count] @ query
+
+        scores = np.empty(count, dtype=np.float32)
+        buffer = np.empty((min(_SEARCH_BLOCK, count), self.dimension), dtype=np.float32)
+        for start in range(0, count, _SEARCH_BLOCK):
+            stop = min(start + _SEARCH_BLOCK, count)
+            block = buffer[:stop - start]
+            np.copyto(block, matrix[start:stop], casting="unsafe")
+            np.matmul(block, query, out=scores[start:stop])
+        if self.dtype == "int8":
+            scores *= self._arrays["scales"][:count]
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query: np.ndarray, k: int = 5, min_score: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Find the k most similar vectors.
+
+        Args:
+            query: Query vector of shape (dimension,)
+            k: Number of results
+            min_score: Optional minimum cosine similarity
+
+        Returns:
+            List of (id, score), best first
+        """
+        query = normalize_rows(query)[0]
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return []
+
+            scores = self._scores(query, count)
+            if self.rerank:
+                # Sorted rows read the float32 file sequentially
+                candidates = np.sort(self._top(scores, k * self.RERANK_FACTOR))
+                exact = self._arrays["full"][candidates] @ query
+                order = self._top(exact, k)
+                top, top_scores = candidates[order], exact[order]
+            else:
+                top = self._top(scores, k)
+                top_scores = scores[top]
+
+            results = []
+            for row, score in zip(top, top_scores):
+                score = float(score)
+                if min_score is not None and score < min_score:
+                    break
+                results.append((self._ids[row], score))
+            return results
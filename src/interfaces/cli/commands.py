@@ -10,6 +10,7 @@ Organized into:
 """
 
 import asyncio
+import csv
 import json
 import subprocess
 import sys
@@ -37,7 +38,7 @@ console = Console()
 cli_channel = CLIChannel()
 
 # Service definitions
-SERVICES = ["friday-vllm", "friday-telegram", "friday-awareness"]
+SERVICES = ["friday-vllm", "friday-embeddings", "friday-telegram", "friday-awareness"]
 
 
 # =============================================================================
@@ -415,21 +416,81 @@ def run(query: str = typer.Argument(..., help="Natural language query for Friday
 # Database Operations
 # =============================================================================
 
+def _print_rows(rows, format: str, title: str, page_size: int) -> int:
+    """
+    Stream result rows to stdout without materializing them.
+    
+    Args:
+        rows: Iterator of SQLAlchemy rows (e.g. Database.iter_rows)
+        format: "table" (one rich table per page), "csv", "jsonl" or "json"
+        title: Table title prefix
+        page_size: Rows per table page
+        
+    Returns:
+        Number of rows printed
+    """
+    count = 0
+    
+    if format == "csv":
+        writer = csv.writer(sys.stdout)
+        for row in rows:
+            if count == 0:
+                writer.writerow(row._fields)
+            writer.writerow(row)
+            count += 1
+        return count
+    
+    if format in ("json", "jsonl"):
+        for row in rows:
+            line = json.dumps(dict(row._mapping), default=str)
+            if format == "json":
+                line = ("[\n  " if count == 0 else ",\n  ") + line
+            sys.stdout.write(line if format == "json" else line + "\n")
+            count += 1
+        if format == "json":
+            sys.stdout.write("\n]\n" if count else "[]\n")
+        return count
+    
+    if format != "table":
+        raise ValueError(f"Unknown format: {format} (use table, csv, jsonl or json)")
+    
+    page = None
+    for row in rows:
+        if count % page_size == 0:
+            if page is not None:
+                console.print(page)
+            page = Table(title=f"{title} (page {count // page_size + 1})")
+            for col in row._fields:
+                page.add_column(col, style="cyan")
+        page.add_row(*[str(value) for value in row])
+        count += 1
+    if page is not None:
+        console.print(page)
+    return count
+
+
 @app.command()
 def db_list(
     table: str = typer.Argument(..., help="Table name (journal_entries, journal_threads, snapshots, insights, etc)"),
-    limit: int = typer.Option(50, "--limit", "-l", help="Number of rows to show"),
+    limit: int = typer.Option(50, "--limit", "-l", help="Number of rows to show (0 for all)"),
+    offset: int = typer.Option(0, "--offset", "-o", help="Number of rows to skip"),
     where: Optional[str] = typer.Option(None, "--where", "-w", help="WHERE clause (e.g., 'date=2026-01-06')"),
-    columns: Optional[str] = typer.Option(None, "--columns", "-c", help="Columns to show (comma-separated)")
+    columns: Optional[str] = typer.Option(None, "--columns", "-c", help="Columns to show (comma-separated)"),
+    format: str = typer.Option("table", "--format", "-f", help="Output format: table, csv, jsonl, json"),
+    page_size: int = typer.Option(100, "--page-size", help="Rows per table page")
 ):
     """
     List rows from any database table.
     
+    Rows are streamed from a read-only connection, so large tables can be
+    listed or exported on a live system without blocking the daemons.
+    
     Examples:
         friday db-list journal_entries --limit 10
         friday db-list journal_entries --where "date(timestamp)='2026-01-06'"
         friday db-list snapshots --columns "source,timestamp,data" --limit 5
         friday db-list insights --where "priority='high'" --limit 20
+        friday db-list snapshots --limit 0 --format jsonl > snapshots.jsonl
     """
     try:
         db = Database()
@@ -441,34 +502,18 @@ def db_list(
         if where:
             query += f" WHERE {where}"
         
-        query += f" LIMIT {limit}"
+        if limit > 0 or offset > 0:
+            query += f" LIMIT {limit if limit > 0 else -1} OFFSET {offset}"
         
-        console.print(f"[dim]Query:[/dim] {query}\n")
+        if format == "table":
+            console.print(f"[dim]Query:[/dim] {query}\n")
         
-        # Execute
-        rows = db.execute(query).fetchall()
+        count = _print_rows(db.iter_rows(query), format, table, page_size)
         
-        if not rows:
+        if count == 0 and format == "table":
             console.print("[yellow]No rows found[/yellow]")
-            return
-        
-        # Display as table
-        result_table = Table(title=f"{table} ({len(rows)} rows)")
-        
-        # Add columns - get from first row
-        if rows:
-            # Convert SQLAlchemy Row to dict
-            first_row_dict = dict(rows[0]._mapping)
-            col_names = list(first_row_dict.keys())
-            for col in col_names:
-                result_table.add_column(col, style="cyan")
-            
-            # Add rows
-            for row in rows:
-                row_dict = dict(row._mapping)
-                result_table.add_row(*[str(row_dict[col]) for col in col_names])
-        
-        console.print(result_table)
+        elif format == "table":
+            console.print(f"[dim]{count} rows[/dim]")
     
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
@@ -523,38 +568,168 @@ def db_delete(
 @app.command()
 def db_query(
     sql: str = typer.Argument(..., help="SQL query to execute"),
-    format: str = typer.Option("table", "--format", "-f", help="Output format: table, json, csv")
+    format: str = typer.Option("table", "--format", "-f", help="Output format: table, csv, jsonl, json"),
+    page_size: int = typer.Option(100, "--page-size", help="Rows per table page"),
+    write: bool = typer.Option(False, "--write", help="Allow statements that modify the database")
 ):
     """
     Execute a raw SQL query.
     
+    Queries run on a read-only connection and stream their results; pass
+    --write for INSERT/UPDATE/DELETE statements.
+    
     Examples:
         friday db-query "SELECT * FROM journal_entries WHERE date(timestamp)='2026-01-06'"
         friday db-query "SELECT date, COUNT(*) FROM journal_entries GROUP BY date" --format json
+        friday db-query "SELECT * FROM snapshots" --format csv > snapshots.csv
+        friday db-query "DELETE FROM insights WHERE delivered=1" --write
     """
     try:
         db = Database()
-        rows = db.execute(sql).fetchall()
         
-        if not rows:
+        if write:
+            result = db.execute(sql)
+            if not result.returns_rows:
+                console.print(f"[green]✓ {result.rowcount} row(s) affected[/green]")
+                return
+            rows = iter(result.fetchall())
+        else:
+            rows = db.iter_rows(sql)
+        
+        count = _print_rows(rows, format, "Query Results", page_size)
+        
+        if count == 0 and format == "table":
             console.print("[yellow]No results[/yellow]")
+    
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def db_compress_snapshots(
+    batch_size: int = typer.Option(500, "--batch-size", "-b", help="Rows rewritten per transaction"),
+    vacuum: bool = typer.Option(False, "--vacuum", help="Run VACUUM afterwards to return freed pages to the OS")
+):
+    """
+    Rewrite stored snapshot payloads with the configured binary codec.
+    
+    Legacy JSON rows stay readable, so this can run on a live system.
+    
+    Examples:
+        friday db-compress-snapshots
+        friday db-compress-snapshots --vacuum
+    """
+    try:
+        from src.awareness.store import InsightsStore
+        
+        db = Database()
+        store = InsightsStore(db=db)
+        
+        console.print("[cyan]Recompressing snapshots...[/cyan]")
+        stats = store.recompress_snapshots(batch_size=batch_size)
+        
+        result_table = Table(title="Snapshot Compression", show_header=False)
+        result_table.add_column("Metric", style="cyan")
+        result_table.add_column("Value", style="white")
+        result_table.add_row("Codec", str(stats["codec"]))
+        result_table.add_row("Rows scanned", str(stats["rows_scanned"]))
+        result_table.add_row("Rows rewritten", str(stats["rows_rewritten"]))
+        
+        if stats["rows_rewritten"]:
+            before, after = stats["bytes_before"], stats["bytes_after"]
+            result_table.add_row("Payload size", f"{before / 1024:.1f} KB → {after / 1024:.1f} KB ({after / before:.1%})")
+            result_table.add_row(
+                "Decode time",
+                f"{stats['decode_ms_before']:.1f} ms → {stats['decode_ms_after']:.1f} ms",
+            )
+        console.print(result_table)
+        
+        if vacuum:
+            console.print("[cyan]Running VACUUM...[/cyan]")
+            db.execute("VACUUM")
+            console.print("[green]✓ VACUUM complete[/green]")
+    
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def db_backfill_metrics(
+    batch_size: int = typer.Option(500, "--batch-size", "-b", help="Raw snapshot rows per transaction")
+):
+    """
+    Rebuild the metrics table from stored snapshots.
+    
+    Re-extracts the declared numeric paths (AWARENESS["metrics"]) of every
+    stored snapshot and repeat marker, replacing the metrics of the time
+    range covered by raw snapshots. Safe to re-run on a live system.
+    
+    Examples:
+        friday db-backfill-metrics
+    """
+    try:
+        from src.awareness.store import InsightsStore
+        
+        store = InsightsStore(db=Database())
+        
+        console.print("[cyan]Backfilling metrics from snapshots...[/cyan]")
+        stats = store.backfill_metrics(batch_size=batch_size)
+        
+        result_table = Table(title="Metrics Backfill", show_header=False)
+        result_table.add_column("Metric", style="cyan")
+        result_table.add_column("Value", style="white")
+        result_table.add_row("Collectors", str(stats["collectors"]))
+        result_table.add_row("Snapshots scanned", str(stats["rows_scanned"]))
+        result_table.add_row("Metric rows replaced", str(stats["metrics_deleted"]))
+        result_table.add_row("Metric rows written", str(stats["metrics_written"]))
+        console.print(result_table)
+    
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def sessions(
+    hours: Optional[int] = typer.Option(None, "--hours", "-h", help="Only sessions active in the last N hours"),
+    limit: int = typer.Option(50, "--limit", "-l", help="Number of sessions to show")
+):
+    """
+    List conversation sessions, most recently active first.
+    
+    Examples:
+        friday sessions
+        friday sessions --hours 24
+    """
+    try:
+        from src.core.conversation import ConversationManager
+        
+        manager = ConversationManager(db=Database())
+        rows = manager.list_sessions(since_hours=hours, limit=limit)
+        
+        if not rows:
+            console.print("[yellow]No sessions found[/yellow]")
             return
         
-        if format == "json":
-            print(json.dumps([dict(row) for row in rows], indent=2, default=str))
-        elif format == "csv":
-            col_names = rows[0].keys()
-            print(",".join(col_names))
-            for row in rows:
-                print(",".join([str(row[col]) for col in col_names]))
-        else:  # table
-            result_table = Table(title=f"Query Results ({len(rows)} rows)")
-            col_names = rows[0].keys()
-            for col in col_names:
-                result_table.add_column(col, style="cyan")
-            for row in rows:
-                result_table.add_row(*[str(row[col]) for col in col_names])
-            console.print(result_table)
+        result_table = Table(title=f"Sessions ({len(rows)})")
+        result_table.add_column("Session", style="cyan")
+        result_table.add_column("Messages", justify="right")
+        result_table.add_column("Turns", justify="right")
+        result_table.add_column("Tokens", justify="right")
+        result_table.add_column("First message (UTC)")
+        result_table.add_column("Last message (UTC)")
+        for info in rows:
+            result_table.add_row(
+                info["session_id"],
+                str(info["message_count"]),
+                str(info["turn_count"]),
+                f"{info['token_count']:,}",
+                str(info["first_message"])[:19],
+                str(info["last_message"])[:19],
+            )
+        console.print(result_table)
     
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
@@ -796,6 +971,15 @@ def status():
     tool_count = len(tools_dict)
     info_table.add_row("Registered Tools", str(tool_count))
     
+    # Conversation sessions (reads the sessions table, not the message history)
+    try:
+        from src.core.conversation import ConversationManager
+        
+        manager = ConversationManager(db=Database())
+        info_table.add_row("Active Sessions (24h)", str(len(manager.get_active_sessions(since_hours=24))))
+    except Exception:
+        info_table.add_row("Active Sessions (24h)", "[dim]unavailable[/dim]")
+    
     console.print()
     console.print(info_table)
 
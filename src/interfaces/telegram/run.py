@@ -18,6 +18,7 @@ from src.interfaces.manager import ChannelManager
 from src.interfaces.telegram.channel import TelegramChannel
 from src.core.agent import agent, AgentDeps
 from src.core.conversation import get_conversation_manager
+from src.core.embeddings import get_embeddings
 from settings import settings
 
 # Configure logging
@@ -119,15 +120,18 @@ class FridayTelegramBot:
             history = self.conversation_manager.get_history(session_id)
             logger.info(f"Loaded {len(history)} messages from history for session {session_id}")
             
+            # Fit the history into the token budget (older turns become a summary)
+            window = self.conversation_manager.apply_window(session_id, history)
+            
             # Create dependencies with session_id for tools
             deps = AgentDeps(session_id=session_id)
             
             # Run the AI agent with the user's message, history, and dependencies
-            result = await agent.run(message.content, message_history=history, deps=deps)
+            result = await agent.run(message.content, message_history=window.messages, deps=deps)
             
             # Update conversation history with the complete message list
-            # result.all_messages() contains: old history + user message + assistant response
-            self.conversation_manager.update_history(session_id, result.all_messages())
+            # The agent saw the windowed history, so append only this turn's messages
+            self.conversation_manager.update_history(session_id, history + result.new_messages())
             
             # Check if generate_speech or generate_image was called by examining the result data
             import re
@@ -351,6 +355,10 @@ class FridayTelegramBot:
         # Register channel with manager
         self.manager.register_channel(self.telegram, is_default=True)
         
+        # Load the embeddings model in the background instead of on the first fact search
+        if settings.EMBEDDINGS["warmup"]:
+            asyncio.get_running_loop().run_in_executor(None, get_embeddings().warm_up)
+        
         # Start listening
         try:
             await self.manager.start_all()
@@ -367,6 +375,10 @@ class FridayTelegramBot:
             logger.error(f"Fatal error: {e}")
             await self.manager.stop_all()
             sys.exit(1)
+        finally:
+            # Persist snapshots queued by tool calls before exiting
+            from src.awareness.snapshot_writer import get_snapshot_writer
+            get_snapshot_writer().close()
 
 
 async def main():
@@ -0,0 +1,3 @@
+"""
+Tests for the awareness engine (store, snapshot writer, decision layer).
+"""
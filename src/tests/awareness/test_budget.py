@@ -0,0 +1,67 @@
+"""
+Tests for the reach-out budget manager.
+"""
+
+import pytest
+
+from src.awareness.decision.budget import BudgetManager
+from src.awareness.store import InsightsStore
+
+CONFIG = {"decision": {"max_reach_outs_per_day": 2}}
+
+
+@pytest.fixture
+def store(test_db):
+    return InsightsStore(db=test_db)
+
+
+def test_consume_writes_through_to_ledger(store):
+    """Test that consuming updates the cached count and the ledger."""
+    budget = BudgetManager(CONFIG, store)
+    
+    budget.consume_budget("a")
+    budget.consume_budget("b")
+    
+    assert not budget.has_budget()
+    assert store.get_budget_count() == 2
+    assert store.get_today_budget(max_per_day=2).deliveries == ["a", "b"]
+
+
+def test_budget_checks_use_cached_count(store, mocker):
+    """Test that has_budget doesn't hit the database after a refresh."""
+    budget = BudgetManager(CONFIG, store)
+    budget.refresh()
+    count = mocker.spy(store, "get_budget_count")
+    
+    for _ in range(10):
+        assert budget.has_budget()
+    
+    count.assert_not_called()
+
+
+def test_refresh_sees_other_processes(store):
+    """Test that reach-outs recorded by another manager are picked up."""
+    bot, daemon = BudgetManager(CONFIG, store), BudgetManager(CONFIG, store)
+    daemon.refresh()
+    
+    bot.consume_budget("a")
+    bot.consume_budget("b")
+    
+    assert daemon.has_budget()  # stale until the next decision pass
+    daemon.refresh()
+    assert not daemon.has_budget()
+    assert daemon.get_budget_status()["remaining"] == 0
+
+
+def test_rolled_back_consume_leaves_count_unchanged(store):
+    """Test that a consume inside a failed transaction doesn't bump the cached count."""
+    budget = BudgetManager(CONFIG, store)
+    budget.consume_budget("a")
+    
+    with pytest.raises(RuntimeError):
+        with store.db.transaction():
+            budget.consume_budget("b")
+            raise RuntimeError("delivery insert failed")
+    
+    assert budget.used_today() == 1
+    assert store.get_budget_count() == 1
@@ -0,0 +1,73 @@
+"""
+Tests for the write-behind snapshot writer.
+"""
+
+import time
+from datetime import datetime
+
+from src.awareness.models import Snapshot
+from src.awareness.snapshot_writer import SnapshotWriter
+from src.awareness.store import InsightsStore
+
+
+def _snapshot(i: int = 0) -> Snapshot:
+    return Snapshot(collector="get_friday_status", timestamp=datetime.now(), data={"i": i})
+
+
+def test_writer_flushes_in_background(test_db):
+    """Test that queued snapshots are written by the flusher thread."""
+    store = InsightsStore(db=test_db)
+    writer = SnapshotWriter(store=store, batch_size=5, flush_interval_ms=20)
+    
+    for i in range(12):
+        assert writer.enqueue(_snapshot(i))
+    
+    deadline = time.time() + 2
+    while writer.stats()["written"] < 12 and time.time() < deadline:
+        time.sleep(0.01)
+    
+    stats = writer.stats()
+    assert stats["written"] == 12
+    assert stats["queue_depth"] == 0
+    assert len(store.get_snapshots("get_friday_status")) == 12
+    writer.close()
+
+
+def test_writer_drops_when_full(test_db):
+    """Test that a full queue drops snapshots instead of blocking."""
+    writer = SnapshotWriter(store=InsightsStore(db=test_db), max_queue=3, flush_interval_ms=10_000)
+    writer._ensure_started = lambda: None  # keep everything in the queue
+    
+    results = [writer.enqueue(_snapshot(i)) for i in range(5)]
+    
+    assert results == [True, True, True, False, False]
+    assert writer.stats()["dropped"] == 2
+    assert writer.stats()["queue_depth"] == 3
+
+
+def test_close_flushes_pending(test_db):
+    """Test that close() writes whatever is still queued."""
+    store = InsightsStore(db=test_db)
+    writer = SnapshotWriter(store=store, flush_interval_ms=10_000)
+    writer._ensure_started = lambda: None
+    
+    for i in range(4):
+        writer.enqueue(_snapshot(i))
+    writer.close()
+    
+    assert len(store.get_snapshots("get_friday_status")) == 4
+    assert not writer.enqueue(_snapshot())
+
+
+def test_close_wakes_idle_flusher(test_db):
+    """Test that close() stops a flusher blocked on the queue and writes its pending batch."""
+    store = InsightsStore(db=test_db)
+    writer = SnapshotWriter(store=store, flush_interval_ms=10_000)
+    writer.enqueue(_snapshot())
+    
+    started = time.monotonic()
+    writer.close()
+    
+    assert time.monotonic() - started < 1
+    assert not writer._thread.is_alive()
+    assert writer.stats()["written"] == 1
@@ -0,0 +1,286 @@
+"""
+Tests for the insights store.
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from settings import settings
+from src.awareness import codec
+from src.awareness.models import Delivery, DeliveryChannel, Snapshot
+from src.awareness.store import InsightsStore
+
+
+@pytest.fixture
+def store(test_db):
+    return InsightsStore(db=test_db)
+
+
+def _payload(i: int = 0) -> dict:
+    return {
+        "local": {"disk_percent": 42.0 + i, "memory_percent": 63.5},
+        "services": [{"name": f"svc-{n}", "status": "up"} for n in range(10)],
+    }
+
+
+@pytest.mark.parametrize("codec_id", [0, codec.CODEC_JSON_ZLIB, codec.CODEC_MSGPACK_ZSTD])
+def test_payload_codec_roundtrip(codec_id):
+    """Test that every codec version decodes back to the original payload."""
+    if codec_id == codec.CODEC_MSGPACK_ZSTD and not codec.HAS_MSGPACK_ZSTD:
+        pytest.skip("msgpack/zstandard not installed")
+    
+    encoded = codec.encode_payload(_payload(), codec_id)
+    
+    assert codec.payload_codec(encoded) == codec_id
+    assert codec.decode_payload(encoded) == _payload()
+
+
+def test_get_snapshots_reads_legacy_and_encoded_rows(store, test_db):
+    """Test that legacy JSON TEXT rows and encoded rows are both readable."""
+    now = datetime.now()
+    test_db.insert('snapshots', {
+        'id': str(uuid.uuid4()),
+        'collector': 'get_friday_status',
+        'timestamp': (now - timedelta(minutes=5)).isoformat(),
+        'data': json.dumps(_payload(0)),
+    })
+    store.save_snapshot(Snapshot(collector='get_friday_status', timestamp=now, data=_payload(1)))
+    
+    snapshots = store.get_snapshots('get_friday_status')
+    
+    assert [s.data for s in snapshots] == [_payload(1), _payload(0)]
+
+
+def test_recompress_snapshots(store, test_db):
+    """Test that the migration rewrites legacy rows and shrinks them."""
+    for i in range(20):
+        test_db.insert('snapshots', {
+            'id': str(uuid.uuid4()),
+            'collector': 'get_friday_status',
+            'timestamp': f'2024-01-10T10:{i:02d}:00',
+            'data': json.dumps(_payload(i)),
+        })
+    
+    stats = store.recompress_snapshots(batch_size=7, codec=codec.CODEC_JSON_ZLIB)
+    
+    assert stats["rows_scanned"] == 20
+    assert stats["rows_rewritten"] == 20
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert store.recompress_snapshots(codec=codec.CODEC_JSON_ZLIB)["rows_rewritten"] == 0
+    assert sorted(s.data["local"]["disk_percent"] for s in store.get_snapshots('get_friday_status')) == \
+        [42.0 + i for i in range(20)]
+
+
+def test_unchanged_snapshots_stored_as_repeats(store, test_db):
+    """Test that identical payloads are stored once and expanded on read."""
+    start = datetime(2024, 1, 10, 10, 0)
+    payloads = [_payload(0), _payload(0), _payload(0), _payload(1), _payload(1)]
+    store.save_snapshots([
+        Snapshot(collector='get_friday_status', timestamp=start + timedelta(minutes=5 * i), data=data)
+        for i, data in enumerate(payloads)
+    ])
+    
+    assert test_db.fetchone("SELECT COUNT(*) FROM snapshots")[0] == 2
+    assert test_db.fetchone("SELECT COUNT(*) FROM snapshot_repeats")[0] == 3
+    
+    snapshots = store.get_snapshots('get_friday_status')
+    assert [s.data for s in snapshots] == list(reversed(payloads))
+    assert [s.timestamp for s in snapshots] == [start + timedelta(minutes=5 * i) for i in reversed(range(5))]
+    
+    window = store.get_snapshots('get_friday_status', since=start + timedelta(minutes=5), until=start + timedelta(minutes=10))
+    assert len(window) == 2
+
+
+def test_repeat_across_calls_extends_validity(store, test_db):
+    """Test that a repeat saved in a later call extends the previous row."""
+    first = Snapshot(collector='get_all_external_services', timestamp=datetime(2024, 1, 10, 10, 0), data=_payload())
+    store.save_snapshot(first)
+    store.save_snapshot(Snapshot(collector='get_all_external_services', timestamp=datetime(2024, 1, 10, 10, 15), data=_payload()))
+    
+    row = test_db.fetchone("SELECT valid_until FROM snapshots WHERE id = :id", {'id': first.id})
+    assert row[0] == '2024-01-10T10:15:00'
+    assert store.get_latest_snapshot('get_all_external_services').timestamp == datetime(2024, 1, 10, 10, 15)
+
+
+def test_rollup_snapshots_hourly_and_daily(store):
+    """Test that completed hours are aggregated and daily rows merge them."""
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+    store.save_snapshots([
+        Snapshot(collector='homelab', timestamp=day + timedelta(hours=h, minutes=m), data=_payload(h + m))
+        for h in (1, 2) for m in (0, 30)
+    ])
+    
+    stats = store.rollup_snapshots(now=day + timedelta(days=1))
+    
+    assert stats["collectors"] == 1
+    hourly = store.get_rollups('homelab', since=day, resolution="hourly", field_pattern="*disk_percent")
+    assert [r.bucket for r in hourly] == [day + timedelta(hours=1), day + timedelta(hours=2)]
+    assert hourly[0].fields["local.disk_percent"] == {
+        "min": 43.0, "max": 73.0, "mean": 58.0, "last": 73.0, "count": 2
+    }
+    
+    daily = store.get_rollups('homelab', since=day, resolution="daily")
+    assert len(daily) == 1
+    assert daily[0].get("local.disk_percent", "count") == 4
+    assert daily[0].get("local.disk_percent", "max") == 74.0
+    assert daily[0].get("services.svc-0.status") is None  # non-numeric fields skipped
+    
+    # Incremental: a second run has nothing new to aggregate
+    assert store.rollup_snapshots(now=day + timedelta(days=1))["collectors"] == 0
+
+
+def test_get_rollups_auto_resolution(store):
+    """Test that the window length picks raw, hourly or daily rollups."""
+    now = datetime.now()
+    store.save_snapshot(Snapshot(collector='homelab', timestamp=now - timedelta(hours=1), data=_payload()))
+    
+    assert store.get_rollups('homelab', since=now - timedelta(hours=6))[0].resolution == "raw"
+    store.rollup_snapshots(now=now + timedelta(hours=1))
+    assert store.get_rollups('homelab', since=now - timedelta(days=7))[0].resolution == "hourly"
+    assert store.get_rollups('homelab', since=now - timedelta(days=90))[0].resolution == "daily"
+
+
+def test_get_rollups_merges_raw_tail_after_watermark(store):
+    """Test that snapshots newer than the last rollup run still reach the series."""
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    store.save_snapshots([
+        Snapshot(collector='homelab', timestamp=day + timedelta(hours=1, minutes=10), data=_payload(0)),
+        Snapshot(collector='homelab', timestamp=day + timedelta(hours=2, minutes=10), data=_payload(4)),
+    ])
+    store.rollup_snapshots(now=day + timedelta(hours=2))  # only hour 1 is rolled up
+    
+    hourly = store.get_rollups('homelab', since=day, resolution="hourly", field_pattern="*disk_percent")
+    daily = store.get_rollups('homelab', since=day, resolution="daily", field_pattern="*disk_percent")
+    
+    assert [r.bucket for r in hourly] == [day + timedelta(hours=1), day + timedelta(hours=2)]
+    assert hourly[-1].get("local.disk_percent", "last") == 46.0
+    assert daily[0].fields["local.disk_percent"] == {
+        "min": 42.0, "max": 46.0, "mean": 44.0, "last": 46.0, "count": 2
+    }
+    assert len(store.get_rollups('homelab', since=day, resolution="hourly", include_unrolled=False)) == 1
+
+
+def test_compact_snapshots_keeps_unrolled_data(store):
+    """Test that compaction only drops raw rows already covered by rollups."""
+    now = datetime.now()
+    old = [
+        Snapshot(collector='homelab', timestamp=now - timedelta(days=30, hours=h), data=_payload(h))
+        for h in range(3)
+    ]
+    store.save_snapshots(old)
+    
+    assert store.compact_snapshots(raw_retention_days=14) == 0
+    
+    store.rollup_snapshots()
+    assert store.compact_snapshots(raw_retention_days=14) == 3
+    assert store.get_snapshots('homelab', limit=-1) == []
+    assert store.get_rollups('homelab', since=now - timedelta(days=31), resolution="hourly")
+
+
+def test_metrics_extracted_at_ingest(store, test_db):
+    """Test that declared paths land in the metrics table, repeats included."""
+    now = datetime.now()
+    payload = {
+        "local": {"disk_percent": 40.0, "memory_percent": 50.0},
+        "hardware": {"servers": [
+            {"name": "TrueNAS", "disk_percent": 70.0, "memory_percent": "n/a"},
+            {"name": "Proxmox", "disk_percent": 20.0},
+        ]},
+    }
+    store.save_snapshots([
+        Snapshot(collector='homelab', timestamp=now - timedelta(minutes=m), data=payload)
+        for m in (20, 10)
+    ])
+    
+    series = store.get_series('homelab', 'disk_percent', since=now - timedelta(hours=1))
+    
+    assert len(series) == 6
+    assert sorted(series.by_entity()) == ["Proxmox", "TrueNAS", "local"]
+    ts, values = series.for_entity("TrueNAS")
+    assert values.tolist() == [70.0, 70.0]
+    assert ts.dtype == "datetime64[ms]" and ts[0] < ts[1]
+    
+    memory = store.get_series('homelab', 'memory_percent', since=now - timedelta(hours=1))
+    assert set(memory.entities) == {"local"}  # non-numeric values skipped
+    assert len(store.get_series('homelab', 'disk_percent', since=now, entity="local")) == 0
+
+
+def test_naive_metric_timestamps_use_the_zone_offset_not_lmt(store):
+    """Test that naive snapshot times are localized (pytz replace() would apply LMT)."""
+    naive = datetime(2026, 1, 15, 12, 0)
+    store.save_snapshots([Snapshot(collector='homelab', timestamp=naive, data=_payload())])
+    
+    series = store.get_series('homelab', 'disk_percent', since=naive - timedelta(hours=1))
+    
+    expected_ms = int(settings.TIMEZONE.localize(naive).timestamp() * 1000)
+    assert series.ts.astype("int64").tolist() == [expected_ms]
+
+
+def test_backfill_metrics_rebuilds_history(store, test_db):
+    """Test that metrics are re-derived from payloads and repeats, replacing stale rows."""
+    now = datetime.now(settings.TIMEZONE)
+    store.save_snapshots([
+        Snapshot(collector='homelab', timestamp=now - timedelta(minutes=m), data=_payload(m // 50))
+        for m in (90, 80, 70, 30, 20)
+    ])
+    expected = store.get_series('homelab', 'disk_percent', since=now - timedelta(hours=2))
+    test_db.execute("DELETE FROM metrics")
+    test_db.execute(
+        "INSERT INTO metrics (collector, metric, entity, ts, value) VALUES ('homelab', 'disk_percent', 'local', :ts, 0)",
+        {'ts': int((now - timedelta(minutes=25)).timestamp() * 1000)}  # mis-stamped row
+    )
+    
+    stats = store.backfill_metrics(batch_size=2)
+    
+    series = store.get_series('homelab', 'disk_percent', since=now - timedelta(hours=2))
+    assert stats["rows_scanned"] == 5 and stats["metrics_deleted"] == 1
+    assert series.ts.tolist() == expected.ts.tolist()
+    assert series.values.tolist() == expected.values.tolist() == [43.0, 43.0, 43.0, 42.0, 42.0]
+    store.backfill_metrics()
+    assert len(store.get_series('homelab', 'disk_percent', since=now - timedelta(hours=2))) == 5
+
+
+def test_snapshot_range_mixes_naive_and_aware_timestamps(store):
+    """Test that range queries compare instants, not ISO strings."""
+    now = datetime.now(settings.TIMEZONE)
+    store.save_snapshots([
+        Snapshot(collector='homelab', timestamp=now - timedelta(hours=3), data=_payload(0)),
+        Snapshot(collector='homelab', timestamp=(now - timedelta(minutes=30)).replace(tzinfo=None), data=_payload(1)),
+        Snapshot(collector='homelab', timestamp=now - timedelta(minutes=10), data=_payload(2)),
+    ])
+    
+    recent = store.get_snapshots('homelab', hours=1)
+    
+    assert [s.data for s in recent] == [_payload(2), _payload(1)]
+
+
+def test_get_deliveries_today(store):
+    """Test that today's deliveries are selected by epoch range."""
+    now = datetime.now(settings.TIMEZONE)
+    store.save_delivery(Delivery(insight_id='a', channel=DeliveryChannel.TELEGRAM, delivered_at=now))
+    store.save_delivery(Delivery(
+        insight_id='b', channel=DeliveryChannel.TELEGRAM, delivered_at=now - timedelta(days=1)
+    ))
+    
+    assert [d.insight_id for d in store.get_deliveries_today()] == ['a']
+
+
+def test_purge_expired(store, test_db):
+    """Test that the retention purge removes only expired rows of each table."""
+    now = datetime.now(settings.TIMEZONE)
+    for age in (1, 100):
+        store.save_snapshot(Snapshot(
+            collector='homelab', timestamp=now - timedelta(days=age), data=_payload(age)
+        ))
+        store.save_delivery(Delivery(
+            insight_id=str(age), channel=DeliveryChannel.TELEGRAM, delivered_at=now - timedelta(days=age)
+        ))
+    
+    stats = store.purge_expired(snapshot_days=90, insight_days=90, delivery_days=30, chunk_size=1)
+    
+    assert stats == {'snapshots': 1, 'insights': 0, 'deliveries': 1}
+    assert [s.data for s in store.get_snapshots('homelab', limit=-1)] == [_payload(1)]
+    assert test_db.fetchone("SELECT COUNT(*) FROM deliveries") == (1,)
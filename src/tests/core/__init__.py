@@ -0,0 +1,3 @@
+"""
+Tests for core modules (database, conversation, embeddings).
+"""
@@ -0,0 +1,324 @@
+"""
+Tests for the conversation history manager and its session cache.
+"""
+
+import pytest
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+from settings import settings
+from src.core.conversation import ConversationManager, SessionCache, SUMMARY_HEADER
+
+
+def _msg(content: str) -> dict:
+    return {"role": "user", "content": content}
+
+
+def test_session_cache_evicts_least_recently_used():
+    """Test that the session bound evicts the least recently used entry."""
+    cache = SessionCache(max_sessions=2, max_bytes=10 ** 9)
+    cache.put("a", [_msg("1")])
+    cache.put("b", [_msg("2")])
+    cache.get("a")
+    
+    cache.put("c", [_msg("3")])
+    
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_session_cache_respects_byte_budget():
+    """Test that the byte bound evicts sessions but always keeps the newest."""
+    cache = SessionCache(max_sessions=100, max_bytes=2000)
+    cache.put("a", [_msg("x" * 1000)])
+    cache.put("b", [_msg("x" * 1000)])
+    
+    assert len(cache) == 1 and "b" in cache
+    assert cache.stats()["bytes"] <= 2000
+    
+    cache.put("huge", [_msg("x" * 10000)])
+    assert len(cache) == 1 and "huge" in cache
+
+
+def test_session_cache_counts_hits_and_misses():
+    """Test hit/miss counters."""
+    cache = SessionCache(max_sessions=2, max_bytes=10 ** 9)
+    cache.put("a", [])
+    
+    cache.get("a")
+    cache.get("missing")
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+@pytest.fixture
+def manager(test_db):
+    manager = ConversationManager(db=test_db)
+    manager._memory_cache.max_sessions = 1
+    return manager
+
+
+def test_evicted_session_reloads_from_database(manager):
+    """Test that an evicted session is reloaded from SQLite on the next read."""
+    manager.update_history("a", [_msg("hello"), _msg("there")])
+    manager.update_history("b", [_msg("other")])
+    assert "a" not in manager._memory_cache
+    
+    history = manager.get_history("a")
+    
+    assert [m.parts[0].content for m in history] == ["hello", "there"]
+
+
+def test_eviction_mid_turn_does_not_duplicate_rows(manager, test_db):
+    """Test that update_history after an eviction only persists the new messages."""
+    history = [_msg("hello")]
+    manager.update_history("a", history)
+    manager.update_history("b", [_msg("other")])  # evicts "a"
+    
+    manager.update_history("a", history + [_msg("again")])
+    
+    rows = test_db.fetchall(
+        "SELECT content FROM conversation_history WHERE conversation_id = 'a' ORDER BY id"
+    )
+    assert rows == [("hello",), ("again",)]
+
+
+def test_pruned_eviction_count_resumes_from_stored_turns(manager, test_db):
+    """Test that a session whose evicted count was pruned only persists the delta."""
+    history = [_msg("hello")]
+    manager.update_history("a", history)
+    manager.update_history("b", [_msg("other")])  # evicts "a"
+    manager._evicted_counts.clear()
+    
+    manager.update_history("a", history + [_msg("again")])
+    
+    assert test_db.fetchall(
+        "SELECT start_index, message_count FROM conversation_turns WHERE conversation_id = 'a' ORDER BY id"
+    ) == [(0, 1), (1, 1)]
+
+
+def _turns(count: int, size: int = 400) -> list:
+    """Build a pydantic-ai history of tool-using turns with a system prompt."""
+    history = []
+    for i in range(count):
+        parts = [UserPromptPart(content=f"question {i} " + "q" * size)]
+        if i == 0:
+            parts.insert(0, SystemPromptPart(content="You are Friday."))
+        history += [
+            ModelRequest(parts=parts),
+            ModelResponse(parts=[ToolCallPart(tool_name="search_facts", args={"query": str(i)})]),
+            ModelRequest(parts=[ToolReturnPart(tool_name="search_facts", content="r" * size)]),
+            ModelResponse(parts=[TextPart(content=f"answer {i} " + "a" * size)]),
+        ]
+    return history
+
+
+@pytest.fixture
+def window_config(monkeypatch):
+    config = settings.CONVERSATION["history_window"]
+    monkeypatch.setitem(config, "enabled", True)
+    monkeypatch.setitem(config, "max_tokens", 1000)
+    monkeypatch.setitem(config, "summary_max_tokens", 200)
+    monkeypatch.setitem(config, "chars_per_token", 4)
+    return config
+
+
+def test_window_keeps_short_history(test_db, window_config):
+    """Test that a history within budget is sent unchanged."""
+    manager = ConversationManager(db=test_db)
+    history = _turns(1)
+    
+    window = manager.apply_window("s", history)
+    
+    assert window.messages == history
+    assert window.tokens_saved == 0
+
+
+def test_window_folds_old_turns_into_summary(test_db, window_config):
+    """Test that old turns fold into a stored summary within the token budget."""
+    manager = ConversationManager(db=test_db)
+    history = _turns(6)
+    
+    window = manager.apply_window("s", history)
+    
+    summary = window.messages[0]
+    assert [p.content for p in summary.parts][0] == "You are Friday."
+    assert summary.parts[-1].content.startswith(SUMMARY_HEADER)
+    assert "Friday: answer" in summary.parts[-1].content
+    assert isinstance(window.messages[1].parts[0], UserPromptPart)  # window starts on a turn
+    assert window.tokens_sent <= window_config["max_tokens"]
+    assert window.tokens_saved > 0
+    assert test_db.fetchone(
+        "SELECT folded_count FROM conversation_summaries WHERE conversation_id = 's'"
+    ) == (window.folded_count,)
+
+
+def test_window_summary_is_incremental(test_db, window_config):
+    """Test that only messages leaving the window are passed to the summarizer."""
+    calls = []
+    
+    def summarizer(previous, messages):
+        calls.append(len(messages))
+        return f"{previous}|{len(messages)}"
+    
+    manager = ConversationManager(db=test_db, summarizer=summarizer)
+    history = _turns(6)
+    first = manager.apply_window("s", history)
+    manager.apply_window("s", history)
+    second = manager.apply_window("s", history + _turns(1))
+    
+    assert calls[0] == first.folded_count
+    assert len(calls) == 2  # unchanged history reuses the stored summary
+    assert calls[1] == second.folded_count - first.folded_count
+    assert manager.window_stats()["turns"] == 3
+
+
+def test_history_round_trips_through_turns(test_db):
+    """Test that a restarted manager restores the exact messages, tool calls included."""
+    history = _turns(2, size=10)
+    manager = ConversationManager(db=test_db)
+    manager.update_history("s", history[:4])
+    manager.update_history("s", history)
+    
+    restored = ConversationManager(db=test_db).get_history("s")
+    
+    assert restored == history
+    assert test_db.fetchall(
+        "SELECT start_index, message_count FROM conversation_turns ORDER BY id"
+    ) == [(0, 4), (4, 4)]
+    assert test_db.fetchone(
+        "SELECT COUNT(*) FROM conversation_history WHERE conversation_id = 's'"
+    ) == (4,)  # text rows only: two prompts, two answers
+
+
+def test_legacy_text_rows_become_a_turn(test_db):
+    """Test that sessions stored as text rows only load as ModelMessages."""
+    test_db.insert_many("conversation_history", [
+        {"conversation_id": "s", "role": "user", "content": "hi", "timestamp": "2025-01-01T10:00:00", "ts_ms": 1},
+        {"conversation_id": "s", "role": "assistant", "content": "hello", "timestamp": "2025-01-01T10:00:01", "ts_ms": 2},
+    ])
+    
+    history = ConversationManager(db=test_db).get_history("s")
+    
+    assert isinstance(history[0], ModelRequest) and history[0].parts[0].content == "hi"
+    assert isinstance(history[1], ModelResponse) and history[1].parts[0].content == "hello"
+    assert ConversationManager(db=test_db).get_history("s") == history
+    assert test_db.fetchone("SELECT COUNT(*) FROM conversation_turns") == (1,)
+
+
+def test_legacy_rebuild_updates_session_totals(test_db):
+    """Test that rebuilding a legacy session records its turn in the sessions row."""
+    test_db.insert_many("conversation_history", [
+        {"conversation_id": "s", "role": "user", "content": "hi", "timestamp": "2025-01-01T10:00:00", "ts_ms": 1},
+        {"conversation_id": "s", "role": "assistant", "content": "hello", "timestamp": "2025-01-01T10:00:01", "ts_ms": 2},
+    ])
+    manager = ConversationManager(db=test_db)
+    
+    history = manager.get_history("s")
+    
+    assert test_db.fetchone(
+        "SELECT message_count, turn_count, first_ts_ms, last_ts_ms FROM sessions WHERE conversation_id = 's'"
+    ) == (2, 1, 1, 2)
+    
+    manager.update_history("s", history + [_msg("again")])
+    
+    assert test_db.fetchone(
+        "SELECT message_count, turn_count FROM sessions WHERE conversation_id = 's'"
+    ) == (3, 2)
+
+
+def test_messages_of_one_turn_get_ordered_seq(test_db):
+    """Test that rows sharing a timestamp are numbered per session in write order."""
+    manager = ConversationManager(db=test_db)
+    manager.update_history("a", _turns(2, size=10))
+    manager.update_history("b", _turns(1, size=10))
+    
+    rows = test_db.fetchall(
+        "SELECT seq, content FROM conversation_history WHERE conversation_id = 'a' ORDER BY seq"
+    )
+    
+    assert [row[0] for row in rows] == [1, 2, 3, 4]
+    assert rows[0][1].startswith("question 0") and rows[3][1].startswith("answer 1")
+    assert test_db.fetchone(
+        "SELECT MAX(seq) FROM conversation_history WHERE conversation_id = 'b'"
+    ) == (2,)
+
+
+def test_get_messages_pages_backwards(test_db):
+    """Test keyset pages of text messages."""
+    manager = ConversationManager(db=test_db)
+    manager.update_history("s", _turns(5, size=10))
+    
+    last = manager.get_messages("s", limit=4)
+    previous = manager.get_messages("s", limit=4, before_seq=last[0]["seq"])
+    
+    assert [m["seq"] for m in last] == [7, 8, 9, 10]
+    assert [m["seq"] for m in previous] == [3, 4, 5, 6]
+    assert manager.get_messages("s", limit=4, before_seq=1) == []
+
+
+def test_get_history_tail_reads_only_needed_turns(test_db):
+    """Test that an uncached tail comes from the newest turns without caching."""
+    history = _turns(3, size=10)
+    writer = ConversationManager(db=test_db)
+    for end in (4, 8, 12):
+        writer.update_history("s", history[:end])
+    
+    reader = ConversationManager(db=test_db)
+    
+    assert reader.get_history("s", limit=3) == history[-3:]
+    assert reader.get_history("s", limit=2, before_index=6) == history[4:6]
+    assert "s" not in reader._memory_cache
+    assert reader.get_history("s") == history
+
+
+def test_sessions_table_tracks_writes(test_db):
+    """Test that session counters follow writes and clears without scanning messages."""
+    manager = ConversationManager(db=test_db)
+    history = _turns(2, size=10)
+    manager.update_history("a", history[:4])
+    manager.update_history("a", history)
+    manager.update_history("b", _turns(1, size=10))
+    
+    info = manager.get_session_info("a")
+    
+    assert (info["message_count"], info["turn_count"]) == (4, 2)
+    assert info["token_count"] > 0
+    assert info["first_message"] <= info["last_message"]
+    assert manager.get_active_sessions() == ["b", "a"]
+    assert [s["session_id"] for s in manager.list_sessions(limit=1)] == ["b"]
+    
+    manager.clear_history("a")
+    assert manager.get_session_info("a")["message_count"] == 0
+    assert manager.get_active_sessions() == ["b"]
+
+
+def test_failed_clear_leaves_session_intact(test_db, monkeypatch):
+    """Test that clear_history() rolls back every table when one DELETE fails."""
+    manager = ConversationManager(db=test_db)
+    history = _turns(2, size=10)
+    manager.update_history("a", history)
+    execute = test_db.execute
+    
+    def failing_execute(sql, *args, **kwargs):
+        if "conversation_summaries" in sql:
+            raise RuntimeError("disk I/O error")
+        return execute(sql, *args, **kwargs)
+    
+    monkeypatch.setattr(test_db, "execute", failing_execute)
+    with pytest.raises(RuntimeError):
+        manager.clear_history("a")
+    monkeypatch.undo()
+    
+    reader = ConversationManager(db=test_db)
+    assert reader.get_session_info("a")["message_count"] == 4
+    assert reader.get_history("a") == history
@@ -0,0 +1,147 @@
+"""
+Tests for the centralized database module.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.core.database import Database, resolve_pragmas
+
+
+def test_wal_profile_applies_pragmas(tmp_path):
+    """Test that the WAL profile is applied to pooled connections."""
+    db = Database(db_path=tmp_path / "friday.db", profile="wal")
+    
+    assert db.pragma("journal_mode") == "wal"
+    assert db.pragma("synchronous") == 1  # NORMAL
+    assert db.pragma("busy_timeout") == db.pragmas["busy_timeout"]
+    
+    db.close()
+
+
+def test_legacy_profile_keeps_defaults(tmp_path):
+    """Test that the legacy profile leaves SQLite defaults untouched."""
+    db = Database(db_path=tmp_path / "friday.db", profile="legacy")
+    
+    assert db.pragmas == {}
+    assert db.pragma("journal_mode") == "delete"
+    
+    db.close()
+
+
+def test_unknown_profile_raises():
+    """Test that an unknown profile name is rejected."""
+    with pytest.raises(ValueError):
+        resolve_pragmas("turbo")
+
+
+def test_in_memory_skips_profile(test_db):
+    """Test that in-memory databases don't get file pragmas."""
+    assert test_db.pragmas == {}
+    test_db.insert('facts', {'category': 'test', 'subject': 's', 'content': 'c'})
+    assert test_db.fetchone("SELECT COUNT(*) FROM facts")[0] == 1
+
+
+def test_insert_many(test_db):
+    """Test bulk insert with a single executemany."""
+    rows = [
+        {'conversation_id': 's1', 'timestamp': f'2024-01-10T10:00:{i:02d}', 'role': 'user', 'content': f'm{i}'}
+        for i in range(10)
+    ]
+    
+    assert test_db.insert_many('conversation_history', rows) == 10
+    assert test_db.insert_many('conversation_history', []) == 0
+    assert test_db.fetchone("SELECT COUNT(*) FROM conversation_history")[0] == 10
+
+
+def test_transaction_commits_all_writes(tmp_path):
+    """Test that writes inside transaction() are committed together."""
+    db = Database(db_path=tmp_path / "friday.db")
+    
+    with db.transaction():
+        db.insert('facts', {'category': 'a', 'subject': 's', 'content': 'c'})
+        db.insert_many('facts', [{'category': 'b', 'subject': 's', 'content': 'c'}] * 3)
+        db.update('facts', {'content': 'updated'}, 'category = :cat', {'cat': 'a'})
+        assert db.in_transaction
+    
+    assert not db.in_transaction
+    assert db.fetchone("SELECT COUNT(*) FROM facts")[0] == 4
+    assert db.fetchone("SELECT content FROM facts WHERE category = 'a'")[0] == 'updated'
+    db.close()
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    """Test that an exception inside transaction() discards all writes."""
+    db = Database(db_path=tmp_path / "friday.db")
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.insert('facts', {'category': 'a', 'subject': 's', 'content': 'c'})
+            raise RuntimeError("boom")
+    
+    assert db.fetchone("SELECT COUNT(*) FROM facts")[0] == 0
+    db.close()
+
+
+def test_delete_chunked(test_db):
+    """Test that chunked deletes remove every matching row and nothing else."""
+    test_db.insert_many('facts', [
+        {'category': 'old' if i % 2 else 'new', 'subject': str(i), 'content': 'c'} for i in range(25)
+    ])
+    
+    deleted = test_db.delete_chunked('facts', 'category = :category', {'category': 'old'}, chunk_size=5)
+    
+    assert deleted == 12
+    assert test_db.fetchone("SELECT COUNT(*) FROM facts") == (13,)
+
+
+def test_incremental_vacuum_reclaims_pages(tmp_path):
+    """Test that new WAL databases use incremental auto-vacuum and free pages."""
+    db = Database(db_path=tmp_path / "friday.db", profile="wal")
+    assert db.pragma("auto_vacuum") == 2  # INCREMENTAL
+    
+    db.insert_many('facts', [{'category': 'c', 'subject': 's', 'content': 'x' * 4000} for _ in range(200)])
+    db.delete_chunked('facts', '1 = 1')
+    assert db.pragma("freelist_count") > 0
+    
+    stats = db.incremental_vacuum()
+    
+    assert stats["mode"] == "incremental"
+    assert stats["pages_reclaimed"] > 0
+    assert stats["freelist_remaining"] == 0
+    db.close()
+
+
+def test_incremental_vacuum_converts_legacy_file(tmp_path):
+    """Test that a database without auto_vacuum is converted once with VACUUM."""
+    db = Database(db_path=tmp_path / "friday.db", profile="legacy")
+    assert db.pragma("auto_vacuum") == 0
+    
+    assert db.incremental_vacuum()["mode"] == "full"
+    assert db.pragma("auto_vacuum") == 2
+    assert db.incremental_vacuum()["mode"] == "incremental"
+    db.close()
+
+
+def test_iter_rows_streams_in_batches(tmp_path):
+    """Test that iter_rows yields every row while fetching in batches."""
+    db = Database(db_path=tmp_path / "friday.db")
+    db.insert_many('facts', [{'category': 'c', 'subject': str(i), 'content': 'x'} for i in range(25)])
+    
+    rows = db.iter_rows("SELECT subject FROM facts ORDER BY id", batch_size=10)
+    
+    assert next(rows)._fields == ('subject',)
+    assert len(list(rows)) == 24
+    db.close()
+
+
+def test_readonly_connection_rejects_writes(tmp_path):
+    """Test that the read-only path can read but never write."""
+    db = Database(db_path=tmp_path / "friday.db")
+    db.insert('facts', {'category': 'c', 'subject': 's', 'content': 'x'})
+    
+    assert list(db.iter_rows("SELECT subject FROM facts")) == [('s',)]
+    with pytest.raises(OperationalError, match="readonly"):
+        list(db.iter_rows("DELETE FROM facts"))
+    assert db.fetchone("SELECT COUNT(*) FROM facts") == (1,)
+    db.close()
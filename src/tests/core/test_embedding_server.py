@@ -0,0 +1,108 @@
+"""
+Tests for the embedding server and its client fallback.
+"""
+
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.embedding_server import (
+    OP_ENCODE,
+    EmbeddingClient,
+    EmbeddingServer,
+    decode_request,
+    encode_request,
+)
+from src.core.embeddings import EmbeddingsModel
+from src.tests.core.test_embeddings import FakeSentenceTransformer
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = EmbeddingsModel()
+    model._model = FakeSentenceTransformer()
+    model._dimension = 8
+    server = EmbeddingServer(tmp_path / "embeddings.sock", model)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_request_round_trip():
+    """Test that texts survive framing, including non-ASCII and empty ones."""
+    frame = encode_request(OP_ENCODE, ["olá", "", "mundo"])
+
+    assert decode_request(frame[4:]) == (OP_ENCODE, ["olá", "", "mundo"])
+
+
+def test_client_uses_server_instead_of_local_model(server):
+    """Test that a client model never loads its own copy while the server is up."""
+    client_model = EmbeddingsModel(server=EmbeddingClient(server.socket_path))
+    expected = FakeSentenceTransformer().encode(["a", "b c"], normalize_embeddings=True)
+
+    vectors = client_model.encode(["a", "b c"])
+
+    np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+    assert client_model.dimension == 8
+    assert client_model._model is None
+    assert client_model.stats()["server_texts"] == 2
+    assert server.model._model.calls == [["a", "b c"]]
+    client_model.server.close()
+
+
+def test_client_falls_back_when_server_is_down(tmp_path):
+    """Test in-process encoding when the socket doesn't exist."""
+    client = EmbeddingClient(tmp_path / "missing.sock")
+    model = EmbeddingsModel(server=client)
+    model._model = FakeSentenceTransformer()
+
+    vectors = model.encode(["a"])
+
+    assert client.encode(["a"]) is None
+    assert vectors.shape == (1, 8)
+    assert model._model.calls == [["a"]]
+
+
+def test_second_server_on_same_socket_is_refused(server):
+    """Test that a live socket is not replaced by another server."""
+    with pytest.raises(RuntimeError, match="already listening"):
+        EmbeddingServer(server.socket_path, server.model)
+
+
+def test_warm_up_does_not_load_locally_while_server_is_enabled(tmp_path):
+    """Test that warm-up waits for the server instead of loading its own model."""
+    model = EmbeddingsModel(server=EmbeddingClient(tmp_path / "missing.sock", timeout=0))
+
+    model.warm_up()
+
+    assert model._model is None
+
+
+def test_client_reconnects_after_stale_connection(server):
+    """Test that a dropped cached connection is retried instead of marking the server down."""
+    client = EmbeddingClient(server.socket_path)
+    stale, peer = socket.socketpair()
+    peer.close()
+    client._local.sock = stale
+
+    vectors = client.encode(["a"])
+
+    assert vectors is not None and vectors.shape == (1, 8)
+    assert client._down_until == 0.0
+    client.close()
+
+
+def test_fallback_model_is_released_when_server_is_back(server):
+    """Test that a model loaded while the server was down doesn't stay resident."""
+    model = EmbeddingsModel(server=EmbeddingClient(server.socket_path))
+    model._model = FakeSentenceTransformer()
+
+    model.encode(["a"])
+
+    assert model._model is None
+    assert model.stats()["server_texts"] == 1
+    model.server.close()
@@ -0,0 +1,250 @@
+"""
+Tests for the embeddings model wrapper and its cache.
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from src.core import embeddings
+from src.core.embeddings import (
+    EmbeddingCache,
+    EmbeddingsModel,
+    MicroBatcher,
+    chunk_markdown,
+    chunk_text,
+    count_tokens,
+    iter_chunks,
+    mean_pool,
+)
+
+
+class FakeSentenceTransformer:
+    """Deterministic stand-in for SentenceTransformer that records its inputs."""
+
+    def __init__(self, dimension: int = 8):
+        self.dimension = dimension
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        self.calls.append(list(texts))
+        vectors = np.stack([
+            np.random.default_rng(sum(map(ord, " ".join(text.split())))).normal(size=self.dimension)
+            for text in texts
+        ]).astype(np.float32)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@pytest.fixture
+def model(test_db):
+    model = EmbeddingsModel(cache=EmbeddingCache(db=test_db, max_entries=100, evict_batch=0))
+    model._model = FakeSentenceTransformer()
+    return model
+
+
+def test_cached_encode_matches_model(model):
+    """Test that cached vectors equal freshly computed, normalized ones."""
+    uncached = FakeSentenceTransformer().encode(["a", "b"], normalize_embeddings=True)
+
+    first = model.encode(["a", "b"])
+    second = model.encode(["a", "b"])
+
+    np.testing.assert_allclose(first, uncached, rtol=1e-6)
+    np.testing.assert_allclose(second, uncached, rtol=1e-6)
+    assert model._model.calls == [["a", "b"]]
+
+
+def test_only_new_texts_reach_the_model(model):
+    """Test that hits, duplicates and whitespace variants skip the model."""
+    model.encode(["hello world"])
+
+    vectors = model.encode(["hello  world ", "new text", "new text"])
+
+    assert model._model.calls == [["hello world"], ["new text"]]
+    assert vectors.shape == (3, 8)
+    stats = model.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["entries"] == 2
+
+
+def test_backends_do_not_share_cached_vectors(model, test_db):
+    """Test that switching backend or ONNX quantization misses the torch entries."""
+    model.encode(["a"])
+    onnx = EmbeddingsModel(cache=model.cache, backend="onnx", onnx={"quantize": True})
+    onnx._model = FakeSentenceTransformer()
+
+    onnx.encode(["a"])
+
+    assert onnx._model.calls == [["a"]]
+    assert (model.cache_key, onnx.cache_key) == (
+        "sentence-transformers/all-MiniLM-L6-v2|torch|q0",
+        "sentence-transformers/all-MiniLM-L6-v2|onnx|q1",
+    )
+
+
+def test_cache_evicts_least_recently_used(test_db):
+    """Test that the size bound drops the least recently used vectors."""
+    cache = EmbeddingCache(db=test_db, max_entries=2, evict_batch=0)
+    vector = np.ones(4, dtype=np.float32)
+    cache.put_many("m", {"old": vector})
+    cache.put_many("m", {"recent": vector})
+    test_db.execute("UPDATE embedding_cache SET last_used_ms = 1 WHERE text_hash = 'old'")
+
+    cache.put_many("m", {"newest": vector})
+
+    assert set(cache.get_many("m", ["old", "recent", "newest"])) == {"recent", "newest"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_recent_hits_are_not_rewritten(test_db):
+    """Test that a hit only writes last_used_ms once it is older than the touch interval."""
+    cache = EmbeddingCache(db=test_db)
+    vector = np.ones(4, dtype=np.float32)
+    cache.put_many("m", {"recent": vector, "stale": vector})
+    test_db.execute("UPDATE embedding_cache SET last_used_ms = 1 WHERE text_hash = 'stale'")
+    before = dict(test_db.fetchall("SELECT text_hash, last_used_ms FROM embedding_cache"))
+
+    assert set(cache.get_many("m", ["recent", "stale"])) == {"recent", "stale"}
+
+    after = dict(test_db.fetchall("SELECT text_hash, last_used_ms FROM embedding_cache"))
+    assert after["recent"] == before["recent"]
+    assert after["stale"] > 1
+
+
+def test_concurrent_encodes_share_one_batch():
+    """Test that requests arriving within the wait window run as one model call."""
+    model = EmbeddingsModel(batching={"max_wait_ms": 200, "max_batch_size": 64})
+    model._model = FakeSentenceTransformer()
+    expected = FakeSentenceTransformer().encode(["a", "b", "c"], normalize_embeddings=True)
+
+    futures = [model.batcher.submit(["a"]), model.batcher.submit(["b", "c"])]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert model._model.calls == [["a", "b", "c"]]
+    np.testing.assert_allclose(model.encode(["b", "c"]), expected[1:], rtol=1e-6)
+    np.testing.assert_allclose(results[0] / np.linalg.norm(results[0]), expected[:1], rtol=1e-6)
+    assert model.batcher.stats()["mean_requests_per_batch"] == 1.5
+    model.batcher.close()
+
+
+def test_batch_errors_reach_every_caller():
+    """Test that a failing forward pass is raised in each waiting caller."""
+    def broken(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_wait_ms=200)
+    futures = [batcher.submit(["a"]), batcher.submit(["b"])]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+    batcher.close()
+
+
+def test_bad_input_only_fails_its_own_caller():
+    """Test that a failed batch is retried per request, isolating the bad input."""
+    def picky(texts):
+        if "bad" in texts:
+            raise ValueError("cannot encode")
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    batcher = MicroBatcher(picky, max_wait_ms=200)
+    good, bad = batcher.submit(["a", "b"]), batcher.submit(["bad"])
+
+    assert good.result(timeout=5).shape == (2, 2)
+    with pytest.raises(ValueError, match="cannot encode"):
+        bad.result(timeout=5)
+    batcher.close()
+
+
+def test_mean_pool_ignores_padding():
+    """Test that padded positions don't contribute to the sentence vector."""
+    tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 3.0]])
+
+
+def test_forward_passes_are_measured():
+    """Test warm-up and encode metrics (cache hits don't count as model time)."""
+    model = EmbeddingsModel()
+    model._model = FakeSentenceTransformer()
+
+    model.warm_up()
+    model.encode(["a", "b"])
+    stats = model.stats()
+
+    assert (stats["encode_calls"], stats["encode_texts"]) == (2, 3)
+    assert stats["loaded"] and stats["backend"] == "torch"
+    assert stats["ms_per_text"] >= 0
+
+
+def test_unknown_backend_is_rejected():
+    """Test that a misconfigured backend fails at construction."""
+    with pytest.raises(ValueError, match="backend"):
+        EmbeddingsModel(backend="tensorflow")
+
+
+NOTE = """# Homelab
+
+Intro about the servers.
+
+## Backups
+```
+# not a heading
+```
+Backups run nightly. Olá, cópias são ótimas.
+
+### Offsite
+Copies go to the cloud.
+"""
+
+
+def test_chunks_point_to_exact_byte_spans():
+    """Test that each chunk's text is exactly its UTF-8 byte span of the source."""
+    source = NOTE.encode("utf-8")
+
+    chunks = list(iter_chunks(NOTE, max_tokens=8, overlap_tokens=3))
+
+    assert chunks
+    for chunk in chunks:
+        assert source[chunk.start:chunk.end].decode("utf-8") == chunk.text
+        assert chunk.tokens <= 8
+
+
+def test_chunks_carry_heading_paths_outside_code_fences():
+    """Test heading paths, and that '#' lines inside fences are content."""
+    chunks = list(iter_chunks(NOTE, max_tokens=100))
+
+    assert [(chunk.heading_path, chunk.text.splitlines()[0]) for chunk in chunks] == [
+        ("Homelab", "Intro about the servers."),
+        ("Homelab > Backups", "```"),
+        ("Homelab > Backups > Offsite", "Copies go to the cloud."),
+    ]
+    assert "# not a heading" in chunks[1].text
+    assert chunk_markdown(NOTE)[2]["metadata"]["h3"] == "Offsite"
+
+
+def test_long_lines_split_with_overlap():
+    """Test that a newline-free paragraph is split at sentences and overlaps between chunks."""
+    text = " ".join(f"Sentence number {i} is here." for i in range(40))
+
+    chunks = chunk_text(text, max_tokens=30, overlap_tokens=12)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 30 for chunk in chunks)
+    assert chunks[0].split(". ")[-1] in chunks[1]
+
+
+def test_stream_reads_keep_multibyte_characters_whole(monkeypatch):
+    """Test that bounded reads of one long line never cut a UTF-8 character."""
+    monkeypatch.setattr(embeddings, "_MAX_LINE_BYTES", 7)
+    text = "ãé" * 50 + " ótimo"
+
+    chunks = list(iter_chunks(io.BytesIO(text.encode("utf-8")), max_tokens=1000))
+
+    assert [chunk.text for chunk in chunks] == [text]
+    assert chunks[0].end == len(text.encode("utf-8"))
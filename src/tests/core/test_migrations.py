@@ -0,0 +1,208 @@
+"""
+Tests for versioned schema migrations.
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from src.core import migrations
+from src.core.database import Database
+
+
+def test_fresh_database_is_current(test_db):
+    """Test that a new database ends at the latest schema version."""
+    assert test_db.schema_version == migrations.latest_version()
+
+
+def test_current_database_skips_init(tmp_path, mocker):
+    """Test that reopening an up-to-date database runs no migrations."""
+    Database(db_path=tmp_path / "friday.db").close()
+
+    migrate = mocker.spy(migrations, "migrate")
+    db = Database(db_path=tmp_path / "friday.db")
+
+    migrate.assert_not_called()
+    db.close()
+
+
+def test_unversioned_database_is_adopted(tmp_path):
+    """Test that a pre-versioning database (user_version 0) is migrated in place."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE snapshots (
+            id TEXT PRIMARY KEY, collector TEXT NOT NULL,
+            timestamp TEXT NOT NULL, data TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX idx_snapshots_collector ON snapshots(collector);
+        INSERT INTO snapshots (id, collector, timestamp, data)
+        VALUES ('a', 'homelab', '2025-01-01T10:00:00', '{}');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    assert db.schema_version == migrations.latest_version()
+    assert db.fetchone("SELECT content_hash FROM snapshots WHERE id = 'a'") == (None,)
+    indexes = {row[0] for row in db.fetchall("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_snapshots_collector_ts" in indexes
+    assert "idx_snapshots_collector" not in indexes
+    db.close()
+
+
+def test_backfill_epoch_ms(tmp_path):
+    """Test that existing ISO timestamps with mixed offsets are backfilled."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE snapshots (
+            id TEXT PRIMARY KEY, collector TEXT NOT NULL,
+            timestamp TEXT NOT NULL, data TEXT NOT NULL
+        );
+        INSERT INTO snapshots (id, collector, timestamp, data) VALUES
+            ('aware', 'homelab', '2025-01-01T10:00:00-03:00', '{}'),
+            ('naive', 'homelab', '2025-01-01T10:00:00', '{}');
+        CREATE TABLE conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL
+        );
+        INSERT INTO conversation_history (conversation_id, timestamp, role, content)
+        VALUES ('s', '2025-01-01T13:00:00', 'user', 'hi');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    expected = 1735736400000  # 2025-01-01T13:00:00Z
+    assert db.fetchall("SELECT id, ts_ms FROM snapshots ORDER BY id") == [
+        ('aware', expected), ('naive', expected)  # naive awareness rows are local time
+    ]
+    assert db.fetchone("SELECT ts_ms FROM conversation_history") == (expected,)  # naive UTC
+    db.close()
+
+
+def test_failed_migration_keeps_previous_version(test_db, monkeypatch):
+    """Test that a failing step is rolled back with its version bump."""
+    version = test_db.schema_version
+
+    def broken(conn):
+        conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(
+        migrations, "MIGRATIONS",
+        migrations.MIGRATIONS + [migrations.Migration(version + 1, "broken", broken)]
+    )
+
+    with test_db.engine.connect() as conn:
+        with pytest.raises(RuntimeError):
+            migrations.migrate(conn)
+
+    assert test_db.schema_version == version
+    assert test_db.fetchone("SELECT name FROM sqlite_master WHERE name = 'half_done'") is None
+
+
+@pytest.mark.parametrize("query, index", [
+    ("SELECT COUNT(*) FROM insights WHERE dedupe_key = 'k' AND created_at_ms >= 0",
+     "idx_insights_dedupe_ts"),
+    ("SELECT id, content_hash FROM snapshots WHERE collector = 'homelab' ORDER BY ts_ms DESC LIMIT 1",
+     "idx_snapshots_collector_ts"),
+])
+def test_hot_queries_use_covering_indexes(test_db, query, index):
+    """Test that the planner answers hot queries from a covering index."""
+    plan = " ".join(row[-1] for row in test_db.fetchall(f"EXPLAIN QUERY PLAN {query}"))
+
+    assert f"COVERING INDEX {index}" in plan
+
+
+def test_reach_out_budget_moves_to_ledger(tmp_path):
+    """Test that legacy JSON budget rows become budget_events rows."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE reach_out_budget (
+            date TEXT PRIMARY KEY, count INTEGER DEFAULT 0,
+            max_per_day INTEGER DEFAULT 5, deliveries TEXT DEFAULT '[]'
+        );
+        INSERT INTO reach_out_budget VALUES ('2025-01-01', 3, 5, '["a", "b"]');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    assert db.fetchall("SELECT date, insight_id FROM budget_events ORDER BY id") == [
+        ('2025-01-01', 'a'), ('2025-01-01', 'b'), ('2025-01-01', None)
+    ]
+    db.close()
+
+
+def test_conversation_history_fts_is_backfilled(tmp_path):
+    """Test that existing messages are indexed when the FTS table is created."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL
+        );
+        INSERT INTO conversation_history (conversation_id, timestamp, role, content)
+        VALUES ('s', '2025-01-01T13:00:00', 'user', 'book the dentist appointment');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    assert db.fetchall(
+        "SELECT rowid FROM conversation_history_fts WHERE conversation_history_fts MATCH 'dentist'"
+    ) == [(1,)]
+    db.close()
+
+
+def test_conversation_seq_is_backfilled(tmp_path):
+    """Test that existing messages get per-session seq in timestamp order."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL
+        );
+        INSERT INTO conversation_history (conversation_id, timestamp, role, content) VALUES
+            ('a', '2025-01-01T13:00:05', 'user', 'second'),
+            ('b', '2025-01-01T13:00:00', 'user', 'other'),
+            ('a', '2025-01-01T13:00:00', 'user', 'first');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    assert db.fetchall(
+        "SELECT conversation_id, seq, content FROM conversation_history ORDER BY conversation_id, seq"
+    ) == [('a', 1, 'first'), ('a', 2, 'second'), ('b', 1, 'other')]
+    db.close()
+
+
+def test_sessions_are_backfilled(tmp_path):
+    """Test that the sessions table is filled from existing messages."""
+    path = tmp_path / "friday.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL
+        );
+        INSERT INTO conversation_history (conversation_id, timestamp, role, content) VALUES
+            ('a', '2025-01-01T13:00:00', 'user', 'hello'),
+            ('a', '2025-01-01T13:00:05', 'assistant', 'hi there');
+    """)
+    conn.close()
+
+    db = Database(db_path=path)
+
+    assert db.fetchone(
+        "SELECT message_count, first_timestamp, last_timestamp FROM sessions WHERE conversation_id = 'a'"
+    ) == (2, '2025-01-01T13:00:00', '2025-01-01T13:00:05')
+    db.close()
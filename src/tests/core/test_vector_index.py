@@ -0,0 +1,141 @@
+"""
+Tests for the matrix-backed vector index.
+"""
+
+import numpy as np
+import pytest
+
+from src.core.vector_index import VectorIndex, normalize_rows
+
+
+def _vectors(count: int, dimension: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+
+
+def test_search_matches_brute_force():
+    """Test that top-k equals a full sort of cosine similarities."""
+    vectors = _vectors(500)
+    index = VectorIndex(dimension=16, capacity=8)  # forces growth
+    index.add([str(i) for i in range(500)], vectors)
+    query = _vectors(1, seed=1)[0]
+
+    results = index.search(query, k=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    expected = np.argsort(-scores)[:5]
+    assert [id_ for id_, _ in results] == [str(i) for i in expected]
+    assert results[0][1] == pytest.approx(float(scores[expected[0]]), rel=1e-5)
+
+
+def test_add_replaces_and_remove_keeps_rows_contiguous():
+    """Test upsert by id and swap-delete."""
+    index = VectorIndex(dimension=16)
+    vectors = _vectors(3)
+    index.add(["a", "b", "c"], vectors)
+    index.add(["a"], vectors[2:3])
+
+    assert len(index) == 3
+    assert index.remove(["a", "missing"]) == 1
+    assert index.ids == ["c", "b"]
+    assert index.search(vectors[1], k=1)[0][0] == "b"
+    assert index.search(vectors[2], k=5, min_score=0.99) == [("c", pytest.approx(1.0))]
+
+
+def test_persistence_round_trip(tmp_path):
+    """Test that a saved index reopens memory-mapped with ids and metadata."""
+    index = VectorIndex.open(tmp_path / "facts", dimension=16)
+    index.add(["a", "b"], _vectors(2))
+    index.metadata["max_fact_id"] = 7
+    index.save()
+    index.add(["unsaved"], _vectors(1, seed=3))  # not committed by save()
+
+    reopened = VectorIndex.open(tmp_path / "facts", dimension=16)
+
+    assert reopened.ids == ["a", "b"]
+    assert reopened.metadata == {"max_fact_id": 7}
+    assert isinstance(reopened._matrix, np.memmap)
+    assert VectorIndex.open(tmp_path / "facts", dimension=8).ids == []
+
+
+@pytest.mark.parametrize("dtype, rerank", [("float16", False), ("int8", False), ("int8", True)])
+def test_quantized_search_recalls_float32_results(dtype, rerank):
+    """Test that quantized storage finds (nearly) the same neighbours in less memory."""
+    vectors = _vectors(2000, dimension=64)
+    queries = _vectors(20, dimension=64, seed=1)
+    exact = VectorIndex(dimension=64)
+    quantized = VectorIndex(dimension=64, dtype=dtype, rerank=rerank)
+    for index in (exact, quantized):
+        index.add([str(i) for i in range(2000)], vectors)
+
+    hits = sum(
+        len({id_ for id_, _ in exact.search(query, k=10)} & {id_ for id_, _ in quantized.search(query, k=10)})
+        for query in queries
+    )
+
+    assert hits / (10 * len(queries)) >= 0.9
+    assert quantized.memory_bytes()["vectors"] < exact.memory_bytes()["vectors"]
+    if rerank:
+        assert quantized.search(queries[0], k=10) == pytest.approx(exact.search(queries[0], k=10))
+
+
+def test_quantized_index_persists_and_rejects_other_dtype(tmp_path):
+    """Test that int8 codes and scales round-trip and a dtype change starts empty."""
+    vectors = _vectors(3)
+    index = VectorIndex.open(tmp_path / "facts", dimension=16, dtype="int8", rerank=True)
+    index.add(["a", "b", "c"], vectors)
+    index.remove(["a"])
+    index.save()
+
+    reopened = VectorIndex.open(tmp_path / "facts", dimension=16, dtype="int8", rerank=True)
+
+    assert reopened.ids == ["c", "b"]
+    assert reopened.search(vectors[1], k=1)[0] == ("b", pytest.approx(1.0))
+    assert VectorIndex.open(tmp_path / "facts", dimension=16).ids == []
+
+
+def test_processes_sharing_an_index_see_each_others_saves(tmp_path):
+    """Test that a stale instance reloads instead of writing over another's rows."""
+    vectors = _vectors(3)
+    first = VectorIndex.open(tmp_path / "facts", dimension=16)
+    second = VectorIndex.open(tmp_path / "facts", dimension=16)
+    with first.locked():
+        first.add(["a", "b"], vectors[:2])
+        first.metadata["max_fact_id"] = 2
+        first.save()
+
+    with second.locked():
+        assert second.refresh()
+        second.add(["c"], vectors[2:])
+        second.save()
+
+    assert first.refresh()
+    assert first.ids == ["a", "b", "c"]
+    assert first.search(vectors[0], k=1)[0][0] == "a"
+    assert first.metadata == {"max_fact_id": 2}
+    assert not first.refresh()
+
+
+def test_shared_quantized_index_keeps_scales_and_rerank_rows_together(tmp_path):
+    """Test that int8 codes, scales and float32 rerank rows commit as one generation."""
+    vectors = _vectors(3) * np.array([[1.0], [10.0], [0.1]], dtype=np.float32)
+    first = VectorIndex.open(tmp_path / "facts", dimension=16, dtype="int8", rerank=True)
+    second = VectorIndex.open(tmp_path / "facts", dimension=16, dtype="int8", rerank=True)
+    with first.locked():
+        first.add(["a", "b"], vectors[:2])
+        first.save()
+
+    with second.locked():
+        second.refresh()
+        second.remove(["a"])  # moves b's codes, scale and float32 row into row 0
+        second.add(["c"], vectors[2:])
+        second.save()
+    first.refresh()
+
+    assert first.ids == ["b", "c"]
+    for id_, vector in (("b", vectors[1]), ("c", vectors[2])):
+        assert first.search(vector, k=1)[0] == (id_, pytest.approx(1.0))
+        assert first._scores(normalize_rows(vector)[0], 2)[first.ids.index(id_)] == pytest.approx(1.0, abs=0.02)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "facts.g2.full.npy", "facts.g2.npy", "facts.g2.scales.npy", "facts.json", "facts.lock",
+    ]
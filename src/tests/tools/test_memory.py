@@ -174,3 +174,30 @@ def test_get_last_user_message_with_multiple_users(test_db, mock_get_db):
     # Should get the most recent one
     assert "Third message" in result
     assert "10:02" in result
+
+
+def test_conversation_history_full_text_search(test_db, mock_get_db):
+    """Test ranked full-text search with snippets, kept in sync by triggers."""
+    from types import SimpleNamespace
+    from src.tools.memory import get_conversation_history
+    
+    ctx = SimpleNamespace(deps=SimpleNamespace(session_id='default'))
+    for i, content in enumerate([
+        'Remind me to water the plants',
+        'The plants on the balcony need more sun, water them twice a week',
+        'Ação de graças é amanhã',
+        'Unrelated message',
+    ]):
+        test_db.insert('conversation_history', {
+            'conversation_id': 'default', 'timestamp': f'2024-01-10T10:0{i}:00',
+            'ts_ms': i, 'role': 'user', 'content': content
+        })
+    
+    result = get_conversation_history(ctx, query="plants water")
+    assert "2 messages" in result
+    assert "[plants]" in result and "Unrelated" not in result
+    
+    assert "1 messages" in get_conversation_history(ctx, query="acao")  # accent-insensitive
+    
+    test_db.delete('conversation_history', 'content LIKE :pattern', {'pattern': 'Remind%'})
+    assert "1 messages" in get_conversation_history(ctx, query="plants")
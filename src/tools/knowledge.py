@@ -22,6 +22,7 @@ Architecture:
 import logging
 import os
 import sqlite3
+import threading
 import numpy as np
 from datetime import datetime
 from typing import Optional, List, Dict, Tuple
@@ -30,6 +31,7 @@ from pathlib import Path
 from settings import settings
 from src.utils.time import get_brt
 from src.core.embeddings import get_embeddings
+from src.core.vector_index import VectorIndex
 
 # Vault integration temporarily disabled - needs to be updated for new structure
 # Will use database-only mode for now
@@ -43,6 +45,11 @@ def _get_facts_db_path() -> str:
     return os.path.expanduser("~/friday_facts.db")
 
 
+def _get_facts_index_path() -> Path:
+    """Get the base path of the facts vector index (next to the facts database)."""
+    return Path(os.path.expanduser("~/friday_facts_index"))
+
+
 def _init_facts_db():
     """Initialize the facts database as vault index/cache."""
     db_path = _get_facts_db_path()
@@ -138,10 +145,61 @@ def _blob_to_embedding(blob: bytes) -> np.ndarray:
     return np.frombuffer(blob, dtype=np.float32)
 
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    """Calculate cosine similarity between two vectors."""
-    similarity = np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-    return float(similarity)  # Convert to Python float
+# Vector index over the latest embedding of each topic (id = topic)
+_facts_index: Optional[VectorIndex] = None
+_facts_index_lock = threading.Lock()
+
+
+def _sync_facts_index(conn: sqlite3.Connection) -> VectorIndex:
+    """Get the facts vector index, catching up with rows added since it was saved.
+    
+    The index remembers the highest facts.id it has seen; new rows (from this
+    or another process) are decoded in one np.frombuffer call and upserted by
+    topic. A facts table behind the index (e.g. recreated) triggers a rebuild.
+    The bot, CLI and awareness processes share the index files, so the
+    catch-up runs under the index's file lock after reloading any
+    generation another process saved.
+    """
+    global _facts_index
+    
+    with _facts_index_lock:
+        dimension = get_embeddings().dimension
+        if _facts_index is None or _facts_index.dimension != dimension:
+            _facts_index = VectorIndex.open(
+                _get_facts_index_path(),
+                dimension=dimension,
+                dtype=settings.EMBEDDINGS["index"]["dtype"],
+                rerank=settings.EMBEDDINGS["index"]["rerank"],
+            )
+        index = _facts_index
+        
+        with index.locked():
+            index.refresh()
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM facts").fetchone()[0]
+            synced_id = index.metadata.get("max_fact_id", 0)
+            if max_id < synced_id:
+                logger.info("[STORE] Facts table changed under the vector index, rebuilding")
+                index.clear()
+                synced_id = 0
+            if max_id == synced_id:
+                return index
+            
+            rows = conn.execute("""
+                SELECT topic, embedding FROM facts
+                WHERE id > ? AND embedding IS NOT NULL
+                ORDER BY id
+            """, (synced_id,)).fetchall()
+            
+            # Later rows of a topic win; vectors of another dimension are skipped
+            latest = {topic: blob for topic, blob in rows if len(blob) == dimension * 4}
+            if latest:
+                vectors = np.frombuffer(b"".join(latest.values()), dtype=np.float32).reshape(-1, dimension)
+                index.add(list(latest.keys()), vectors)
+            
+            index.metadata["max_fact_id"] = max_id
+            index.save()
+        logger.info(f"[STORE] Indexed {len(latest)} fact embeddings ({len(index)} topics)")
+        return index
 
 
 def _vector_search_facts(query: str, limit: int = 5, min_similarity: float = 0.3) -> List[Tuple[str, str, str, float]]:
@@ -160,40 +218,34 @@ def _vector_search_facts(query: str, limit: int = 5, min_similarity: float = 0.3
         
         # Generate query embedding
         embeddings_model = get_embeddings()
-        query_embedding = embeddings_model.encode(query, normalize=True)
+        query_embedding = embeddings_model.encode(query, normalize=True)[0]
         
-        # Get all facts with embeddings
         conn = sqlite3.connect(_get_facts_db_path())
-        cursor = conn.cursor()
-        
-        # Get latest version of each fact that has an embedding
-        cursor.execute("""
-            SELECT f1.topic, f1.value, f1.category, f1.embedding
-            FROM facts f1
-            INNER JOIN (
-                SELECT topic, MAX(created_at) as max_date
-                FROM facts
-                WHERE embedding IS NOT NULL
-                GROUP BY topic
-            ) f2 ON f1.topic = f2.topic AND f1.created_at = f2.max_date
-        """)
-        
-        results = []
-        for row in cursor.fetchall():
-            topic, value, category, embedding_blob = row
+        try:
+            index = _sync_facts_index(conn)
+            matches = index.search(query_embedding, k=limit, min_score=min_similarity)
+            if not matches:
+                return []
             
-            if embedding_blob:
-                fact_embedding = _blob_to_embedding(embedding_blob)
-                similarity = _cosine_similarity(query_embedding, fact_embedding)
-                
-                if similarity >= min_similarity:
-                    results.append((topic, value, category or 'none', similarity))
-        
-        conn.close()
-        
-        # Sort by similarity (descending) and limit
-        results.sort(key=lambda x: x[3], reverse=True)
-        return results[:limit]
+            # Latest value/category of the matched topics
+            topics = [topic for topic, _ in matches]
+            placeholders = ", ".join("?" for _ in topics)
+            rows = conn.execute(f"""
+                SELECT topic, value, category FROM facts
+                WHERE id IN (
+                    SELECT MAX(id) FROM facts WHERE topic IN ({placeholders}) AND embedding IS NOT NULL
+                    GROUP BY topic
+                )
+            """, topics).fetchall()
+        finally:
+            conn.close()
+        
+        details = {topic: (value, category) for topic, value, category in rows}
+        return [
+            (topic, details[topic][0], details[topic][1] or 'none', similarity)
+            for topic, similarity in matches
+            if topic in details
+        ]
         
     except Exception as e:
         logger.error(f"Error in vector search: {e}")
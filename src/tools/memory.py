@@ -18,10 +18,12 @@ if str(_parent_dir) not in sys.path:
 from src.core.agent import agent
 
 import logging
+import re
 from datetime import datetime
 from typing import Optional
 
 from settings import settings
+from src.core.conversation import get_conversation_manager
 from src.core.database import get_db
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,20 @@ logger = logging.getLogger(__name__)
 # Session context is now passed via agent dependencies
 # No need for _get_session_id() function anymore
 
+_FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_match(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression (all words, prefix match).
+    
+    Words are quoted so FTS5 operators typed by the user (AND, NEAR, "-", ...)
+    are treated as plain text.
+    """
+    tokens = _FTS_TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
 
 @agent.tool
 def get_conversation_history(
@@ -46,7 +62,8 @@ def get_conversation_history(
     - Any reference to past conversations
     
     Args:
-        query: Optional search query to filter messages (case-insensitive)
+        query: Optional search query; messages containing all its words are
+            returned best match first (case- and accent-insensitive)
         limit: Maximum number of messages to return (default 10, max 50)
         
     Returns:
@@ -62,20 +79,28 @@ def get_conversation_history(
         
         # Query conversations
         if query:
+            match = _fts_match(query)
+            if match is None:
+                return f"No messages found matching '{query}' in conversation history."
+            
+            # Ranked full-text search; the snippet replaces the truncated content
             sql = """
-                SELECT timestamp, role, content 
-                FROM conversation_history 
-                WHERE conversation_id = :session_id AND content LIKE :query
-                ORDER BY timestamp DESC 
+                SELECT h.timestamp, h.role,
+                       snippet(conversation_history_fts, 0, '[', ']', '…', 24)
+                FROM conversation_history_fts
+                JOIN conversation_history h ON h.id = conversation_history_fts.rowid
+                WHERE conversation_history_fts MATCH :match
+                  AND h.conversation_id = :session_id
+                ORDER BY bm25(conversation_history_fts)
                 LIMIT :limit
             """
-            params = {"session_id": session_id, "query": f"%{query}%", "limit": limit}
+            params = {"session_id": session_id, "match": match, "limit": limit}
         else:
             sql = """
                 SELECT timestamp, role, content 
                 FROM conversation_history 
                 WHERE conversation_id = :session_id
-                ORDER BY timestamp DESC 
+                ORDER BY seq DESC 
                 LIMIT :limit
             """
             params = {"session_id": session_id, "limit": limit}
@@ -90,10 +115,14 @@ def get_conversation_history(
         
         # Format the results
         formatted = []
-        formatted.append(f"📜 Conversation History ({len(rows)} messages):")
+        if query:
+            formatted.append(f"📜 Conversation History ({len(rows)} messages matching '{query}', best first):")
+        else:
+            formatted.append(f"📜 Conversation History ({len(rows)} messages):")
         formatted.append("=" * 50)
         
-        for timestamp, role, content in reversed(rows):  # Reverse to show oldest first
+        # Search results keep rank order, recent history is shown oldest first
+        for timestamp, role, content in (rows if query else reversed(rows)):
             # Format timestamp
             try:
                 dt = datetime.fromisoformat(timestamp)
@@ -137,7 +166,7 @@ def get_last_user_message(ctx) -> str:
             SELECT timestamp, content 
             FROM conversation_history 
             WHERE conversation_id = :session_id AND role = 'user'
-            ORDER BY timestamp DESC 
+            ORDER BY seq DESC 
             LIMIT 1
         """
         
@@ -183,7 +212,7 @@ def summarize_conversation(ctx, messages: int = 20) -> str:
             SELECT role, content 
             FROM conversation_history 
             WHERE conversation_id = :session_id
-            ORDER BY timestamp DESC 
+            ORDER BY seq DESC 
             LIMIT :limit
         """
         
@@ -247,12 +276,8 @@ def clear_conversation_history(ctx) -> str:
         if message_count == 0:
             return "💭 No conversation history to clear. Starting fresh!"
         
-        # Delete all messages for this session
-        delete_sql = """
-            DELETE FROM conversation_history 
-            WHERE conversation_id = :session_id
-        """
-        db.execute(delete_sql, {"session_id": session_id})
+        # Delete all messages, saved turns, summary and cached history for this session
+        get_conversation_manager().clear_history(session_id)
         
         logger.info(f"Cleared {message_count} messages for session {session_id}")
         